@@ -3,15 +3,23 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from wordcloud import WordCloud
 import os
+import sys
+
+# Parser monetário compartilhado com o dashboard (dashboard_utils/money.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard_oscs'))
+from dashboard_utils.money import to_cents, cents_to_reais, format_reais
 
 # Configuração de estilo
 sns.set_theme(style="whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
 
-def clean_currency(x):
-    if isinstance(x, str):
-        return float(x.replace('R$', '').replace('.', '').replace(',', '.').strip())
-    return x
+VALOR_CENTAVOS = 'Valor do Repasse_centavos'
+
+
+def brl(cents, decimals=True):
+    """Centavos -> 'R$ 1.234,56' (ou 'R$ 1.235' sem decimais), no padrão brasileiro."""
+    text = format_reais(cents) if decimals else f"R$ {round(cents / 100):,}"
+    return text.replace(',', 'X').replace('.', ',').replace('X', '.')
 
 def main():
     # Caminho do arquivo relativo ao script
@@ -62,7 +70,9 @@ def main():
 
     # Limpeza de dados
     print("Limpando dados...")
-    df['Valor do Repasse'] = df['Valor do Repasse'].apply(clean_currency)
+    # Somas em centavos inteiros; 'Valor do Repasse' em reais fica só para os gráficos
+    df[VALOR_CENTAVOS] = to_cents(df['Valor do Repasse'])
+    df['Valor do Repasse'] = cents_to_reais(df[VALOR_CENTAVOS])
     
     # Criar diretório para salvar gráficos se não existir
     output_dir = script_dir
@@ -71,7 +81,7 @@ def main():
     
     # 1. Top 10 Entidades com Maior Repasse
     print("Gerando gráfico 1: Top 10 Entidades...")
-    top_10 = df.nlargest(10, 'Valor do Repasse')
+    top_10 = df.nlargest(10, VALOR_CENTAVOS)
     plt.figure(figsize=(14, 8))
     sns.barplot(data=top_10, y='Entidade', x='Valor do Repasse', palette='viridis')
     plt.title('Top 10 Entidades com Maior Repasse')
@@ -85,7 +95,8 @@ def main():
     print("Gerando gráfico 2: Distribuição por Área de Atuação (Pizza)...")
     # Usar 'Área de Atuação' em vez de 'Secretaria'
     target_col = 'Área de Atuação'
-    dept_sum = df.groupby(target_col)['Valor do Repasse'].sum().sort_values(ascending=False)
+    dept_sum_cents = df.groupby(target_col)[VALOR_CENTAVOS].sum().sort_values(ascending=False)
+    dept_sum = cents_to_reais(dept_sum_cents)
     
     # Agrupar fatias muito pequenas (< 2%) em "Outros" para evitar sobreposição
     # REMOVIDO A PEDIDO DO USUÁRIO: Mostrar todas as áreas
@@ -107,7 +118,7 @@ def main():
     # Usar uma paleta com cores suficientes
     colors = sns.color_palette('Set3', len(dept_sum))
     
-    total_val = dept_sum.sum()
+    total_cents = dept_sum_cents.sum()
 
     def format_autopct(pct):
         return f'{pct:.1f}%' if pct > 2 else ''
@@ -116,14 +127,13 @@ def main():
     
     # Criar legendas detalhadas
     legend_labels = []
-    for label, value in zip(dept_sum.index, dept_sum.values):
-        pct = (value / total_val) * 100
-        val_str = f'R$ {value:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-        legend_labels.append(f'{label}: {val_str} ({pct:.1f}%)')
+    for label, value in zip(dept_sum_cents.index, dept_sum_cents.values):
+        pct = (value / total_cents) * 100
+        legend_labels.append(f'{label}: {brl(value)} ({pct:.1f}%)')
 
     plt.legend(wedges, legend_labels, title=f"{target_col}", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
     
-    total_val_str = f'R$ {total_val:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+    total_val_str = brl(total_cents)
     plt.title(f'Distribuição de Verba por {target_col}\nTotal: {total_val_str}', fontsize=14)
     plt.tight_layout()
     plt.savefig(os.path.join(output_dir, '2_distribuicao_area_atuacao.png'), bbox_inches='tight')
@@ -139,10 +149,9 @@ def main():
         f.write(f"{'Área de Atuação':<50} | {'Valor (R$)':<20} | {'%':<10}\n")
         f.write("-" * 80 + "\n")
         
-        for label, value in zip(dept_sum.index, dept_sum.values):
-            pct = (value / total_val) * 100
-            val_str = f'R$ {value:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-            f.write(f"{label:<50} | {val_str:<20} | {pct:>6.2f}%\n")
+        for label, value in zip(dept_sum_cents.index, dept_sum_cents.values):
+            pct = (value / total_cents) * 100
+            f.write(f"{label:<50} | {brl(value):<20} | {pct:>6.2f}%\n")
             
         f.write("-" * 80 + "\n")
     
@@ -158,9 +167,8 @@ def main():
     plt.xticks(rotation=45, ha='right')
     
     # Adicionar rótulos de valor nas barras
-    for i, v in enumerate(dept_sum.values):
-        val_str = f'R$ {v:,.0f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-        plt.text(i, v, val_str, ha='center', va='bottom', fontsize=9)
+    for i, (v, cents) in enumerate(zip(dept_sum.values, dept_sum_cents.values)):
+        plt.text(i, v, brl(cents, decimals=False), ha='center', va='bottom', fontsize=9)
         
     plt.tight_layout()
     plt.savefig(os.path.join(output_dir, '2_1_barras_area_atuacao.png'))
@@ -179,9 +187,9 @@ def main():
 
     # 4. Análise de Pareto
     print("Gerando gráfico 4: Análise de Pareto...")
-    df_sorted = df.sort_values(by='Valor do Repasse', ascending=False)
-    df_sorted['Acumulado'] = df_sorted['Valor do Repasse'].cumsum()
-    df_sorted['Percentual Acumulado'] = 100 * df_sorted['Acumulado'] / df_sorted['Valor do Repasse'].sum()
+    df_sorted = df.sort_values(by=VALOR_CENTAVOS, ascending=False)
+    df_sorted['Acumulado'] = df_sorted[VALOR_CENTAVOS].cumsum()
+    df_sorted['Percentual Acumulado'] = 100 * df_sorted['Acumulado'] / df_sorted[VALOR_CENTAVOS].sum()
     
     fig, ax1 = plt.subplots(figsize=(12, 8))
     
@@ -223,7 +231,8 @@ def main():
     print("Gerando gráfico 6: Totais por Secretaria (Barras)...")
     plt.figure(figsize=(12, 8))
     # Recalcular sem o agrupamento "Outros" para ver todas
-    dept_sum_all = df.groupby('Secretaria')['Valor do Repasse'].sum().sort_values(ascending=False)
+    dept_sum_all_cents = df.groupby('Secretaria')[VALOR_CENTAVOS].sum().sort_values(ascending=False)
+    dept_sum_all = cents_to_reais(dept_sum_all_cents)
     sns.barplot(x=dept_sum_all.index, y=dept_sum_all.values, palette='viridis')
     plt.title('Total de Repasses por Secretaria')
     plt.xlabel('Secretaria')
@@ -231,8 +240,8 @@ def main():
     plt.xticks(rotation=45)
     
     # Adicionar rótulos de valor nas barras
-    for i, v in enumerate(dept_sum_all.values):
-        plt.text(i, v, f'R$ {v:,.0f}'.replace(',', 'X').replace('.', ',').replace('X', '.'), 
+    for i, (v, cents) in enumerate(zip(dept_sum_all.values, dept_sum_all_cents.values)):
+        plt.text(i, v, brl(cents, decimals=False), 
                  ha='center', va='bottom')
                  
     plt.tight_layout()
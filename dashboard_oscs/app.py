@@ -15,6 +15,8 @@ except ImportError:
     is_mobile_device = lambda: False
     render_mobile_header = lambda p: None
 
+from dashboard_utils.warmup import start_warmup, render_warmup_indicator
+
 # Configuração da Página Principal
 st.set_page_config(page_title="Relatório OSCs Santos", layout="wide")
 
@@ -56,5 +58,9 @@ else:
 if mobile_mode:
     render_mobile_header(pages)
 
-# 6. Run the selected page
+# 6. Warm the data caches in background (once per process) and show readiness in the sidebar
+start_warmup()
+render_warmup_indicator()
+
+# 7. Run the selected page
 pg.run()
\ No newline at end of file
@@ -0,0 +1,247 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Catálogo das áreas e subáreas de atuação (classificação do IPEA / Mapa das OSCs).
+# Cada área e subárea tem um código inteiro estável, que também é a posição do seu bit
+# nas máscaras de pertencimento (area_mask / membership_bits). Os códigos não mudam
+# com a ordem ou a presença das colunas em cada base; novas entradas recebem códigos novos.
+#
+#   label:       rótulo da Tabela 2 (Áreas e Subáreas de Atuação)
+#   short_label: rótulo curto usado nos filtros e popups dos mapas
+#   col:         coluna one-hot na base de OSCs de Santos (oscs_santos.csv: Area_* / SubArea_*)
+#   ipea_col:    cabeçalho na planilha area_subarea.csv do Mapa das OSCs, com acentos corretos
+#                (os cabeçalhos da planilha vêm truncados e em mojibake; ver normalize_col)
+AREAS = [
+    {'code': 0, 'label': 'Habitação', 'short_label': 'Habitação', 'col': None, 'ipea_col': 'Habitação', 'subareas': [
+        {'code': 0, 'label': 'Habitação', 'col': None, 'ipea_col': 'Hab sub Habitação'},
+        {'code': 1, 'label': 'Outros Habitação', 'col': None, 'ipea_col': 'Hab sub Outros'},
+    ]},
+    {'code': 1, 'label': 'Saúde', 'short_label': 'Saúde', 'col': 'Area_Saude', 'ipea_col': 'Saúde', 'subareas': [
+        {'code': 2, 'label': 'Hospitais', 'col': 'SubArea_Hospitais', 'ipea_col': 'Saude sub Hospitais'},
+        {'code': 3, 'label': 'Outros serviços de saúde', 'col': 'SubArea_Outros_servicos_de_saude', 'ipea_col': 'Saude sub Outros serviços de saúde'},
+        {'code': 4, 'label': 'Subárea Não Identificada', 'col': None, 'ipea_col': 'Saude sub Outros'},
+    ]},
+    {'code': 2, 'label': 'Cultura e recreação', 'short_label': 'Cultura e Recreação', 'col': 'Area_Cultura_e_recreacao', 'ipea_col': 'Cultura e recreação', 'subareas': [
+        {'code': 5, 'label': 'Cultura e arte', 'col': 'SubArea_Cultura_e_arte', 'ipea_col': 'Cultura sub Cultura e arte'},
+        {'code': 6, 'label': 'Esportes e recreação', 'col': 'SubArea_Esportes_e_recreacao', 'ipea_col': 'Cultura sub Esporte e recreação'},
+        {'code': 7, 'label': 'Outros Cultura e recreação', 'col': None, 'ipea_col': 'Cultura sub Outros'},
+    ]},
+    {'code': 3, 'label': 'Educação e pesquisa', 'short_label': 'Educação e Pesquisa', 'col': 'Area_Educacao_e_pesquisa', 'ipea_col': 'Educação e pesquisa', 'subareas': [
+        {'code': 8, 'label': 'Educação infantil', 'col': 'SubArea_Educacao_infantil', 'ipea_col': 'Educacao sub Educação infantil'},
+        {'code': 9, 'label': 'Ensino fundamental', 'col': 'SubArea_Ensino_fundamental', 'ipea_col': 'Educacao sub Ensino fundamental'},
+        {'code': 10, 'label': 'Ensino médio', 'col': None, 'ipea_col': 'Educacao sub Ensino médio'},
+        {'code': 11, 'label': 'Ensino superior', 'col': 'SubArea_Ensino_superior', 'ipea_col': 'Educacao sub Educação superior'},
+        {'code': 12, 'label': 'Estudos e pesquisas', 'col': 'SubArea_Estudos_e_pesquisas', 'ipea_col': 'Educacao sub Estudos e pesquisas'},
+        {'code': 13, 'label': 'Educação profissional', 'col': 'SubArea_Educacao_profissional', 'ipea_col': 'Educacao sub Educação profissional'},
+        {'code': 14, 'label': 'Outras formas de educação/ensino', 'col': 'SubArea_Outras_formas_de_educacao_ensino', 'ipea_col': 'Educacao sub Outras formas de educação/ensino'},
+        {'code': 15, 'label': 'Atividades de apoio à educação', 'col': 'SubArea_Atividades_de_apoio_a_educacao', 'ipea_col': 'Educacao sub Atividades de apoio à educação'},
+        {'code': 16, 'label': 'Outros Educação e pesquisa', 'col': None, 'ipea_col': 'Educacao sub Outros'},
+    ]},
+    {'code': 4, 'label': 'Assistência social', 'short_label': 'Assistência Social', 'col': 'Area_Assistencia_social', 'ipea_col': 'Assistência social', 'subareas': [
+        {'code': 17, 'label': 'Educação infantil', 'col': None, 'ipea_col': 'Ass Social sub Educação infantil'},
+        # A coluna específica ('Ass Social sub Assistência social') vem zerada; usa a da área
+        {'code': 18, 'label': 'Assistência social', 'col': 'SubArea_Assistencia_social', 'ipea_col': 'Assistência social'},
+        {'code': 19, 'label': 'Outros Assistência social', 'col': None, 'ipea_col': 'Ass Social sub Outros'},
+    ]},
+    {'code': 5, 'label': 'Religião', 'short_label': 'Religião', 'col': 'Area_Religiao', 'ipea_col': 'Religião', 'subareas': [
+        {'code': 20, 'label': 'Religião', 'col': 'SubArea_Religiao', 'ipea_col': 'Religiao sub Religião'},
+        {'code': 21, 'label': 'Outros Religião', 'col': None, 'ipea_col': 'Religiao sub Outros'},
+    ]},
+    {'code': 6, 'label': 'Associações patronais e profissionais', 'short_label': 'Associações Patronais e Profissionais', 'col': 'Area_Associacoes_patronais_e_profissionais', 'ipea_col': 'Associações patronais, profissionais e de produtores rurais', 'subareas': [
+        {'code': 22, 'label': 'Associações empresariais e patronais', 'col': 'SubArea_Associacoes_empresariais_e_patronais', 'ipea_col': 'Ass Patronais sub Associações empresariais e patronais'},
+        {'code': 23, 'label': 'Associações profissionais', 'col': 'SubArea_Associacoes_profissionais', 'ipea_col': 'Ass Patronais sub Associações profissionais'},
+        {'code': 24, 'label': 'Associações de produtores rurais, pescadores e similares', 'col': 'SubArea_Associacoes_de_produtores_rurais_pescadores_e_similares', 'ipea_col': 'Ass Patronais sub Associações de produtores rurais'},
+        {'code': 25, 'label': 'Cooperativas sociais', 'col': None, 'ipea_col': 'Ass Patronais sub Cooperativas sociais'},
+        {'code': 26, 'label': 'Outras Associações patronais e profissionais', 'col': None, 'ipea_col': 'Ass Patronais sub Outros'},
+    ]},
+    {'code': 7, 'label': 'Meio ambiente e proteção animal', 'short_label': 'Meio Ambiente e Proteção Animal', 'col': None, 'ipea_col': 'Meio ambiente e proteção animal', 'subareas': [
+        {'code': 27, 'label': 'Meio ambiente', 'col': None, 'ipea_col': 'Meio Amb sub Meio ambiente'},
+        {'code': 28, 'label': 'Proteção animal', 'col': None, 'ipea_col': 'Meio Amb sub Proteção animal'},
+        {'code': 29, 'label': 'Outros Meio ambiente e proteção animal', 'col': None, 'ipea_col': 'Meio Amb sub Outros'},
+    ]},
+    {'code': 8, 'label': 'Desenvolvimento e defesa de direitos e interesses', 'short_label': 'Desenvolvimento e Defesa de Direitos', 'col': 'Area_Desenvolvimento_e_defesa_de_direitos_e_interesses', 'ipea_col': 'Desenvolvimento e defesa de direitos', 'subareas': [
+        {'code': 30, 'label': 'Associações de moradores', 'col': None, 'ipea_col': 'Desenv e Def sub Associações de moradores'},
+        {'code': 31, 'label': 'Centros e associações comunitárias', 'col': None, 'ipea_col': 'Desenv e Def sub Centros e associações comunitárias'},
+        {'code': 32, 'label': 'Desenvolvimento rural', 'col': None, 'ipea_col': 'Desenv e Def sub Desenvolvimento rural'},
+        {'code': 33, 'label': 'Emprego e treinamento', 'col': None, 'ipea_col': 'Desenv e Def sub Emprego e treinamento'},
+        {'code': 34, 'label': 'Defesa de direitos de grupos e minorias', 'col': None, 'ipea_col': 'Desenv e Def sub Defesa de direitos de grupos e minorias'},
+        {'code': 35, 'label': 'Desenvolvimento e defesa de direitos', 'col': 'SubArea_Desenvolvimento_e_defesa_de_direitos', 'ipea_col': 'Desenv e Def sub Desenvolvimento e defesa de direitos'},
+        {'code': 36, 'label': 'Associações de pais, professores, alunos e afins', 'col': None, 'ipea_col': 'Desenv e Def sub Associações de pais, professores, alunos e a'},
+        {'code': 37, 'label': 'Associações patronais e profissionais', 'col': None, 'ipea_col': 'Desenv e Def sub Associações patronais e profissionais'},
+        {'code': 38, 'label': 'Cultura e recreação', 'col': None, 'ipea_col': 'Desenv e Def sub Cultura e recreação'},
+        {'code': 39, 'label': 'Defesa de direitos e interesses - múltiplas áreas', 'col': None, 'ipea_col': 'Desenv e Def sub Defesa de direitos e interesses - múltiplas'},
+        {'code': 40, 'label': 'Meio ambiente e proteção animal', 'col': None, 'ipea_col': 'Desenv e Def sub Meio ambiente e proteção animal'},
+        {'code': 41, 'label': 'Outras formas de desenvolvimento e defesa de direitos e interesses', 'col': None, 'ipea_col': 'Desenv e Def sub Outras formas de desenvolvimento e defesa de d'},
+        {'code': 42, 'label': 'Desenvolvimento e defesa de direitos e interesses - Religião', 'col': None, 'ipea_col': 'Desenv e Def sub Religião'},
+        {'code': 43, 'label': 'Saúde, assistência social e educação', 'col': None, 'ipea_col': 'Desenv e Def sub Saúde, assistência social e educação'},
+        {'code': 44, 'label': 'Outros', 'col': None, 'ipea_col': 'Desenv e Def sub Outros'},
+    ]},
+    {'code': 9, 'label': 'Outras atividades associativas', 'short_label': 'Outras Atividades Associativas', 'col': 'Area_Outras_atividades_associativas', 'ipea_col': 'Outras atividades associativas', 'subareas': [
+        {'code': 45, 'label': 'Outras organizações da sociedade civil', 'col': 'SubArea_Associacoes_de_atividades_nao_especificadas_anteriormente', 'ipea_col': 'Outras sub Associações de atividades não especificadas anter'},
+    ]},
+]
+
+SUBAREAS = [sub for area in AREAS for sub in area['subareas']]
+
+# Máscaras em int64: códigos precisam caber em 63 bits
+if max(a['code'] for a in AREAS) > 62 or max(s['code'] for s in SUBAREAS) > 62:
+    raise ValueError("Códigos do catálogo de áreas devem ficar entre 0 e 62")
+
+# {coluna Area_*: rótulo curto} das áreas presentes na base de Santos (filtros dos mapas)
+AREA_COL_LABELS = {a['col']: a['short_label'] for a in AREAS if a['col']}
+
+
+def normalize_col(name):
+    """
+    Forma comparável de um cabeçalho: desfaz o mojibake de UTF-8 lido como latin1
+    ('SaÃºde' -> 'Saúde'), remove acentos, caixa e espaços repetidos/finais.
+    """
+    name = str(name)
+    try:
+        name = name.encode('latin1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(name.lower().split())
+
+
+def resolve_columns(columns, key='ipea_col'):
+    """
+    Colunas reais de cada área e subárea numa base, resolvidas uma única vez.
+    key: 'ipea_col' (planilha area_subarea.csv, casando pelo nome normalizado) ou
+    'col' (base de Santos, nome exato).
+    Retorna (areas, subareas), dicts {código: coluna}, só com as colunas encontradas.
+    """
+    columns = list(columns)
+    if key == 'col':
+        present = set(columns)
+        lookup = lambda name: name if name in present else None
+    else:
+        by_norm = {}
+        for col in columns:
+            by_norm.setdefault(normalize_col(col), col)
+        lookup = lambda name: by_norm.get(normalize_col(name))
+
+    def resolve(entries):
+        found = {}
+        for entry in entries:
+            col = lookup(entry[key]) if entry[key] else None
+            if col is not None:
+                found[entry['code']] = col
+        return found
+
+    return resolve(AREAS), resolve(SUBAREAS)
+
+
+def membership_bits(df, resolved):
+    """
+    Pertencimento compactado em bits: int64 por linha com o bit (1 << código) ligado
+    para cada coluna resolvida ({código: coluna}) com valor 1.
+    """
+    bits = np.zeros(len(df), dtype=np.int64)
+    for code, col in resolved.items():
+        active = pd.to_numeric(df[col], errors='coerce').to_numpy() == 1
+        bits |= active.astype(np.int64) << np.int64(code)
+    return pd.Series(bits, index=df.index, dtype=np.int64)
+
+
+def area_mask(codes):
+    """Máscara com os bits dos códigos informados (0 se nenhum)."""
+    mask = 0
+    for code in codes:
+        mask |= 1 << int(code)
+    return mask
+
+
+def codes_for_labels(labels, entries=AREAS, label_key='short_label'):
+    """Códigos das entradas do catálogo cujos rótulos estão em labels."""
+    labels = set(labels)
+    return [e['code'] for e in entries if e[label_key] in labels]
+
+
+def bit_counts(bits, codes):
+    """Quantidade de linhas com cada bit ligado, vetorizado: {código: contagem}."""
+    bits = np.asarray(bits, dtype=np.int64)
+    codes = np.asarray(list(codes), dtype=np.int64)
+    if not len(codes):
+        return {}
+    counts = ((bits[:, None] >> codes[None, :]) & 1).sum(axis=0)
+    return dict(zip(codes.tolist(), counts.tolist()))
+
+
+# Níveis das linhas da Tabela 2
+LEVEL_AREA = 'area'
+LEVEL_SUBAREA = 'subarea'
+LEVEL_TOTAL = 'total'
+UNIDENTIFIED_SUBAREA_LABEL = 'Subárea Não Identificada'
+
+
+def build_area_table(df):
+    """
+    Tabela 2 (áreas e subáreas de atuação) a partir da planilha area_subarea.csv.
+    As colunas do catálogo formam uma única matriz numérica, somada de uma vez; totais
+    das áreas (no mínimo a soma das subáreas), subáreas com OSCs, o resto "Subárea Não
+    Identificada" e os percentuais saem dessas somas, em vetores.
+    Retorna um DataFrame com Area, Nivel (area/subarea/total), Total, Perc_Total e
+    Perc_Group (None nas linhas de área e de total).
+    """
+    area_cols, subarea_cols = resolve_columns(df.columns)
+    areas = [a for a in AREAS if a['code'] in area_cols]
+    total_oscs = len(df)
+
+    # Uma coluna da matriz por coluna distinta da planilha
+    cols = list(dict.fromkeys(
+        [area_cols[a['code']] for a in areas]
+        + [subarea_cols[s['code']] for a in areas for s in a['subareas'] if s['code'] in subarea_cols]
+    ))
+    position = {col: i for i, col in enumerate(cols)}
+    # Matriz numérica das colunas usadas (as planilhas já vêm como float; só as de texto
+    # são convertidas), somada de uma vez por bloco
+    matrix = df[cols]
+    converted = {col: pd.to_numeric(matrix[col], errors='coerce') for col in cols
+                 if not pd.api.types.is_numeric_dtype(matrix[col])}
+    if converted:
+        matrix = matrix.assign(**converted)
+    sums = matrix.sum().to_numpy(dtype=float)
+
+    # Subáreas de cada área que existem na planilha, com a área de origem
+    subs = [(i, s) for i, a in enumerate(areas) for s in a['subareas'] if s['code'] in subarea_cols]
+    sub_area = np.array([i for i, _ in subs], dtype=np.int64)
+    sub_counts = np.array([sums[position[subarea_cols[s['code']]]] for _, s in subs], dtype=float)
+
+    parent_counts = np.array([sums[position[area_cols[a['code']]]] for a in areas], dtype=float)
+    sub_sums = np.bincount(sub_area, weights=sub_counts, minlength=len(areas)) if len(areas) else np.zeros(0)
+    # O total da área é pelo menos a soma das subáreas
+    area_totals = np.maximum(parent_counts, sub_sums)
+    remainders = area_totals - sub_sums
+
+    denominator = total_oscs if total_oscs else np.nan
+    area_pct = area_totals / denominator * 100
+    sub_pct_total = sub_counts / denominator * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sub_pct_group = np.where(area_totals[sub_area] > 0, sub_counts / area_totals[sub_area] * 100, 0.0) if len(subs) else np.zeros(0)
+        remainder_pct_group = np.where(area_totals > 0, remainders / area_totals * 100, 0.0)
+    remainder_pct_total = remainders / denominator * 100
+
+    rows = []
+    sub_index = 0
+    for i, area in enumerate(areas):
+        rows.append((area['label'], LEVEL_AREA, area_totals[i], area_pct[i], None))
+        while sub_index < len(subs) and sub_area[sub_index] == i:
+            if sub_counts[sub_index] > 0:
+                rows.append((subs[sub_index][1]['label'], LEVEL_SUBAREA, sub_counts[sub_index],
+                             sub_pct_total[sub_index], sub_pct_group[sub_index]))
+            sub_index += 1
+        # Tolerância para erros de ponto flutuante: pelo menos 1 OSC
+        if remainders[i] > 0.9:
+            rows.append((UNIDENTIFIED_SUBAREA_LABEL, LEVEL_SUBAREA, remainders[i],
+                         remainder_pct_total[i], remainder_pct_group[i]))
+    rows.append(('Total Geral de OSCs', LEVEL_TOTAL, total_oscs, 100.0, None))
+
+    table = pd.DataFrame(rows, columns=['Area', 'Nivel', 'Total', 'Perc_Total', 'Perc_Group'])
+    table['Total'] = table['Total'].astype(float)
+    table['Perc_Total'] = table['Perc_Total'].astype(float)
+    table['Perc_Group'] = table['Perc_Group'].astype(float)
+    return table
@@ -0,0 +1,199 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# Limites oficiais dos bairros (GeoJSON em WGS84, lon/lat), gerados a partir da malha
+# de bairros do IBGE por `python -m dashboard_utils.bairros_ingest`. Sem o arquivo,
+# o bairro vem só do endereço.
+BAIRROS_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'bairros_santos.geojson')
+
+# Propriedades procuradas (em ordem) para o nome do bairro em cada feature
+BAIRRO_NAME_PROPERTIES = ['bairro', 'nome', 'nm_bairro', 'name', 'nome_bairro']
+
+# Origem do bairro de cada OSC: coordenada dentro de um polígono ou heurística do endereço
+BAIRRO_SOURCE_COL = 'Bairro_Fonte'
+BAIRRO_FROM_GEO = 'Coordenada'
+BAIRRO_FROM_ADDRESS = 'Endereço'
+
+# Células do grid por eixo do índice espacial
+GRID_SIZE = 64
+# Pontos testados por vez contra as arestas de um polígono (limita a matriz pontos x arestas)
+_PIP_BATCH = 4096
+
+
+def extract_bairro(addr):
+    """
+    Extrai o bairro de um endereço formatado (ex: LOGRADOURO, NUM, COMPL, BAIRRO, CIDADE, UF).
+    Heurística simples baseada na posição em relação a 'SANTOS'.
+    """
+    if not isinstance(addr, str): return "Não Identificado"
+    parts = addr.split(',')
+    try:
+        # Procurar 'Santos'
+        sanitized_parts = [p.strip().upper() for p in parts]
+        if 'SANTOS' in sanitized_parts:
+            idx = sanitized_parts.index('SANTOS')
+            if idx > 0:
+                possible_bairro = parts[idx-1].strip()
+                # Se for número ou complemento curto, tenta voltar mais um
+                if len(possible_bairro) < 3 and idx > 1:
+                        return parts[idx-2].strip()
+                return possible_bairro.title() # Capitalize
+        # Fallback: pegar o item do meio se tiver tamanho suficiente
+        if len(parts) >= 4:
+            return parts[-3].strip().title()
+    except:
+        pass
+    return "Não Identificado"
+
+
+def _feature_name(properties):
+    lowered = {str(k).lower(): v for k, v in (properties or {}).items()}
+    for key in BAIRRO_NAME_PROPERTIES:
+        value = lowered.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip().title()
+    return None
+
+
+def load_bairro_polygons(path=BAIRROS_GEOJSON):
+    """
+    Lê os polígonos de bairro do GeoJSON.
+    Retorna uma lista de (nome, anéis), com cada anel um array (k, 2) de lon/lat;
+    buracos e partes de MultiPolygon entram como anéis do mesmo bairro (regra par-ímpar).
+    Retorna [] se o arquivo não existir.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+
+    polygons = []
+    for feature in collection.get('features', []):
+        name = _feature_name(feature.get('properties'))
+        geometry = feature.get('geometry') or {}
+        if name is None or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        parts = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        rings = [np.asarray(ring, dtype=float)[:, :2] for part in parts for ring in part if len(ring) >= 3]
+        if rings:
+            polygons.append((name, rings))
+    return polygons
+
+
+def build_bairro_index(polygons, grid_size=GRID_SIZE):
+    """
+    Índice espacial em grid: cada célula guarda os polígonos cujo retângulo envolvente a
+    toca, de modo que cada ponto só é testado contra os poucos bairros da sua célula.
+    """
+    if not polygons:
+        return None
+    bounds = np.array([
+        [min(r[:, 0].min() for r in rings), min(r[:, 1].min() for r in rings),
+         max(r[:, 0].max() for r in rings), max(r[:, 1].max() for r in rings)]
+        for _, rings in polygons
+    ])
+    min_x, min_y = bounds[:, 0].min(), bounds[:, 1].min()
+    max_x, max_y = bounds[:, 2].max(), bounds[:, 3].max()
+    cell_w = (max_x - min_x) / grid_size or 1.0
+    cell_h = (max_y - min_y) / grid_size or 1.0
+
+    cells = {}
+    for pid, (x0, y0, x1, y1) in enumerate(bounds):
+        cx0, cx1 = int((x0 - min_x) / cell_w), min(int((x1 - min_x) / cell_w), grid_size - 1)
+        cy0, cy1 = int((y0 - min_y) / cell_h), min(int((y1 - min_y) / cell_h), grid_size - 1)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cells.setdefault(cx * grid_size + cy, []).append(pid)
+
+    return {
+        'names': np.array([name for name, _ in polygons], dtype=object),
+        'rings': [rings for _, rings in polygons],
+        'origin': (min_x, min_y),
+        'cell': (cell_w, cell_h),
+        'grid_size': grid_size,
+        'cells': cells,
+    }
+
+
+def _points_in_rings(x, y, rings):
+    """Teste par-ímpar (ray casting) vetorizado de vários pontos contra os anéis de um polígono."""
+    inside = np.zeros(len(x), dtype=bool)
+    px, py = x[:, None], y[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for ring in rings:
+            xi, yi = ring[:, 0], ring[:, 1]
+            xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+            crosses = (yi > py) != (yj > py)
+            x_cross = (xj - xi) * (py - yi) / (yj - yi) + xi
+            inside ^= (np.count_nonzero(crosses & (px < x_cross), axis=1) % 2).astype(bool)
+    return inside
+
+
+def locate_points(lat, lon, index):
+    """
+    Bairro de cada ponto (None fora de todos os polígonos ou sem coordenada).
+    Os pontos são agrupados por célula do grid e testados em lote contra os
+    polígonos candidatos de cada célula.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    result = np.full(len(lat), -1, dtype=np.int64)
+    if index is None or len(lat) == 0:
+        return np.full(len(lat), None, dtype=object)
+
+    grid_size = index['grid_size']
+    cx = np.floor((lon - index['origin'][0]) / index['cell'][0])
+    cy = np.floor((lat - index['origin'][1]) / index['cell'][1])
+    valid = (cx >= 0) & (cx < grid_size) & (cy >= 0) & (cy < grid_size)
+    cell_ids = np.where(valid, cx * grid_size + cy, -1).astype(np.int64)
+
+    order = np.argsort(cell_ids, kind='stable')
+    sorted_ids = cell_ids[order]
+    occupied, starts = np.unique(sorted_ids, return_index=True)
+    ends = np.append(starts[1:], len(sorted_ids))
+
+    for cell_id, start, end in zip(occupied, starts, ends):
+        candidates = index['cells'].get(int(cell_id))
+        if cell_id < 0 or not candidates:
+            continue
+        points = order[start:end]
+        for pid in candidates:
+            pending = points[result[points] < 0]
+            for batch in range(0, len(pending), _PIP_BATCH):
+                idx = pending[batch:batch + _PIP_BATCH]
+                hit = _points_in_rings(lon[idx], lat[idx], index['rings'][pid])
+                result[idx[hit]] = pid
+            if not len(pending):
+                break
+
+    names = np.append(index['names'], None)
+    return names[result]
+
+
+def assign_bairros(df, index=None):
+    """
+    Bairro de cada OSC: pela coordenada dentro dos limites oficiais quando há GeoJSON
+    e coordenada válida; caso contrário, pela heurística do endereço (extract_bairro),
+    calculada uma vez por endereço distinto.
+    Retorna (bairro, origem) como Series alinhadas a df.
+    """
+    if index is None:
+        index = build_bairro_index(load_bairro_polygons())
+
+    if index is not None and {'latitude', 'longitude'} <= set(df.columns):
+        geo = pd.Series(locate_points(df['latitude'], df['longitude'], index), index=df.index, dtype=object)
+    else:
+        geo = pd.Series(None, index=df.index, dtype=object)
+
+    found = geo.notna()
+    source = pd.Series(np.where(found, BAIRRO_FROM_GEO, BAIRRO_FROM_ADDRESS), index=df.index, dtype=object)
+    if found.all() or 'tx_endereco_completo' not in df.columns:
+        return geo.fillna("Não Identificado"), source
+
+    addresses = df.loc[~found, 'tx_endereco_completo']
+    by_address = {addr: extract_bairro(addr) for addr in addresses.dropna().unique()}
+    geo[~found] = addresses.map(by_address).fillna("Não Identificado")
+    return geo, source
@@ -0,0 +1,200 @@
+import codecs
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import urllib.request
+import zipfile
+
+from dashboard_utils.bairros import BAIRROS_GEOJSON
+
+# Malha de bairros do Censo 2022 (IBGE), montada a partir da legislação municipal
+# de limites de bairros. Shapefile do Brasil inteiro em SIRGAS 2000 (lon/lat), que
+# coincide com o WGS84 na escala de um bairro.
+IBGE_BAIRROS_URL = (
+    'https://geoftp.ibge.gov.br/organizacao_do_territorio/malhas_territoriais/'
+    'malhas_de_setores_censitarios__divisoes_intramunicipais/censo_2022/bairros/shp/BR/'
+    'BR_bairros_CD2022.zip'
+)
+SANTOS_CD_MUN = '3548500'
+
+# Campos da tabela de atributos da malha do IBGE
+_FIELD_MUN = 'CD_MUN'
+_FIELD_NAME = 'NM_BAIRRO'
+_FIELD_CODE = 'CD_BAIRRO'
+
+# Tipos de geometria do shapefile com anéis de polígono (Polygon, PolygonZ, PolygonM)
+_POLYGON_TYPES = (5, 15, 25)
+
+# Sem .cpg (ou com uma página de código desconhecida), o .dbf segue o padrão do dBASE
+_DEFAULT_DBF_ENCODING = 'latin-1'
+
+
+def _dbf_encoding(cpg):
+    """
+    Codec Python para o conteúdo do .cpg. O ESRI grava páginas de código como
+    números ('1252', '88591'), que o Python conhece como 'cp1252' e 'iso8859-1'.
+    """
+    name = cpg.decode('ascii', errors='ignore').strip() if cpg else ''
+    if name.startswith('8859') and name[4:].isdigit():
+        name = f'iso8859-{name[4:]}'
+    elif name.isdigit():
+        name = f'cp{name}'
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return _DEFAULT_DBF_ENCODING
+
+
+def _matching_records(dbf, encoding, cd_mun):
+    """
+    Lê o .dbf (dBASE III) registro a registro e retorna {posição: atributos} só dos
+    registros do município cd_mun; os demais nem são decodificados por inteiro.
+    """
+    n_records, header_len, record_len = struct.unpack('<4xIHH20x', dbf.read(32))
+    descriptors = dbf.read(header_len - 32)
+    fields = {}
+    offset = 1  # primeiro byte de cada registro é a marca de apagado
+    for pos in range(0, len(descriptors) - 1, 32):
+        if descriptors[pos] == 0x0D:
+            break
+        name = descriptors[pos:pos + 11].split(b'\x00', 1)[0].decode('ascii').strip()
+        length = descriptors[pos + 16]
+        fields[name] = slice(offset, offset + length)
+        offset += length
+
+    if _FIELD_MUN not in fields:
+        raise ValueError(f"A tabela de atributos não tem o campo {_FIELD_MUN}.")
+    wanted = cd_mun.encode('ascii')
+    mun = fields[_FIELD_MUN]
+    records = {}
+    for i in range(n_records):
+        record = dbf.read(record_len)
+        if record[:1] == b'*' or record[mun].strip() != wanted:
+            continue
+        records[i] = {
+            name: record[fields[name]].decode(encoding, errors='replace').strip()
+            for name in (_FIELD_NAME, _FIELD_CODE) if name in fields
+        }
+    return records
+
+
+def _record_offsets(shx):
+    """Posição (em bytes) de cada registro no .shp, pelo índice .shx."""
+    count = (len(shx) - 100) // 8
+    words = struct.unpack(f'>{2 * count}i', shx[100:100 + 8 * count])
+    return [2 * offset for offset in words[0::2]]
+
+
+def _read_rings(content):
+    """Anéis [(x, y), ...] de um registro do .shp, ou None se não for polígono."""
+    shape_type = struct.unpack('<i', content[:4])[0]
+    if shape_type not in _POLYGON_TYPES:
+        return None
+    n_parts, n_points = struct.unpack('<ii', content[36:44])
+    parts = struct.unpack(f'<{n_parts}i', content[44:44 + 4 * n_parts]) + (n_points,)
+    coords = struct.unpack(f'<{2 * n_points}d', content[44 + 4 * n_parts:44 + 4 * n_parts + 16 * n_points])
+    points = list(zip(coords[0::2], coords[1::2]))
+    return [points[parts[k]:parts[k + 1]] for k in range(n_parts)]
+
+
+def _signed_area(ring):
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _rings_to_geometry(rings, precision=7):
+    """
+    Anéis do shapefile para geometria GeoJSON: anéis externos vêm em sentido horário
+    (área negativa), buracos em anti-horário e pertencem ao externo anterior.
+    """
+    polygons = []
+    for ring in rings:
+        ring = [[round(x, precision), round(y, precision)] for x, y in ring]
+        if len(ring) < 4:
+            continue
+        if _signed_area(ring) <= 0 or not polygons:
+            polygons.append([ring[::-1]])  # GeoJSON (RFC 7946): externo anti-horário
+        else:
+            polygons[-1].append(ring[::-1])
+    if len(polygons) == 1:
+        return {'type': 'Polygon', 'coordinates': polygons[0]}
+    return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+
+def _member(archive, suffix):
+    names = [n for n in archive.namelist() if n.lower().endswith(suffix)]
+    return names[0] if names else None
+
+
+def bairros_geojson_from_shapefile(zip_path, cd_mun=SANTOS_CD_MUN):
+    """
+    FeatureCollection com os bairros do município `cd_mun`, a partir do .zip do
+    shapefile da malha de bairros do IBGE. A tabela de atributos é lida primeiro e
+    só as geometrias do município são decodificadas, indo direto a cada uma pelo
+    índice .shx. Cada feature leva o nome do bairro na propriedade `bairro` (lida
+    por load_bairro_polygons) e o código em `cd_bairro`.
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        members = {suffix: _member(archive, suffix) for suffix in ('.shp', '.shx', '.dbf', '.cpg')}
+        missing = [suffix for suffix in ('.shp', '.shx', '.dbf') if members[suffix] is None]
+        if missing:
+            raise ValueError(f"O arquivo .zip não contém o shapefile completo (faltam {', '.join(missing)}).")
+
+        encoding = _dbf_encoding(archive.read(members['.cpg']) if members['.cpg'] else None)
+        with archive.open(members['.dbf']) as dbf:
+            records = _matching_records(dbf, encoding, cd_mun)
+        offsets = _record_offsets(archive.read(members['.shx']))
+
+        features = []
+        with archive.open(members['.shp']) as shp:
+            # Registros em ordem crescente de posição: a leitura só avança no arquivo
+            for i in sorted(records, key=offsets.__getitem__):
+                shp.seek(offsets[i])
+                content_len = struct.unpack('>4xi', shp.read(8))[0] * 2
+                rings = _read_rings(shp.read(content_len))
+                if not rings:
+                    continue
+                features.append({
+                    'type': 'Feature',
+                    'properties': {'bairro': records[i].get(_FIELD_NAME), 'cd_bairro': records[i].get(_FIELD_CODE)},
+                    'geometry': _rings_to_geometry(rings),
+                })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def ingest_bairros(source=IBGE_BAIRROS_URL, path=BAIRROS_GEOJSON, cd_mun=SANTOS_CD_MUN):
+    """
+    Etapa de ingestão dos limites dos bairros: baixa (ou lê, se `source` for um
+    arquivo local) o .zip da malha de bairros do IBGE, recorta o município e grava
+    o GeoJSON lido pelo dashboard. Pode ser rodada no build, antes do cache colunar:
+        python -m dashboard_utils.bairros_ingest [url-ou-arquivo.zip]
+    O download vai para um arquivo temporário, sem passar inteiro pela memória.
+    Retorna o número de bairros gravados.
+    """
+    if os.path.exists(source):
+        collection = bairros_geojson_from_shapefile(source, cd_mun)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = os.path.join(tmp_dir, 'bairros.zip')
+            with urllib.request.urlopen(source) as response, open(zip_path, 'wb') as f:
+                shutil.copyfileobj(response, f)
+            collection = bairros_geojson_from_shapefile(zip_path, cd_mun)
+    if not collection['features']:
+        raise ValueError(f"Nenhum bairro do município {cd_mun} encontrado em {source}.")
+
+    # Grava num temporário e troca: o dashboard nunca lê um GeoJSON pela metade
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.geojson')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(collection, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(collection['features'])
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else IBGE_BAIRROS_URL
+    count = ingest_bairros(source)
+    print(f"{count} bairros gravados em {os.path.abspath(BAIRROS_GEOJSON)}")
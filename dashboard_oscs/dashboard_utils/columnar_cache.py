@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import hashlib
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow vem com o streamlit, mas o cache é opcional
+    pa = None
+    feather = None
+
+# Versão do formato do cache (layout dos arquivos/metadados).
+# Mudanças na limpeza de um dataset usam o schema_version de cada chamada.
+CACHE_FORMAT_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', '.columnar_cache')
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+
+
+def _cache_paths(name):
+    base = os.path.join(CACHE_DIR, _safe_name(name))
+    return base + '.feather', base + '.json'
+
+
+def _stat_sources(sources):
+    stats = []
+    for path in sorted(sources):
+        st_ = os.stat(path)
+        stats.append({'path': os.path.abspath(path), 'mtime_ns': st_.st_mtime_ns, 'size': st_.st_size})
+    return stats
+
+
+def content_hash(sources):
+    """
+    Hash SHA-256 do conteúdo de todos os arquivos de origem (em ordem de caminho).
+    """
+    h = hashlib.sha256()
+    for path in sorted(sources):
+        h.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _is_fresh(meta, sources, schema_version):
+    """
+    Confere versão e arquivos de origem. mtime/tamanho iguais bastam; se mudaram
+    (ex.: checkout do git), compara o hash do conteúdo antes de declarar o cache velho.
+    Retorna (fresco, stats_atuais).
+    """
+    stats = _stat_sources(sources)
+    if not meta:
+        return False, stats
+    if meta.get('format_version') != CACHE_FORMAT_VERSION or meta.get('schema_version') != schema_version:
+        return False, stats
+    if meta.get('sources') == stats:
+        return True, stats
+    if [s['path'] for s in meta.get('sources', [])] != [s['path'] for s in stats]:
+        return False, stats
+    return meta.get('content_hash') == content_hash(sources), stats
+
+
+def cached_frame(name, sources, build, schema_version=1):
+    """
+    Retorna o DataFrame produzido por build(), servido a partir de um arquivo
+    Feather (Arrow IPC, sem compressão) mapeado em memória. Colunas lidas do
+    arquivo podem ser somente leitura: quem altera valores deve copiar antes.
+    O arquivo é regenerado quando algum arquivo de origem muda de conteúdo ou
+    quando schema_version muda. Sem pyarrow, ou se o frame não puder ser
+    serializado, apenas chama build().
+    """
+    if feather is None:
+        return build()
+
+    sources = [s for s in sources if os.path.exists(s)]
+    if not sources:
+        return build()
+
+    data_path, meta_path = _cache_paths(name)
+    meta = _read_meta(meta_path)
+    fresh, stats = _is_fresh(meta, sources, schema_version)
+
+    if fresh and os.path.exists(data_path):
+        try:
+            if meta['sources'] != stats:
+                # Conteúdo igual, só metadados do arquivo mudaram
+                meta['sources'] = stats
+                _write_json(meta_path, meta)
+            table = feather.read_table(data_path, memory_map=True)
+            # Um bloco por coluna: colunas numéricas sem nulos viram arrays somente
+            # leitura apontando para o arquivo mapeado, sem cópia
+            return table.to_pandas(split_blocks=True)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Cache colunar inválido para {name}, reconstruindo: {e}")
+
+    df = build()
+    write_frame(name, df, sources, schema_version, stats=stats)
+    return df
+
+
+def write_frame(name, df, sources, schema_version=1, stats=None):
+    """
+    Grava df no cache colunar com o hash do conteúdo das origens.
+    Falhas de escrita ou de conversão apenas desativam o cache para este dataset.
+    """
+    if feather is None or df is None or df.empty:
+        return False
+
+    data_path, meta_path = _cache_paths(name)
+    tmp_path = f"{data_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, data_path)
+        _write_json(meta_path, {
+            'format_version': CACHE_FORMAT_VERSION,
+            'schema_version': schema_version,
+            'name': name,
+            'sources': stats if stats is not None else _stat_sources(sources),
+            'content_hash': content_hash(sources),
+            'rows': len(df),
+            'columns': [str(c) for c in df.columns],
+        })
+        return True
+    except (OSError, pa.ArrowException, TypeError, ValueError) as e:
+        print(f"Não foi possível gravar o cache colunar de {name}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
@@ -197,22 +197,15 @@ def render_table_6_3(df):
     st.markdown("Esta seção apresenta dados sobre a natureza jurídica das Organizações da Sociedade Civil - OSCs. Foram usadas para calcular o total de OSCs da cidade de Santos as naturezas associações privadas, fundações privadas e organizações religiosas pessoas de direito privado sem fins lucrativos previstas no Código Civil – Lei n o 10.406/2002, bem como as organizações sociais assim qualificadas por Lei Federal, Estadual, Distrital ou Municipal.")
     st.markdown("### Tabela 1 - OSCs por natureza jurídica segundo o bairro (Distribuição %)")
     
-    from dashboard_utils.data_cleaning import extract_bairro
+    from dashboard_utils.bairros import BAIRRO_SOURCE_COL, BAIRRO_FROM_GEO
+    from dashboard_utils.data_cleaning import enrich_osc_data
     
-    # Apply extraction if column doesn't exist
-    df_proc = df.copy()
-    if 'Bairro' not in df_proc.columns and 'tx_endereco_completo' in df_proc.columns:
-        df_proc['Bairro'] = df_proc['tx_endereco_completo'].apply(extract_bairro)
-        
-    if 'Bairro' in df_proc.columns and 'cd_natureza_juridica_osc' in df_proc.columns:
-        nat_jur_labels = {
-            3999: "Associação Privada",
-            3069: "Fundação Privada",
-            3220: "Org. Religiosa",
-            3301: "Org. Social (OS)"
-        }
-        df_proc['Natureza_Label'] = df_proc['cd_natureza_juridica_osc'].map(nat_jur_labels).fillna("Outros")
+    # load_data já traz Bairro e Natureza_Label; só recalcula para frames de outra origem
+    df_proc = df
+    if 'Bairro' not in df_proc.columns or 'Natureza_Label' not in df_proc.columns:
+        df_proc = enrich_osc_data(df.copy())
         
+    if 'Bairro' in df_proc.columns and 'Natureza_Label' in df_proc.columns:
         pivot = pd.crosstab(df_proc['Bairro'], df_proc['Natureza_Label'], margins=True, margins_name="Total")
         pivot_pct = pivot.div(pivot['Total'], axis=0).mul(100)
         
@@ -233,7 +226,14 @@ def render_table_6_3(df):
         pivot_display = pivot_display.rename(columns={'Bairro': 'Bairro / Localidade'})
 
         st.dataframe(pivot_display, use_container_width=True, hide_index=True)
-        st.caption("Fonte: Mapa das OSCs (Recorte Santos) - Bairros inferidos do endereço.")
+        if BAIRRO_SOURCE_COL in df_proc.columns:
+            geo_share = (df_proc[BAIRRO_SOURCE_COL] == BAIRRO_FROM_GEO).mean() * 100
+        else:
+            geo_share = 0.0
+        if geo_share > 0:
+            st.caption(f"Fonte: Mapa das OSCs (Recorte Santos) - Bairros pela localização nos limites oficiais ({geo_share:.1f}%); demais inferidos do endereço.")
+        else:
+            st.caption("Fonte: Mapa das OSCs (Recorte Santos) - Bairros inferidos do endereço.")
     else:
         st.warning("Dados insuficientes para gerar Tabela 6.3.")
         
@@ -268,3 +268,25 @@ def render_transfer_table_11_1():
     
     st.caption("Fonte: Mapa das Organizações da Sociedade Civil.")
 
+
+def render_paginated_dataframe(df, key, page_size=100, format_page=None, **dataframe_kwargs):
+    """
+    Render a large table one page at a time: only the selected slice of `df`
+    is converted and sent to the browser.
+    format_page: optional function applied to the slice before display (e.g. money.reais_view).
+    """
+    total_rows = len(df)
+    total_pages = max(1, -(-total_rows // page_size))
+
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key=key)
+
+    start = (page - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+    if format_page is not None:
+        page_df = format_page(page_df)
+
+    st.dataframe(page_df, **dataframe_kwargs)
+    if total_pages > 1:
+        st.caption(f"Linhas {start + 1}–{min(start + page_size, total_rows)} de {total_rows}")
@@ -1,6 +1,83 @@
 import pandas as pd
 import numpy as np
 
+from dashboard_utils.bairros import BAIRRO_SOURCE_COL, assign_bairros
+from dashboard_utils.area_catalog import AREAS, membership_bits, resolve_columns
+
+# Coluna com as áreas de atuação codificadas em bits (ver area_bit_values)
+AREA_BITMASK_COL = 'Bitmask_Areas'
+# Coluna com as subáreas (SubArea_*) codificadas pelos códigos do catálogo de áreas
+SUBAREA_BITMASK_COL = 'Bitmask_Subareas'
+
+# Natureza jurídica (CONCLA/IBGE)
+# Fonte: https://concla.ibge.gov.br/estrutura/natjur-estrutura/natureza-juridica-2018.html
+NATUREZA_JURIDICA_LABELS = {
+    3999: 'Associação Privada',
+    3069: 'Fundação Privada',
+    3220: 'Organização Religiosa',
+    3301: 'Organização Social (OS)',
+    3130: 'Entidade Sindical',
+    3105: 'Entidade de Mediação e Arbitragem',
+    2062: 'Sociedade Empresária Limitada',
+    2143: 'Cooperativa',
+    2135: 'Empresário Individual',
+}
+# Rótulos curtos da Tabela 1 (natureza x bairro); demais códigos entram em "Outros"
+NATUREZA_TABELA_LABELS = {
+    3999: "Associação Privada",
+    3069: "Fundação Privada",
+    3220: "Org. Religiosa",
+    3301: "Org. Social (OS)"
+}
+
+def area_columns(columns):
+    """
+    Colunas one-hot de área de atuação (Area_*), sem as colunas derivadas.
+    """
+    return [c for c in columns if c.startswith('Area_') and c != 'Area_Atuacao']
+
+def area_bit_values(area_cols):
+    """
+    Valor do bit de cada coluna de área no bitmask.
+    Colunas do catálogo usam o código da área (area_catalog.AREAS), estável entre bases;
+    colunas fora do catálogo recebem, em ordem alfabética, os bits seguintes ao maior código.
+    """
+    codes = {a['col']: a['code'] for a in AREAS if a['col']}
+    next_bit = max(codes.values()) + 1
+    bits = {}
+    for col in sorted(area_cols):
+        if col in codes:
+            bits[col] = 1 << codes[col]
+        else:
+            bits[col] = 1 << next_bit
+            next_bit += 1
+    return bits
+
+def classify_areas(df, area_cols, labels=None):
+    """
+    Classifica a área principal de cada linha a partir do bloco one-hot, de forma vetorizada.
+    Retorna (rótulo, bitmask): rótulo é o nome da única área ativa, 'Múltiplas Áreas' ou
+    'Não Informado'; bitmask soma area_bit_values() das áreas ativas.
+    labels, se informado, substitui o nome derivado de cada coluna (mesma ordem de area_cols).
+    """
+    if labels is None:
+        # Remover prefixo 'Area_' e substituir underscores por espaços
+        labels = [col.replace('Area_', '').replace('_', ' ') for col in area_cols]
+    bits = area_bit_values(area_cols)
+    if bits and max(bits.values()) >= 1 << 63:
+        raise ValueError(f"Bitmask de áreas suporta até 63 bits, recebeu {len(area_cols)} colunas")
+
+    active = df[list(area_cols)].to_numpy() == 1
+    n_active = active.sum(axis=1)
+    single = np.asarray(labels, dtype=object)[active.argmax(axis=1)] if len(area_cols) else np.array([], dtype=object)
+
+    label = np.where(n_active == 0, 'Não Informado', np.where(n_active == 1, single, 'Múltiplas Áreas'))
+
+    weights = np.array([bits[col] for col in area_cols], dtype=np.int64)
+    bitmask = active.astype(np.int64) @ weights
+
+    return pd.Series(label, index=df.index, dtype=object), pd.Series(bitmask, index=df.index, dtype=np.int64)
+
 def clean_data(df):
     """
     Realiza a limpeza e preprocessamento dos dados.
@@ -26,25 +103,15 @@ def clean_data(df):
         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
     # Colunas que começam com 'Area_' para a lógica de One-Hot
-    area_cols = [c for c in df.columns if c.startswith('Area_')]
-    
-    def get_primary_area(row):
-        active_areas = []
-        for col in area_cols:
-            if row[col] == 1:
-                # Remover prefixo 'Area_' e substituir underscores por espaços
-                area_name = col.replace('Area_', '').replace('_', ' ')
-                active_areas.append(area_name)
-        
-        if len(active_areas) == 0:
-            return 'Não Informado'
-        elif len(active_areas) == 1:
-            return active_areas[0]
-        else:
-            return 'Múltiplas Áreas'
+    area_cols = area_columns(df.columns)
 
     if area_cols:
-        df['Area_Atuacao'] = df.apply(get_primary_area, axis=1)
+        df['Area_Atuacao'], df[AREA_BITMASK_COL] = classify_areas(df, area_cols)
+
+    # Subáreas do catálogo presentes na base, compactadas em bits pelo código
+    _, subarea_cols = resolve_columns(df.columns, key='col')
+    if subarea_cols:
+        df[SUBAREA_BITMASK_COL] = membership_bits(df, subarea_cols)
 
     # 4. Situação Cadastral
     if 'situacao_cadastral' in df.columns:
@@ -52,27 +119,36 @@ def clean_data(df):
 
     return df
 
-def extract_bairro(addr):
+def clean_cnpj(values):
+    """
+    CNPJ só com dígitos, sem parte decimal (ex.: '1234,0' -> '1234'); vazio se ausente.
     """
-    Extrai o bairro de um endereço formatado (ex: LOGRADOURO, NUM, COMPL, BAIRRO, CIDADE, UF).
-    Heurística simples baseada na posição em relação a 'SANTOS'.
+    s = values.astype('string')
+    # Vírgula tem prioridade sobre ponto como separador decimal
+    has_comma = s.str.contains(',', regex=False).fillna(False)
+    s = s.str.split(',', n=1).str[0].where(has_comma, s.str.split('.', n=1).str[0])
+    return s.str.replace(r'\D', '', regex=True).fillna('').astype(object)
+
+def enrich_osc_data(df):
     """
-    if not isinstance(addr, str): return "Não Identificado"
-    parts = addr.split(',')
-    try:
-        # Procurar 'Santos'
-        sanitized_parts = [p.strip().upper() for p in parts]
-        if 'SANTOS' in sanitized_parts:
-            idx = sanitized_parts.index('SANTOS')
-            if idx > 0:
-                possible_bairro = parts[idx-1].strip()
-                # Se for número ou complemento curto, tenta voltar mais um
-                if len(possible_bairro) < 3 and idx > 1:
-                        return parts[idx-2].strip()
-                return possible_bairro.title() # Capitalize
-        # Fallback: pegar o item do meio se tiver tamanho suficiente
-        if len(parts) >= 4:
-            return parts[-3].strip().title()
-    except:
-        pass
-    return "Não Identificado"
+    Colunas derivadas usadas pelas páginas, calculadas uma vez na carga (e guardadas
+    no cache colunar) em vez de a cada rerun:
+    Bairro/Bairro_Fonte, Natureza_Juridica_Desc, Natureza_Label, Decada e cnpj_clean.
+    A área (Area_Atuacao e o bitmask) já vem de clean_data.
+    """
+    # Bairro: pela coordenada (limites oficiais) com o endereço como fallback
+    if 'tx_endereco_completo' in df.columns or {'latitude', 'longitude'} <= set(df.columns):
+        df['Bairro'], df[BAIRRO_SOURCE_COL] = assign_bairros(df)
+
+    if 'cd_natureza_juridica_osc' in df.columns:
+        codes = pd.to_numeric(df['cd_natureza_juridica_osc'], errors='coerce')
+        df['Natureza_Juridica_Desc'] = codes.map(NATUREZA_JURIDICA_LABELS).fillna(df['cd_natureza_juridica_osc'].astype(str))
+        df['Natureza_Label'] = codes.map(NATUREZA_TABELA_LABELS).fillna("Outros")
+
+    if 'Ano_Fundacao' in df.columns:
+        df['Decada'] = (df['Ano_Fundacao'] // 10 * 10).astype('Int64').astype(str) + "s"
+
+    if 'cnpj' in df.columns:
+        df['cnpj_clean'] = clean_cnpj(df['cnpj'])
+
+    return df
@@ -1,76 +1,300 @@
 import pandas as pd
 import streamlit as st
 import os
-from dashboard_utils.data_cleaning import clean_data
+import csv
+import json
+import codecs
+from dashboard_utils.data_cleaning import AREA_BITMASK_COL, clean_cnpj, clean_data, enrich_osc_data
+from dashboard_utils.columnar_cache import cached_frame
+from dashboard_utils.bairros import BAIRROS_GEOJSON
+from dashboard_utils.area_catalog import AREA_COL_LABELS, build_area_table
+from dashboard_utils.repasse_cube import cube_cells, cube_names, cube_oscs, prepare_repasse_cube
+from dashboard_utils.schema import OSC_SCHEMA, REPASSE_SCHEMA
+from dashboard_utils.money import with_cents, format_reais
+from dashboard_utils.datasets import register_dataset, register_view, get_dataset, registered_datasets, dataset_memory_report
 
 
-def load_csv_robust(filepath, decimal=','):
+# Encodings e separadores aceitos, em ordem de preferência
+CSV_ENCODINGS = ['utf-8', 'latin-1']
+CSV_SEPARATORS = [';', ',', '\t']
+
+# Tamanho da amostra (em bytes) usada para detectar encoding e separador
+SNIFF_SAMPLE_BYTES = 64 * 1024
+
+# Diretórios de dados do projeto
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+FUNDING_DATA_DIR = os.path.join(DATA_DIR, 'prestacao_contas')
+FILTERED_DATA_DIR = os.path.join(DATA_DIR, '..', '..', 'dados atualizados', 'dados_filtrados')
+
+# Versão do schema dos datasets limpos guardados no cache colunar.
+# Incrementar sempre que clean_data, enrich_osc_data ou a consolidação dos repasses mudar.
+DATASET_SCHEMA_VERSION = 6
+
+# Colunas monetárias dos repasses, lidas como texto e guardadas em centavos (money.to_cents)
+REPASSE_MONEY_COLS = ['valor_recurso', 'valor_repasse']
+
+# Resumos pré-agregados dos repasses da Prefeitura (views de 'repasses_prefeitura')
+FUNDING_SUMMARIES = {
+    'ano': 'repasses_prefeitura_ano',
+    'ano_entidade': 'repasses_prefeitura_ano_entidade',
+    'ano_secretaria': 'repasses_prefeitura_ano_secretaria',
+}
+
+# Cubo do Mapa de Transferências (views de 'repasses_mapa', o cruzamento repasses x OSCs)
+REPASSE_CUBE = {
+    'oscs': 'repasse_cube_oscs',
+    'cells': 'repasse_cube_cells',
+    'names': 'repasse_cube_names',
+}
+
+# Manifesto com o dialeto já detectado, salvo ao lado dos CSVs de cada diretório
+DIALECT_MANIFEST_NAME = '.csv_dialects.json'
+
+
+def _read_dialect_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_dialect_manifest(manifest_path, manifest):
+    # Escrita atômica; diretórios somente-leitura apenas perdem o cache
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _decode_sample(sample):
+    """
+    Decodifica a amostra de bytes com o primeiro encoding aceito.
+    Usa decoder incremental para não falhar em um caractere multibyte cortado no fim da amostra.
     """
-    Tenta carregar um CSV lidando automaticamente com:
+    for encoding in CSV_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            text = decoder.decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        return encoding, text.lstrip('\ufeff')
+    raise ValueError(f"nenhum dos encodings {CSV_ENCODINGS} decodifica o arquivo")
+
+
+def _sniff_separator(text):
+    """
+    Escolhe o separador que gera mais de uma coluna e o mesmo número de campos
+    nas linhas completas da amostra. Se nenhum for consistente, usa o primeiro
+    que divide o cabeçalho.
+    """
+    lines = text.splitlines()
+    if len(lines) > 1 and not text.endswith(('\n', '\r')):
+        # Última linha pode ter sido cortada pela amostra
+        lines = lines[:-1]
+    lines = [l for l in lines if l.strip()][:50]
+    if not lines:
+        raise ValueError("arquivo vazio")
+
+    header_splits = []
+    for sep in CSV_SEPARATORS:
+        try:
+            rows = list(csv.reader(lines, delimiter=sep))
+        except csv.Error:
+            continue
+        n_cols = len(rows[0])
+        if n_cols <= 1:
+            continue
+        header_splits.append(sep)
+        if all(len(r) == n_cols for r in rows[1:]):
+            return sep
+
+    if header_splits:
+        return header_splits[0]
+    raise ValueError(f"nenhum dos separadores {CSV_SEPARATORS!r} divide o cabeçalho em mais de uma coluna")
+
+
+def _manifest_path(filepath):
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), DIALECT_MANIFEST_NAME)
+
+
+def _store_dialect(filepath, stat, encoding, sep):
+    manifest_path = _manifest_path(filepath)
+    manifest = _read_dialect_manifest(manifest_path)
+    manifest[os.path.basename(filepath)] = {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'encoding': encoding,
+        'sep': sep,
+    }
+    _write_dialect_manifest(manifest_path, manifest)
+
+
+def detect_csv_dialect(filepath):
+    """
+    Detecta (encoding, separador) de um CSV a partir de uma amostra de bytes.
+    O resultado fica no manifesto do diretório, indexado pelo nome do arquivo e
+    invalidado quando mtime ou tamanho mudam.
+    Levanta ValueError com o motivo quando a detecção falha.
+    """
+    stat = os.stat(filepath)
+    entry = _read_dialect_manifest(_manifest_path(filepath)).get(os.path.basename(filepath))
+    if entry and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+        return entry['encoding'], entry['sep']
+
+    with open(filepath, 'rb') as f:
+        sample = f.read(SNIFF_SAMPLE_BYTES)
+
+    encoding, text = _decode_sample(sample)
+    sep = _sniff_separator(text)
+
+    _store_dialect(filepath, stat, encoding, sep)
+    return encoding, sep
+
+
+def load_csv_robust(filepath, decimal=',', money_cols=None, **read_kwargs):
+    """
+    Carrega um CSV detectando automaticamente:
     - Encodings: utf-8, latin-1 (iso-8859-1)
     - Separadores: ;, ,, \t
+    A detecção usa apenas uma amostra do início do arquivo e fica em cache
+    (ver detect_csv_dialect), então o arquivo é lido por inteiro uma única vez.
+    money_cols: colunas monetárias, lidas como texto e convertidas para centavos
+    inteiros em <coluna>_centavos (money.with_cents), sem passar por float.
+    Argumentos extras (ex.: dtype=str) são repassados ao pd.read_csv.
     """
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    separators = [';', ',', '\t']
-    
-    for encoding in encodings:
-        for sep in separators:
-            try:
-                # Tenta ler apenas as primeiras linhas para validar
-                df = pd.read_csv(filepath, sep=sep, encoding=encoding, nrows=5)
-                # Se leu e tem colunas (>1 se sep correto, mas as vezes 1 coluna é válido, 
-                # porem separadores errados costumam gerar 1 coluna com tudo junto)
-                if len(df.columns) > 1:
-                    # Ler arquivo inteiro
-                    return pd.read_csv(filepath, sep=sep, encoding=encoding, decimal=decimal)
-            except:
-                continue
-                
-    # Se falhar tudo, tenta força bruta com o separador mais comum e latin1
+    if money_cols:
+        dtype = read_kwargs.get('dtype')
+        if not isinstance(dtype, type):  # dtype=str já lê tudo como texto
+            read_kwargs['dtype'] = {**(dtype or {}), **{col: str for col in money_cols}}
+        return with_cents(_read_csv_robust(filepath, decimal, **read_kwargs), money_cols)
+    return _read_csv_robust(filepath, decimal, **read_kwargs)
+
+def _read_csv_robust(filepath, decimal, **read_kwargs):
     try:
-        return pd.read_csv(filepath, sep=';', encoding='latin-1', decimal=decimal)
+        encoding, sep = detect_csv_dialect(filepath)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar {filepath}: não foi possível detectar o formato ({e})")
+        return pd.DataFrame()
+
+    try:
+        return pd.read_csv(filepath, sep=sep, encoding=encoding, decimal=decimal, **read_kwargs)
+    except UnicodeDecodeError as e:
+        # Byte inválido depois da amostra: latin-1 aceita qualquer byte
+        if encoding == 'latin-1':
+            print(f"Erro ao carregar {filepath} (encoding={encoding}, sep={sep!r}): {e}")
+            return pd.DataFrame()
+        print(f"Aviso: {filepath} não é {encoding} após a amostra inicial ({e}); relendo como latin-1")
+        encoding = 'latin-1'
+        _store_dialect(filepath, os.stat(filepath), encoding, sep)
+        try:
+            return pd.read_csv(filepath, sep=sep, encoding=encoding, decimal=decimal, **read_kwargs)
+        except Exception as e:
+            print(f"Erro ao carregar {filepath} (encoding={encoding}, sep={sep!r}): {e}")
+            return pd.DataFrame()
     except Exception as e:
-        print(f"Erro ao carregar {filepath}: {e}")
+        print(f"Erro ao carregar {filepath} (encoding={encoding}, sep={sep!r}): {e}")
         return pd.DataFrame()
 
-@st.cache_data
-def load_data(filename="oscs_santos.csv"):
+def load_csv_cached(filepath, decimal=',', **read_kwargs):
     """
-    Carrega os dados do CSV e aplica a limpeza.
-    Usa cache do Streamlit para performance.
-    O caminho é resolvido relativo à estrutura do projeto (../data/).
+    Igual a load_csv_robust (inclusive money_cols), mas servido pelo cache
+    colunar (Feather) enquanto o CSV de origem não mudar.
     """
-    # Obter o diretório onde este script (data_loader.py) está localizado: /.../dashboard_oscs/utils/
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Subir um nível para /.../dashboard_oscs/ e entrar em data/
-    file_path = os.path.join(current_dir, '..', 'data', filename)
+    options = ','.join(
+        f"{k}={v.__name__ if isinstance(v, type) else v!r}" for k, v in sorted(read_kwargs.items())
+    )
+    name = f"csv_{os.path.basename(os.path.dirname(os.path.abspath(filepath)))}_{os.path.basename(filepath)}_dec{decimal}_{options}"
+    return cached_frame(
+        name,
+        [filepath],
+        lambda: load_csv_robust(filepath, decimal=decimal, **read_kwargs),
+        schema_version=DATASET_SCHEMA_VERSION,
+    )
+
+OSC_DATA_PATH = os.path.join(DATA_DIR, 'oscs_santos.csv')
+MATCH_DATA_PATH = os.path.join(DATA_DIR, 'tabela_recursos_osc_match_completo.csv')
+MATCH_SUMMARY_PATH = os.path.join(DATA_DIR, 'tabela_resumo_recursos_por_osc.csv')
+UNMATCHED_NAMES_PATH = os.path.join(DATA_DIR, 'relatorio_nomes_nao_correspondidos.csv')
+IPEA_RESOURCES_PATH = os.path.join(FILTERED_DATA_DIR, '4786-recursososc.csv')
+MJ_RESOURCES_PATH = os.path.join(FILTERED_DATA_DIR, 'tb_recursos.csv')
+CONTAS_PATH = os.path.join(FILTERED_DATA_DIR, 'contas.csv')
+# Tabelas de pessoal ocupado (RAIS): nome no registro -> arquivo
+ANALYSIS_TABLES = {
+    'vinculos_7_1': 'tabela_7_1_pessoal_ocupado.csv',
+    'vinculos_7_2': 'tabela_7_2_pessoal_por_area.csv',
+    'vinculos_7_3': 'tabela_7_3_faixas_vinculos.csv',
+    'vinculos_8_2': 'tabela_8_2_finalidade_x_faixas.csv',
+}
 
-    if not os.path.exists(file_path):
-        st.error(f"Arquivo não encontrado: {file_path}")
+def _build_osc_data():
+    if not os.path.exists(OSC_DATA_PATH):
+        st.error(f"Arquivo não encontrado: {OSC_DATA_PATH}")
         return pd.DataFrame()
 
-    df = load_csv_robust(file_path)
+    # Os limites dos bairros também entram no hash: trocar o GeoJSON refaz o cache
+    return cached_frame(
+        "clean_oscs_santos.csv",
+        [OSC_DATA_PATH, BAIRROS_GEOJSON],
+        lambda: enrich_osc_data(clean_data(load_csv_robust(OSC_DATA_PATH))),
+        schema_version=DATASET_SCHEMA_VERSION,
+    )
 
-    df_cleaned = clean_data(df)
-    return df_cleaned
+def load_data():
+    """
+    Cadastro das OSCs já limpo e com as colunas derivadas (enrich_osc_data), de modo
+    que as páginas só selecionam e filtram.
+    Servido pelo registro de conjuntos de dados (um objeto por processo, compartilhado):
+    não alterar no lugar. O arquivo fica em ../data/oscs_santos.csv.
+    """
+    return get_dataset('oscs')
 
-@st.cache_data
-def load_funding_data():
+def _founded_oscs(df):
+    if 'Ano_Fundacao' not in df.columns:
+        return df.iloc[0:0]
+    founded = df[df['Ano_Fundacao'].notna()]
+    return founded.assign(Ano_Fundacao=founded['Ano_Fundacao'].astype(int))
+
+def load_foundation_data():
     """
-    Carrega e consolida os dados de repasses da prefeitura.
-    Lê arquivos do diretório data/prestacao_contas/ com padrão prestacao-contas_prestacao_valor-ano_ano_*.csv
+    View do cadastro só com as OSCs de ano de fundação conhecido, com Ano_Fundacao
+    inteiro (compartilhada pelas páginas de Visão Geral, Tendências e Evolução).
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(current_dir, '..', 'data', 'prestacao_contas')
-    
-    if not os.path.exists(data_dir):
-        return pd.DataFrame()
-        
-    all_files = [f for f in os.listdir(data_dir) if f.startswith('prestacao-contas_prestacao_valor-ano_ano_') and f.endswith('.csv')]
-    
+    return get_dataset('oscs_fundacao')
+
+def load_area_table(filepath):
+    """
+    Tabela 2 (áreas e subáreas) já montada a partir da planilha area_subarea.csv,
+    guardada no cache colunar e refeita só quando o conteúdo (hash) da planilha muda.
+    """
+    return cached_frame(
+        f"tabela2_{os.path.basename(filepath)}",
+        [filepath],
+        lambda: build_area_table(load_csv_robust(filepath)),
+        schema_version=DATASET_SCHEMA_VERSION,
+    )
+
+def _funding_files():
+    if not os.path.exists(FUNDING_DATA_DIR):
+        return []
+    return sorted(
+        f for f in os.listdir(FUNDING_DATA_DIR)
+        if f.startswith('prestacao-contas_prestacao_valor-ano_ano_') and f.endswith('.csv')
+    )
+
+def _funding_paths():
+    return [os.path.join(FUNDING_DATA_DIR, f) for f in _funding_files()]
+
+def _build_funding_data(all_files):
     dfs = []
     for filename in all_files:
-        filepath = os.path.join(data_dir, filename)
+        filepath = os.path.join(FUNDING_DATA_DIR, filename)
         try:
             # Extrair ano do nome do arquivo (esperado: ...ano_YYYY.csv)
             # O formato é prestacao-contas_prestacao_valor-ano_ano_2024.csv
@@ -78,7 +302,7 @@ def load_funding_data():
             ano_str = filename.replace('.csv', '').split('_')[-1]
             ano = int(ano_str)
             
-            df = load_csv_robust(filepath, decimal='.')
+            df = load_csv_robust(filepath, decimal='.', money_cols=REPASSE_MONEY_COLS)
             
             if not df.empty:
                 df['ano'] = ano
@@ -90,5 +314,307 @@ def load_funding_data():
     if not dfs:
         return pd.DataFrame()
         
-    final_df = pd.concat(dfs, ignore_index=True)
-    return final_df
+    return pd.concat(dfs, ignore_index=True)
+
+def _build_funding_dataset():
+    all_files = _funding_files()
+    if not all_files:
+        return pd.DataFrame()
+
+    return cached_frame(
+        "funding_prestacao_contas",
+        [os.path.join(FUNDING_DATA_DIR, f) for f in all_files],
+        lambda: _build_funding_data(all_files),
+        schema_version=DATASET_SCHEMA_VERSION,
+    )
+
+def load_funding_data():
+    """
+    Dados consolidados de repasses da prefeitura (conjunto compartilhado; não alterar no lugar).
+    Lê arquivos do diretório data/prestacao_contas/ com padrão prestacao-contas_prestacao_valor-ano_ano_*.csv
+    """
+    return get_dataset('repasses_prefeitura')
+
+def _funding_by(df, keys):
+    """Valor (centavos) e quantidade de repasses por `keys`; chaves ausentes ficam de fora."""
+    if df.empty:
+        return pd.DataFrame(columns=keys + ['valor_repasse_centavos', 'qtd'])
+    return df.groupby(keys, sort=True, observed=True).agg(
+        valor_repasse_centavos=('valor_repasse_centavos', 'sum'),
+        qtd=('valor_repasse_centavos', 'size'),
+    ).reset_index()
+
+def _funding_by_year(df):
+    totals = _funding_by(df, ['ano'])
+    if df.empty:
+        return totals.assign(entidades=pd.Series(dtype='int64'))
+    entidades = df.groupby('ano', observed=True)['beneficiaria_nome'].nunique()
+    return totals.assign(entidades=totals['ano'].map(entidades).astype('int64'))
+
+def _funding_by_year_entity(df):
+    return _funding_by(df, ['ano', 'beneficiaria_nome'])
+
+def _funding_by_year_secretaria(df):
+    summary = _funding_by(df, ['ano', 'secretaria_sigla'])
+    # Participação no total do ano e rótulo da legenda do gráfico de pizza, montados uma vez aqui
+    percent = summary['valor_repasse_centavos'] / summary.groupby('ano', observed=True)['valor_repasse_centavos'].transform('sum') * 100
+    summary['percentual'] = percent.astype('float64')
+    summary['rotulo'] = [
+        f"{sigla}: {format_reais(cents)} ({pct:.1f}%)"
+        for sigla, cents, pct in zip(summary['secretaria_sigla'], summary['valor_repasse_centavos'], summary['percentual'])
+    ]
+    return summary
+
+def load_funding_summaries():
+    """
+    Resumos dos repasses da Prefeitura, pré-agregados uma vez por versão dos arquivos
+    (views compartilhadas; não alterar no lugar), em centavos:
+      'ano': valor, quantidade e entidades distintas por ano;
+      'ano_entidade': valor e quantidade por (ano, beneficiaria_nome);
+      'ano_secretaria': valor, quantidade, percentual do ano e rótulo por (ano, secretaria_sigla).
+    """
+    return {key: get_dataset(name) for key, name in FUNDING_SUMMARIES.items()}
+
+def _build_match_data():
+    if not os.path.exists(MATCH_DATA_PATH):
+        return pd.DataFrame()
+
+    df = load_csv_cached(MATCH_DATA_PATH, money_cols=REPASSE_MONEY_COLS)
+    # Ensure match_type is string and fill NaNs
+    if 'match_type' in df.columns:
+        df['match_type'] = df['match_type'].fillna('None').astype(str)
+    return df
+
+def load_match_data():
+    """
+    Repasses da Prefeitura cruzados com as OSCs (tabela_recursos_osc_match_completo.csv),
+    com match_type 'None' quando não houve correspondência. Conjunto compartilhado
+    pelas páginas de Correspondência e do Mapa de Transferências.
+    """
+    return get_dataset('repasses_match')
+
+def load_matching_data():
+    """
+    Resumo, cruzamento completo e nomes não correspondidos do matching de repasses
+    (página de Correspondência de Transferências).
+    """
+    missing = [p for p in (MATCH_SUMMARY_PATH, MATCH_DATA_PATH, UNMATCHED_NAMES_PATH) if not os.path.exists(p)]
+    if missing:
+        st.error(f"Arquivos de dados não encontrados em {DATA_DIR}. Verifique se a etapa de matching foi executada.")
+        return None, None, None
+
+    return get_dataset('repasses_resumo'), get_dataset('repasses_match'), get_dataset('nomes_nao_correspondidos')
+
+def _map_transfers(df_matches, df_oscs):
+    """
+    Repasses com correspondência cruzados com as coordenadas e áreas das OSCs,
+    preparados para o cubo do Mapa de Transferências (prepare_repasse_cube).
+    """
+    if df_matches.empty or df_oscs.empty:
+        return pd.DataFrame()
+
+    # Filtrar apenas matches válidos (não None)
+    df_valid_matches = df_matches[df_matches['match_type'].notna() & (df_matches['match_type'] != 'None')].copy()
+
+    # valor_repasse_centavos já chega em centavos inteiros (load_csv_robust/money_cols)
+
+    # Garantir CNPJ limpo para merge
+    # df_oscs já traz 'cnpj_clean' (enrich_osc_data); o match usa a mesma limpeza
+    df_valid_matches['match_cnpj_clean'] = clean_cnpj(df_valid_matches['match_cnpj'])
+
+    # Merge para pegar coordenadas e detalhes
+    # Incluir todas as colunas de área no merge
+    cols_to_merge = ['cnpj_clean', 'latitude', 'longitude', 'tx_endereco_completo', 'Bairro', 'situacao_cadastral', 'dt_fundacao_osc', 'Area_Atuacao', AREA_BITMASK_COL]
+    cols_to_merge += [c for c in AREA_COL_LABELS if c in df_oscs.columns]
+
+    df_merged = df_valid_matches.merge(
+        df_oscs[cols_to_merge],
+        left_on='match_cnpj_clean',
+        right_on='cnpj_clean',
+        how='inner' # Inner para garantir que só mostramos quem tem coordenada
+    )
+
+    # Se latitude/longitude forem vazias, remover
+    df_merged = df_merged.dropna(subset=['latitude', 'longitude'])
+
+    # Garantir Ano como Inteiro
+    df_merged['ano_recurso'] = df_merged['ano_recurso'].fillna(0).astype(int)
+
+    return prepare_repasse_cube(df_merged, AREA_COL_LABELS)
+
+def _cube_view(build):
+    # Sem repasses cruzados (arquivo de matching ausente), as tabelas do cubo ficam vazias
+    return lambda df: pd.DataFrame() if df.empty else build(df)
+
+def load_repasse_cube():
+    """
+    Cubo do Mapa de Transferências: repasses cruzados com as OSCs e pré-agregados por
+    (OSC, áreas, ano, secretaria) uma vez por versão dos arquivos de repasses, do
+    cadastro e dos bairros (views compartilhadas; query_repasse_cube só lê as tabelas).
+    """
+    return {key: get_dataset(name) for key, name in REPASSE_CUBE.items()}
+
+def _build_ipea_resources():
+    """4786-recursososc.csv (IPEA Transferências) restrito às OSCs de Santos."""
+    df_main = get_dataset('oscs')
+    try:
+        # Valor em centavos (nr_valor_recursos_osc_centavos)
+        df_recursos_ipea = load_csv_cached(IPEA_RESOURCES_PATH, dtype=str, money_cols=['nr_valor_recursos_osc'])
+        df_recursos_ipea.columns = df_recursos_ipea.columns.str.strip()
+        
+        # Convert numeric columns
+        df_recursos_ipea['dt_ano_recursos_osc'] = pd.to_datetime(df_recursos_ipea['dt_ano_recursos_osc'], errors='coerce').dt.year
+        
+        # Join with Main Data on id_osc (or similar)
+        # The file 4786 has 'id_osc' and 'cd_identificador_osc'. 
+        # Typically 'cd_identificador_osc' is the CNPJ. Let's try joining on CNPJ first.
+        # Clean column
+        df_recursos_ipea['cnpj_join'] = df_recursos_ipea['cd_identificador_osc'].str.replace(r'\D', '', regex=True)
+        
+        # Merge to get Name and other info
+        df_recursos_ipea = df_recursos_ipea.merge(
+            df_main[['cnpj_clean', 'tx_razao_social_osc', 'situacao_cadastral']], 
+            left_on='cnpj_join', 
+            right_on='cnpj_clean', 
+            how='inner', # Only keep matches in our filtered Santos set
+            suffixes=('_old', '') # Keep the name from df_main (clean) as the primary one (no suffix)
+        )
+        # Drop the old name column if it exists
+        if 'tx_razao_social_osc_old' in df_recursos_ipea.columns:
+            df_recursos_ipea.drop(columns=['tx_razao_social_osc_old'], inplace=True)
+    except Exception as e:
+        st.warning(f"Erro ao carregar 4786-recursososc.csv: {e}")
+        df_recursos_ipea = pd.DataFrame()
+    return df_recursos_ipea
+
+def _build_mj_resources():
+    """tb_recursos.csv (Ministério da Justiça) restrito às OSCs de Santos."""
+    df_main = get_dataset('oscs')
+    try:
+        df_tb_recursos = load_csv_cached(MJ_RESOURCES_PATH, dtype=str)
+        
+        # Clean CNPJ
+        df_tb_recursos['cnpj_clean'] = df_tb_recursos['cnpj'].str.replace(r'\D', '', regex=True)
+        
+        # Clean percentages (replace % and comma)
+        pct_cols = [c for c in df_tb_recursos.columns if '%' in str(df_tb_recursos[c].iloc[0]) or 'propria' in c or 'privada' in c or 'publica' in c]
+        for col in pct_cols:
+             if col in df_tb_recursos.columns:
+                df_tb_recursos[col] = df_tb_recursos[col].str.replace('%', '').str.replace(',', '.').replace('', '0')
+                df_tb_recursos[col] = pd.to_numeric(df_tb_recursos[col], errors='coerce').fillna(0)
+
+        # Merge
+        df_tb_recursos = df_tb_recursos.merge(
+            df_main[['cnpj_clean', 'tx_razao_social_osc']], 
+            on='cnpj_clean', 
+            how='inner'
+        )
+    except Exception as e:
+        st.warning(f"Erro ao carregar tb_recursos.csv: {e}")
+        df_tb_recursos = pd.DataFrame()
+    return df_tb_recursos
+
+def _build_contas():
+    """contas.csv (Prefeitura de Santos) com o valor do repasse em centavos."""
+    try:
+        # 'R$ 1.213.421,10' -> centavos em 'Valor do Repasse_centavos'
+        df_contas = load_csv_cached(CONTAS_PATH, dtype=str, money_cols=['Valor do Repasse'])
+            
+        # Strip strings
+        if 'Entidade' in df_contas.columns:
+            df_contas['Entidade'] = df_contas['Entidade'].str.strip()
+            
+    except Exception as e:
+        # Debug info: list files in the directory
+        try:
+            files_in_dir = os.listdir(FILTERED_DATA_DIR)
+            st.warning(f"Erro ao carregar contas.csv: {e}. Arquivos em {FILTERED_DATA_DIR}: {files_in_dir}")
+        except:
+             st.warning(f"Erro ao carregar contas.csv: {e}")
+        df_contas = pd.DataFrame()
+    return df_contas
+
+def load_resources_data():
+    """Transferências federais (IPEA), fontes de recursos (MJ) e contas da Prefeitura."""
+    if load_data().empty:
+        st.error("Erro ao carregar oscs_santos.csv")
+        return None, None, None
+
+    return get_dataset('recursos_ipea'), get_dataset('recursos_mj'), get_dataset('contas_prefeitura')
+
+def load_analysis_data():
+    """Tabelas de pessoal ocupado (RAIS) da página de Análise de Vínculos."""
+    try:
+        return tuple(get_dataset(name) for name in ANALYSIS_TABLES)
+    except Exception as e:
+        st.error(f"Erro ao carregar arquivos: {e}")
+        return None, None, None, None
+
+# Registro dos conjuntos de dados compartilhados entre as páginas
+register_dataset('oscs', _build_osc_data, [OSC_DATA_PATH, BAIRROS_GEOJSON],
+                 "Cadastro das OSCs de Santos (limpo e enriquecido)", schema=OSC_SCHEMA)
+register_view('oscs_fundacao', 'oscs', _founded_oscs,
+              "OSCs com ano de fundação conhecido (Ano_Fundacao inteiro)")
+register_dataset('repasses_prefeitura', _build_funding_dataset, _funding_paths,
+                 "Prestação de contas da Prefeitura, todos os anos", schema=REPASSE_SCHEMA)
+register_view(FUNDING_SUMMARIES['ano'], 'repasses_prefeitura', _funding_by_year,
+              "Repasses da Prefeitura: totais por ano")
+register_view(FUNDING_SUMMARIES['ano_entidade'], 'repasses_prefeitura', _funding_by_year_entity,
+              "Repasses da Prefeitura: totais por ano e entidade")
+register_view(FUNDING_SUMMARIES['ano_secretaria'], 'repasses_prefeitura', _funding_by_year_secretaria,
+              "Repasses da Prefeitura: totais por ano e secretaria")
+register_dataset('repasses_match', _build_match_data, [MATCH_DATA_PATH],
+                 "Repasses da Prefeitura cruzados com as OSCs", schema=REPASSE_SCHEMA)
+register_view('repasses_mapa', ('repasses_match', 'oscs'), _map_transfers,
+              "Repasses cruzados com as coordenadas e áreas das OSCs (base do Mapa de Transferências)")
+register_view(REPASSE_CUBE['oscs'], 'repasses_mapa', _cube_view(cube_oscs),
+              "Mapa de Transferências: atributos de cada OSC")
+register_view(REPASSE_CUBE['cells'], 'repasses_mapa', _cube_view(cube_cells),
+              "Mapa de Transferências: valor e quantidade por OSC, ano e secretaria")
+register_view(REPASSE_CUBE['names'], 'repasses_mapa', _cube_view(cube_names),
+              "Mapa de Transferências: repasses por OSC, ano e beneficiária")
+register_dataset('repasses_resumo', lambda: load_csv_cached(MATCH_SUMMARY_PATH, money_cols=['valor_repasse']), [MATCH_SUMMARY_PATH],
+                 "Resumo dos repasses por OSC")
+register_dataset('nomes_nao_correspondidos', lambda: load_csv_cached(UNMATCHED_NAMES_PATH, money_cols=['valor_repasse']), [UNMATCHED_NAMES_PATH],
+                 "Beneficiários sem correspondência no Mapa das OSCs", schema=REPASSE_SCHEMA)
+register_dataset('recursos_ipea', _build_ipea_resources, [OSC_DATA_PATH, BAIRROS_GEOJSON, IPEA_RESOURCES_PATH],
+                 "Transferências federais (IPEA) das OSCs de Santos")
+register_dataset('recursos_mj', _build_mj_resources, [OSC_DATA_PATH, BAIRROS_GEOJSON, MJ_RESOURCES_PATH],
+                 "Fontes de recursos (Ministério da Justiça) das OSCs de Santos")
+register_dataset('contas_prefeitura', _build_contas, [CONTAS_PATH],
+                 "Contas da Prefeitura de Santos (contas.csv)")
+for _name, _filename in ANALYSIS_TABLES.items():
+    _path = os.path.join(FILTERED_DATA_DIR, _filename)
+    register_dataset(_name, lambda path=_path: load_csv_cached(path), [_path], f"RAIS: {_filename}")
+
+def ingest_columnar_cache():
+    """
+    Etapa de ingestão: converte todos os CSVs usados pelo dashboard para o
+    cache colunar, para que o primeiro acesso após um deploy não precise
+    interpretar CSV. Pode ser rodada no build com:
+        python -m dashboard_utils.data_loader
+    """
+    # Conjuntos do registro (cadastro limpo, repasses consolidados, cruzamentos...)
+    for name in registered_datasets():
+        get_dataset(name)
+
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if filename.endswith('.csv') and filename != 'oscs_santos.csv':
+            load_csv_cached(os.path.join(DATA_DIR, filename))
+
+    if os.path.exists(FILTERED_DATA_DIR):
+        for filename in sorted(os.listdir(FILTERED_DATA_DIR)):
+            if filename.endswith('.csv'):
+                load_csv_cached(os.path.join(FILTERED_DATA_DIR, filename))
+
+    # Tabela 2 da página de Áreas de Atuação
+    area_subarea_path = os.path.join(FILTERED_DATA_DIR, 'area_subarea.csv')
+    if os.path.exists(area_subarea_path):
+        load_area_table(area_subarea_path)
+
+if __name__ == "__main__":
+    if not os.path.exists(BAIRROS_GEOJSON):
+        print("Aviso: data/bairros_santos.geojson ausente; bairros inferidos do endereço. "
+              "Gere o arquivo com: python -m dashboard_utils.bairros_ingest")
+    ingest_columnar_cache()
+    print(dataset_memory_report().to_string(index=False))
@@ -0,0 +1,212 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard_utils.schema import apply_schema
+
+# Registro único dos conjuntos de dados do dashboard: cada nome aponta para uma
+# função que monta o DataFrame e para os arquivos de origem. O DataFrame montado
+# é um único objeto por processo (st.cache_resource), compartilhado por todas as
+# páginas e sessões, em vez de uma cópia por página (e por chamada, no st.cache_data).
+# Por ser compartilhado, quem usa não deve alterá-lo no lugar: filtre ou copie antes.
+# Colunas derivadas entram como views (register_view), também compartilhadas.
+# O contrato é verificado: os arrays ficam somente leitura e o esquema (colunas,
+# tipos e forma) e o endereço dos dados de cada coluna são conferidos a cada acesso.
+_registry = {}
+_signatures = {}
+_fingerprints = {}
+_raw_memory = {}
+_memory = {}
+_lock = threading.Lock()
+
+
+def register_dataset(name, build, sources=(), description="", schema=None):
+    """
+    Registra um conjunto de dados.
+    build: função sem argumentos que retorna o DataFrame.
+    sources: arquivos de origem (ou função que retorna a lista, quando ela depende
+    do conteúdo de um diretório); mudou algum (mtime/tamanho), o conjunto é refeito.
+    schema: tipos compactos por papel de coluna (ver dashboard_utils.schema),
+    aplicados uma vez na montagem.
+    """
+    _registry[name] = {
+        'build': build,
+        'sources': sources,
+        'description': description,
+        'schema': schema,
+    }
+
+
+def register_view(name, base, derive, description=""):
+    """
+    Registra um conjunto derivado de outro (filtro, colunas calculadas...):
+    derive recebe o DataFrame compartilhado de `base`, não deve alterá-lo, e
+    retorna um novo. A view é refeita junto com a base.
+    `base` pode ser uma tupla de nomes (cruzamento de conjuntos): derive recebe
+    os DataFrames na mesma ordem e a view é refeita quando qualquer um muda.
+    """
+    bases = (base,) if isinstance(base, str) else tuple(base)
+    register_dataset(
+        name,
+        lambda: derive(*(get_dataset(b) for b in bases)),
+        lambda: [path for b in bases for path in _sources(_registry[b]['sources'])],
+        description,
+    )
+
+
+def registered_datasets():
+    return list(_registry)
+
+
+def _sources(sources):
+    return sources() if callable(sources) else list(sources)
+
+
+def _signature(sources):
+    stats = []
+    for path in map(os.path.abspath, _sources(sources)):
+        try:
+            st_ = os.stat(path)
+            stats.append((path, st_.st_mtime_ns, st_.st_size))
+        except OSError:
+            stats.append((path, None, None))
+    return tuple(stats)
+
+
+def _column_arrays(df):
+    """
+    Array NumPy de cada coluna (Categorical.codes nas colunas category), como view
+    dos dados do frame. Colunas de texto Arrow são imutáveis e ficam de fora.
+    """
+    for _, s in df.items():
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            yield s.array.codes
+        elif isinstance(s.dtype, np.dtype):
+            yield s.to_numpy()
+
+
+def _readonly(values):
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+def freeze_frame(df):
+    """
+    DataFrame somente leitura com os mesmos dados de df, sem copiá-los: cada coluna
+    NumPy é remontada sobre uma view somente leitura, de modo que escrever valores
+    (df.loc[...] = ..., df.iloc[...] = ...) passa a levantar ValueError, enquanto
+    filtros, cópias e colunas novas em frames derivados seguem funcionando.
+    Colunas lidas do cache colunar continuam apontando para o arquivo mapeado.
+    O df original não deve mais ser alterado (compartilha os dados).
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df
+    columns = []
+    for _, s in df.items():
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            columns.append(pd.Categorical.from_codes(_readonly(s.array.codes), dtype=s.dtype))
+        elif isinstance(s.dtype, np.dtype):
+            columns.append(_readonly(s.to_numpy()))
+        else:
+            columns.append(s.array)
+    # Chaves posicionais: aceita nomes de coluna repetidos
+    frozen = pd.DataFrame(dict(enumerate(columns)), index=df.index, copy=False)
+    frozen.columns = df.columns
+    return frozen
+
+
+def _fingerprint(df):
+    """
+    Esquema do DataFrame e o endereço dos dados de cada coluna. Com Copy-on-Write,
+    escrever num frame que tem views vivas troca o array por uma cópia gravável,
+    em vez de falhar: o endereço muda e aparece aqui.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return None
+    addresses = tuple(values.__array_interface__['data'][0] for values in _column_arrays(df))
+    return df.shape, tuple(df.columns), tuple(map(str, df.dtypes)), addresses
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_dataset(name, signature):
+    spec = _registry[name]
+    df = spec['build']()
+    raw_memory = frame_memory(df)
+    df = apply_schema(df, spec['schema'])
+    # Medida antes de congelar: memory_usage(deep=True) falha em colunas object somente leitura
+    memory = frame_memory(df)
+    df = freeze_frame(df)
+    with _lock:
+        _fingerprints[name] = _fingerprint(df)
+        _raw_memory[name] = raw_memory
+        _memory[name] = memory
+    return df
+
+
+def get_dataset(name):
+    """
+    DataFrame compartilhado do conjunto `name`, montado uma vez por processo
+    e refeito quando algum arquivo de origem muda.
+    """
+    spec = _registry[name]
+    signature = _signature(spec['sources'])
+    with _lock:
+        previous = _signatures.get(name)
+        _signatures[name] = signature
+    if previous is not None and previous != signature:
+        # Origem mudou: descarta a versão antiga deste conjunto em vez de mantê-la na
+        # memória (os demais conjuntos seguem em cache; as views têm assinatura própria)
+        _shared_dataset.clear(name, previous)
+    df = _shared_dataset(name, signature)
+    if _fingerprint(df) != _fingerprints.get(name):
+        # Alguém alterou o objeto compartilhado (coluna criada/removida, tipo ou valores
+        # trocados): descarta só este conjunto e falha aqui, perto do responsável
+        _shared_dataset.clear(name, signature)
+        raise RuntimeError(
+            f"O conjunto de dados '{name}' foi alterado no lugar. Os DataFrames do "
+            "registro são compartilhados entre páginas: use .copy() ou .assign() antes de alterar."
+        )
+    return df
+
+
+def frame_memory(df):
+    """Bytes ocupados pelo DataFrame, incluindo o conteúdo das colunas de texto."""
+    if df is None:
+        return 0
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except ValueError:
+        # Colunas object somente leitura (views montadas sobre um conjunto congelado)
+        return int(df.copy().memory_usage(index=True, deep=True).sum())
+
+
+def dataset_memory_report(names=None):
+    """
+    Memória por conjunto de dados: linhas, colunas, MB como montado (tipos do CSV)
+    e MB servido (depois do schema compacto). Por padrão inclui só os conjuntos
+    já carregados neste processo; passe `names` para carregar e medir outros.
+    """
+    if names is None:
+        with _lock:
+            names = [name for name in _registry if name in _signatures]
+    rows = []
+    for name in names:
+        df = get_dataset(name)
+        with _lock:
+            raw_memory = _raw_memory.get(name, 0)
+            memory = _memory.get(name, 0)
+        rows.append({
+            'Conjunto': name,
+            'Descrição': _registry[name]['description'],
+            'Linhas': 0 if df is None else len(df),
+            'Colunas': 0 if df is None else len(df.columns),
+            'Memória sem schema (MB)': round(raw_memory / 1024 ** 2, 2),
+            'Memória (MB)': round(memory / 1024 ** 2, 2),
+        })
+    columns = ['Conjunto', 'Descrição', 'Linhas', 'Colunas', 'Memória sem schema (MB)', 'Memória (MB)']
+    report = pd.DataFrame(rows, columns=columns)
+    return report.sort_values('Memória (MB)', ascending=False, ignore_index=True)
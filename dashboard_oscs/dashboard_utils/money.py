@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Colunas monetárias são guardadas em centavos inteiros com este sufixo
+# (ex.: valor_repasse -> valor_repasse_centavos); somas e agrupamentos ficam
+# em aritmética inteira e só a exibição volta para reais.
+CENTS_SUFFIX = '_centavos'
+
+# Ponto decimal (sem vírgula no valor): um único ponto; com mais de um, são de milhar
+_DOT_DECIMAL = r'\d*\.\d*'
+_NUMBER = r'^(\d*)(?:\.(\d*))?$'
+
+
+def cents_col(col):
+    return f"{col}{CENTS_SUFFIX}"
+
+
+def to_cents(values):
+    """
+    Converte valores monetários para centavos inteiros (int64), de forma vetorizada.
+    Aceita números em reais (float/int) e texto nos formatos das fontes:
+    'R$ 1.213.421,10', '63047,57', '6000,0', '179010.00', '1269.42', '179010', 'R$ 1.200.000'.
+    Com vírgula, ela é o separador decimal e os pontos são de milhar; sem vírgula,
+    um único ponto é decimal (inclusive texto de float, '10497.639999999998') e
+    vários pontos são de milhar ('R$ 1.200.000').
+    Frações com mais de 2 dígitos são arredondadas pelo 3º dígito (metade para cima).
+    Sinal '-' ou parênteses indicam valor negativo. Vazios e inválidos viram 0.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return (s.astype(np.float64) * 100).round().fillna(0).astype(np.int64)
+
+    text = s.astype('string').str.replace(r'[R$\s]', '', regex=True)
+    negative = text.str.startswith('-') | (text.str.startswith('(') & text.str.endswith(')'))
+    text = text.str.strip('-()')
+
+    has_comma = text.str.contains(',', regex=False)
+    comma_form = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    dot_form = text.where(text.str.fullmatch(_DOT_DECIMAL), text.str.replace('.', '', regex=False))
+    parts = comma_form.where(has_comma, dot_form).str.extract(_NUMBER)
+
+    whole = pd.to_numeric(parts[0].replace('', '0'), errors='coerce')
+    frac = parts[1].fillna('').str.pad(3, side='right', fillchar='0')
+    cents = whole * 100 + pd.to_numeric(frac.str[:2], errors='coerce') + (frac.str[2] >= '5').astype(int)
+
+    cents = cents.where(~negative.fillna(False), -cents)
+    return cents.fillna(0).astype(np.int64).rename(s.name)
+
+
+def with_cents(df, money_cols):
+    """
+    Troca cada coluna monetária presente em df pela versão em centavos
+    (<coluna>_centavos, int64), na mesma posição. Retorna um novo DataFrame.
+    """
+    present = [col for col in money_cols if col in df.columns]
+    if not present:
+        return df
+    return df.assign(**{col: to_cents(df[col]) for col in present}).rename(columns={col: cents_col(col) for col in present})
+
+
+def cents_to_reais(cents):
+    """Centavos -> reais (float), só para gráficos e exibição."""
+    return cents / 100
+
+
+def sum_by(df, by, col):
+    """
+    Soma <col>_centavos por `by` em aritmética inteira e acrescenta <col> em reais
+    (para eixos e rótulos dos gráficos). Retorna um DataFrame com `by` como colunas.
+    """
+    totals = df.groupby(by, observed=True)[cents_col(col)].sum().reset_index()
+    totals[col] = cents_to_reais(totals[cents_col(col)])
+    return totals
+
+
+def reais_view(df):
+    """
+    Cópia para exibição (tabelas): cada <coluna>_centavos volta a ser <coluna> em reais.
+    """
+    cents = [c for c in df.columns if str(c).endswith(CENTS_SUFFIX)]
+    if not cents:
+        return df
+    return df.assign(**{c: cents_to_reais(df[c]) for c in cents}).rename(
+        columns={c: c[:-len(CENTS_SUFFIX)] for c in cents}
+    )
+
+
+def format_reais(cents, prefix="R$ "):
+    """
+    Texto em reais a partir de centavos inteiros, sem passar por float
+    (ex.: 121342110 -> 'R$ 1,213,421.10', no formato já usado nas páginas).
+    """
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{prefix}{whole:,}.{frac:02d}"
@@ -0,0 +1,94 @@
+from dashboard_utils.data_cleaning import AREA_BITMASK_COL, classify_areas
+
+# Atributos que identificam cada ponto do Mapa 3 (OSC como aparece nos repasses)
+OSC_KEY_COLS = ['match_cnpj_clean', 'match_name', 'latitude', 'longitude', 'cd_natureza_juridica', 'natureza_juridica_desc',
+                'situacao_cadastral', 'Bairro', 'dt_fundacao_osc', 'tx_endereco_completo', 'Area_Display']
+
+# Grão do cubo: OSC, áreas da OSC (bitmask), ano e secretaria responsável
+_CELL_KEYS = ['osc_id', AREA_BITMASK_COL, 'ano_recurso']
+
+
+def prepare_repasse_cube(df_merged, area_labels):
+    """
+    Repasses já cruzados com as OSCs (uma linha por repasse) com o osc_id de cada
+    ponto do mapa e a área exibida no popup; base das tabelas do cubo.
+    area_labels: {coluna Area_*: rótulo} usado na área exibida no popup.
+    Linhas com algum atributo de OSC ausente ficam de fora, como no groupby da página.
+    """
+    df = df_merged.copy()
+    for col in area_labels:
+        if col not in df.columns:
+            df[col] = 0 # Fallback
+    # "Múltiplas Áreas" quando houver mais de uma área, para manter o popup limpo
+    df['Area_Display'], _ = classify_areas(df, list(area_labels.keys()), list(area_labels.values()))
+
+    df['osc_id'] = df.groupby(OSC_KEY_COLS, sort=True, observed=True).ngroup()
+    df = df[df['osc_id'] >= 0]
+    # Mesma conversão do antigo agregador de secretarias (", ".join(sorted(x.astype(str).unique())))
+    df['secretaria_sigla'] = df['secretaria_sigla'].astype(str)
+    return df
+
+
+def cube_oscs(df):
+    """Atributos de cada OSC (OSC_KEY_COLS), indexados por osc_id."""
+    return df.drop_duplicates('osc_id').set_index('osc_id').sort_index()[OSC_KEY_COLS]
+
+
+def cube_cells(df):
+    """Valor somado (centavos) e quantidade por (osc_id, bitmask, ano, secretaria)."""
+    return df.groupby(_CELL_KEYS + ['secretaria_sigla'], sort=False, dropna=False, observed=True).agg(
+        valor_repasse_centavos=('valor_repasse_centavos', 'sum'),
+        id=('id', 'count'),
+    ).reset_index()
+
+
+def cube_names(df):
+    """Quantidade por (osc_id, bitmask, ano, beneficiária), para a mais frequente."""
+    return df.groupby(_CELL_KEYS + ['beneficiaria_nome'], sort=False, observed=True).size().rename('qtd').reset_index()
+
+
+def cube_years(cube):
+    """(menor, maior) ano com repasses no cubo, ou None se vazio."""
+    years = cube['cells']['ano_recurso']
+    if years.empty:
+        return None
+    return int(years.min()), int(years.max())
+
+
+def _slice(table, start_year, end_year, area_mask):
+    mask = table['ano_recurso'].between(start_year, end_year) & ((table[AREA_BITMASK_COL] & area_mask) != 0)
+    return table[mask]
+
+
+def query_repasse_cube(cube, start_year, end_year, area_mask):
+    """
+    Uma linha por OSC com repasses no período e em alguma das áreas de area_mask,
+    somando as fatias do cubo: valor total em centavos (valor_repasse_centavos), quantidade (id),
+    beneficiária mais frequente (beneficiaria_nome; empate -> menor nome) e secretarias
+    (secretaria_sigla, em ordem alfabética). O custo depende do número de células do
+    período, não do número de repasses.
+    cube: {'oscs': cube_oscs, 'cells': cube_cells, 'names': cube_names} (ver data_loader.load_repasse_cube).
+    """
+    cells = _slice(cube['cells'], start_year, end_year, area_mask)
+    totals = cells.groupby('osc_id', sort=True, observed=True)[['valor_repasse_centavos', 'id']].sum()
+
+    names = _slice(cube['names'], start_year, end_year, area_mask)
+    names = names.groupby(['osc_id', 'beneficiaria_nome'], sort=False, observed=True)['qtd'].sum().reset_index()
+    top_name = (
+        names.sort_values(['osc_id', 'qtd', 'beneficiaria_nome'], ascending=[True, False, True])
+        .drop_duplicates('osc_id')
+        .set_index('osc_id')['beneficiaria_nome']
+    )
+
+    secretarias = (
+        cells[['osc_id', 'secretaria_sigla']].drop_duplicates()
+        .sort_values(['osc_id', 'secretaria_sigla'])
+        .groupby('osc_id', observed=True)['secretaria_sigla'].agg(', '.join)
+    )
+
+    result = cube['oscs'].loc[totals.index].copy()
+    result['valor_repasse_centavos'] = totals['valor_repasse_centavos']
+    result['id'] = totals['id']
+    result['beneficiaria_nome'] = top_name.reindex(totals.index)
+    result['secretaria_sigla'] = secretarias.reindex(totals.index)
+    return result.reset_index(drop=True)
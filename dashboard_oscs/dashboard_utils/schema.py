@@ -0,0 +1,109 @@
+import fnmatch
+
+import numpy as np
+import pandas as pd
+
+try:
+    _TEXT_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:  # pyarrow vem com o streamlit; sem ele o texto segue como object
+    _TEXT_DTYPE = None
+
+# Papéis de coluna e o tipo compacto de cada um
+FLAG = 'flag'          # indicadores 0/1 (Area_*, SubArea_*) -> uint8
+CATEGORY = 'category'  # texto de baixa cardinalidade (situação, secretaria...) -> category
+ID = 'id'              # códigos e identificadores inteiros -> int32, quando cabem
+VALUE = 'value'        # medidas contínuas (coordenadas) -> float64
+TEXT = 'text'          # texto livre (nomes, endereços) -> string[pyarrow], com nulos preservados
+
+# Cadastro das OSCs (oscs_santos.csv depois de clean_data/enrich_osc_data)
+OSC_SCHEMA = {
+    FLAG: ['Area_*', 'SubArea_*'],
+    CATEGORY: ['situacao_cadastral', 'cd_municipio', 'municipio_nome', 'UF_Sigla', 'Area_Atuacao',
+               'Bairro', 'Bairro_Fonte', 'Natureza_Juridica_Desc', 'Natureza_Label', 'Decada'],
+    ID: ['cd_natureza_juridica_osc', 'cnae', 'Ano_Fundacao'],
+    VALUE: ['latitude', 'longitude'],
+    TEXT: ['tx_razao_social_osc', 'tx_nome_fantasia_osc', 'tx_endereco_completo', 'cnpj_clean'],
+}
+
+# Repasses da Prefeitura (consolidados por ano e cruzados com as OSCs); os valores
+# já chegam em centavos int64 (<coluna>_centavos, ver money.py)
+REPASSE_SCHEMA = {
+    CATEGORY: ['secretaria_sigla', 'match_type', 'natureza_juridica_desc',
+               'beneficiaria_nome', 'beneficiaria_nome_norm', 'match_name'],
+    ID: ['beneficiaria_id', 'id', 'secretaria_id', 'ano', 'ano_recurso'],
+}
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _matching_columns(df, patterns):
+    return [c for c in df.columns if any(fnmatch.fnmatchcase(str(c), p) for p in patterns)]
+
+
+def _as_flag(s):
+    if not pd.api.types.is_integer_dtype(s.dtype) or not s.isin([0, 1]).all():
+        return s
+    return s.astype(np.uint8)
+
+
+def _as_id(s):
+    # Só inteiros sem nulos e dentro do intervalo do int32 (CNPJ, por exemplo, não cabe)
+    if not pd.api.types.is_integer_dtype(s.dtype) or s.empty:
+        return s
+    if s.min() < _INT32.min or s.max() > _INT32.max:
+        return s
+    return s.astype(np.int32)
+
+
+def _as_category(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return s.astype('category')
+
+
+def _as_value(s):
+    return pd.to_numeric(s, errors='coerce').astype(np.float64)
+
+
+def _as_text(s):
+    # astype(str) transformaria os ausentes no texto 'nan'/'None'; o StringDtype os mantém nulos
+    # Também normaliza o 'str' do pandas 3 (leitura do cache colunar), para o tipo não
+    # depender de o conjunto vir do CSV ou do cache
+    if _TEXT_DTYPE is None or s.dtype == _TEXT_DTYPE:
+        return s
+    if not (pd.api.types.is_object_dtype(s.dtype) or isinstance(s.dtype, pd.StringDtype)):
+        return s
+    return s.astype(_TEXT_DTYPE)
+
+
+_CONVERTERS = {
+    FLAG: _as_flag,
+    CATEGORY: _as_category,
+    ID: _as_id,
+    VALUE: _as_value,
+    TEXT: _as_text,
+}
+
+
+def apply_schema(df, schema):
+    """
+    Converte as colunas de df para os tipos compactos de cada papel do schema
+    ({papel: [colunas ou padrões como 'Area_*']}). Colunas ausentes são ignoradas
+    e conversões que mudariam valores (flag fora de 0/1, id fora do int32) são puladas;
+    a coluna fica então disponível para o papel seguinte (Area_Atuacao casa com
+    'Area_*', mas é texto e vira category).
+    Retorna um novo DataFrame; df não é alterado.
+    """
+    if not schema or df is None or df.empty:
+        return df
+    converted = {}
+    for role, patterns in schema.items():
+        convert = _CONVERTERS[role]
+        for col in _matching_columns(df, patterns):
+            if col in converted:
+                continue
+            s = df[col]
+            result = convert(s)
+            if result is not s:
+                converted[col] = result
+    return df.assign(**converted) if converted else df
@@ -1,7 +1,15 @@
 import plotly.express as px
 import plotly.graph_objects as go
+import json
+import hashlib
+import threading
+from collections import OrderedDict
 import folium
 from folium.plugins import MarkerCluster
+from folium.utilities import JsCode
+from branca.element import MacroElement
+from jinja2 import Template
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_folium import st_folium
@@ -50,12 +58,20 @@ def apply_academic_chart_style(fig):
     )
     return fig
 
+def observed_counts(series):
+    """
+    value_counts sem as categorias ausentes: em colunas category (schema), o
+    value_counts lista todas as categorias, inclusive as que não ocorrem (contagem 0).
+    """
+    counts = series.value_counts()
+    return counts[counts > 0]
+
 def plot_bar_chart(df, x_col, y_col=None, title="", color_col=None, orientation='v'):
     """
     Gera gráfico de barras (contagem ou valor).
     """
     if y_col is None:
-        data = df[x_col].value_counts().reset_index()
+        data = observed_counts(df[x_col]).reset_index()
         data.columns = [x_col, 'Quantidade']
         y_col = 'Quantidade'
         fig = px.bar(data, x=x_col, y=y_col, title=title, color=color_col if color_col else x_col, orientation=orientation)
@@ -68,7 +84,7 @@ def plot_pie_chart(df, col, title=""):
     """
     Gera gráfico de pizza.
     """
-    data = df[col].value_counts().reset_index()
+    data = observed_counts(df[col]).reset_index()
     data.columns = [col, 'Quantidade']
     fig = px.pie(data, names=col, values='Quantidade', title=title)
     
@@ -80,7 +96,7 @@ def plot_time_series(df, date_col, title="", cumulative=False):
     """
     Gera gráfico de linha temporal.
     """
-    data = df[date_col].value_counts().sort_index().reset_index()
+    data = observed_counts(df[date_col]).sort_index().reset_index()
     data.columns = ['Ano', 'Quantidade']
     if cumulative:
         data['Quantidade'] = data['Quantidade'].cumsum()
@@ -89,69 +105,206 @@ def plot_time_series(df, date_col, title="", cumulative=False):
     
     return apply_academic_chart_style(fig)
 
-def plot_map(df, lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc'):
+# Cores dos pontos: 3301 = Organização Social (OS) em vermelho, demais OSCs em azul
+OS_COLOR = '#d62728'
+OSC_COLOR = '#3186cc'
+
+# Popup e tooltip montados no navegador a partir das propriedades de cada ponto.
+# %s recebe a lista [[chave, rótulo], ...] dos campos do popup.
+_POINT_POPUP_JS = """
+function(feature, layer) {
+    var p = feature.properties;
+    var esc = function(v) {
+        return String(v).replace(/[&<>"']/g, function(c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    var fields = %s;
+    var html = "<div style='font-family:Times New Roman; color:black; font-size:12px;'>";
+    html += "<b>" + esc(p._titulo) + "</b><br><br>";
+    fields.forEach(function(f) {
+        var v = p[f[0]];
+        html += "<b>" + esc(f[1]) + ":</b> " + (v === null || v === undefined ? "" : esc(v)) + "<br>";
+    });
+    html += "</div>";
+    layer.bindPopup(html, {maxWidth: 300});
+    layer.bindTooltip("<div>" + esc(p._hover) + "</div>", {sticky: true});
+}
+"""
+
+def _popup_values(series):
+    """Valores como texto para o popup (datas em dd/mm/aaaa); ausentes viram None."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime('%d/%m/%Y')
+    else:
+        text = series.astype(str)
+    return text.astype(object).where(series.notna(), None)
+
+def points_geojson(df, lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc', year_col=None):
     """
-    Gera mapa Folium com pontos individuais (sem clusterização).
-    tooltip_cols pode ser uma lista de colunas ou um dict {coluna: label}.
-    Updated to support custom hover name.
+    FeatureCollection com um ponto por linha de df (coordenadas já válidas).
+    As colunas são convertidas em bloco; cada feature leva o estilo (cor/raio),
+    o título, o texto do hover e os campos do popup em chaves curtas (c0, c1, ...).
+    Com year_col (sem ausentes), o ano inteiro vai em _ano para filtro no navegador.
+    Retorna (geojson, campos), com campos = [[chave, rótulo], ...].
     """
+    props = pd.DataFrame(index=df.index)
+
+    is_os = (df['cd_natureza_juridica_osc'] == 3301).to_numpy() if 'cd_natureza_juridica_osc' in df.columns else np.zeros(len(df), dtype=bool)
+    colors = np.where(is_os, OS_COLOR, OSC_COLOR)
+    radii = np.where(is_os, 6, 5)
+
+    if 'tx_nome_fantasia_osc' in df.columns:
+        props['_titulo'] = _popup_values(df['tx_nome_fantasia_osc']).fillna('OSC')
+    else:
+        props['_titulo'] = 'OSC'
+    if hover_name_col in df.columns:
+        props['_hover'] = _popup_values(df[hover_name_col]).fillna('Sem Nome')
+    else:
+        props['_hover'] = 'Sem Nome'
+    if year_col is not None:
+        props['_ano'] = df[year_col].astype(int)
+
+    fields = []
+    if tooltip_cols:
+        iterable = tooltip_cols.items() if isinstance(tooltip_cols, dict) else [(c, c) for c in tooltip_cols]
+        for col, label in iterable:
+            if col in df.columns:
+                key = f"c{len(fields)}"
+                props[key] = _popup_values(df[col])
+                fields.append([key, str(label)])
+
+    coords = df[[lon_col, lat_col]].to_numpy(dtype=float).tolist()
+    records = props.to_dict('records')
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': xy},
+            'properties': {**rec, 'style': {'color': color, 'fillColor': color, 'radius': int(radius)}},
+        }
+        for xy, rec, color, radius in zip(coords, records, colors, radii)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}, fields
+
+def _point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col, year_col=None):
+    """Centro, GeoJSON e campos do popup dos pontos de df; None sem coordenadas válidas."""
     # Filtrar dados com coordenadas válidas
     df_map = df.dropna(subset=[lat_col, lon_col])
     
     if df_map.empty:
         return None
 
-    center_lat = df_map[lat_col].mean()
-    center_lon = df_map[lon_col].mean()
-    
+    center = [df_map[lat_col].mean(), df_map[lon_col].mean()]
+    data, fields = points_geojson(df_map, lat_col, lon_col, tooltip_cols, hover_name_col, year_col)
+    return center, data, fields
+
+def _map_from_layer(layer):
+    """Mapa com a camada de pontos; retorna (mapa, camada folium.GeoJson)."""
+    center, data, fields = layer
     # Use a cleaner tile if possible, or default
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=13, tiles="CartoDB positron") 
-    color = '#3186cc' 
-
-    for idx, row in df_map.iterrows():
-        # Determine color
-        # 3301 = Organização Social (OS) -> Red
-        is_os = row.get('cd_natureza_juridica_osc') == 3301
-        marker_color = '#d62728' if is_os else '#3186cc'
-
-        # Construir conteúdo do Popup
-        popup_html = "<div style='font-family:Times New Roman; color:black; font-size:12px;'>"
-        popup_html += f"<b>{row.get('tx_nome_fantasia_osc', 'OSC')}</b><br><br>"
-        
-        if tooltip_cols:
-            iterable = tooltip_cols.items() if isinstance(tooltip_cols, dict) else [(c, c) for c in tooltip_cols]
-            
-            for col, label in iterable:
-                if col in df.columns:
-                    val = row[col]
-                    # Formatar se for data (e.g. timestamp)
-                    if isinstance(val, pd.Timestamp):
-                        val = val.strftime('%d/%m/%Y')
-                    
-                    popup_html += f"<b>{label}:</b> {val}<br>"
-        
-        popup_html += "</div>"
-        
-        hover_text = str(row.get(hover_name_col, 'Sem Nome'))
-        
-        folium.CircleMarker(
-            location=[row[lat_col], row[lon_col]],
-            radius=6 if is_os else 5, # Slightly larger for importance? Or same. Let's make it consistent.
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=hover_text,
-            color=marker_color,
-            fill=True,
-            fill_color=marker_color,
-            fill_opacity=0.7
-        ).add_to(m)
-        
+    m = folium.Map(location=center, zoom_start=13, tiles="CartoDB positron") 
+
+    geojson = folium.GeoJson(
+        data,
+        name="OSCs",
+        marker=folium.CircleMarker(radius=5, fill=True, fill_opacity=0.7),
+        on_each_feature=JsCode(_POINT_POPUP_JS % json.dumps(fields, ensure_ascii=False)),
+    ).add_to(m)
+    return m, geojson
+
+def plot_map(df, lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc'):
+    """
+    Gera mapa Folium com pontos individuais (sem clusterização).
+    tooltip_cols pode ser uma lista de colunas ou um dict {coluna: label}.
+    Updated to support custom hover name.
+    Todos os pontos vão numa única camada GeoJSON; popups e tooltips são montados
+    no navegador a partir das propriedades, em vez de um marcador/HTML por linha.
+    """
+    layer = _point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col)
+    if layer is None:
+        return None
+    m, _ = _map_from_layer(layer)
     return m
 
+# Cache das camadas de pontos já montadas (LRU, compartilhado entre as sessões do
+# processo). O tamanho de cada entrada é estimado pelo GeoJSON serializado.
+MAP_CACHE_MAX_ENTRIES = 32
+MAP_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+_map_cache = OrderedDict()  # chave -> (camada, bytes)
+_map_cache_state = {'bytes': 0, 'hits': 0, 'misses': 0}
+_map_cache_lock = threading.Lock()
+
+def map_cache_key(df, lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc', year_col=None):
+    """
+    Chave da camada: hash dos IDs das linhas e dos valores das colunas que vão para o
+    mapa (coordenadas, cor, título, hover e popup) mais a configuração do popup.
+    Mesmo filtro sobre os mesmos dados -> mesma chave, sem montar o GeoJSON.
+    """
+    if tooltip_cols is None:
+        tooltip = []
+    elif isinstance(tooltip_cols, dict):
+        tooltip = [[str(c), str(label)] for c, label in tooltip_cols.items()]
+    else:
+        tooltip = [[str(c), str(c)] for c in tooltip_cols]
+
+    cols = [lat_col, lon_col, hover_name_col, year_col, 'cd_natureza_juridica_osc', 'tx_nome_fantasia_osc'] + [c for c, _ in tooltip]
+    cols = [c for c in dict.fromkeys(cols) if c in df.columns]
+
+    h = hashlib.sha256()
+    h.update(json.dumps([lat_col, lon_col, hover_name_col, year_col, tooltip, cols], ensure_ascii=False).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df[cols], index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _cached_point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col, year_col=None):
+    key = map_cache_key(df, lat_col, lon_col, tooltip_cols, hover_name_col, year_col)
+    with _map_cache_lock:
+        entry = _map_cache.get(key)
+        if entry is not None:
+            _map_cache.move_to_end(key)
+            _map_cache_state['hits'] += 1
+            return entry[0]
+        _map_cache_state['misses'] += 1
+
+    layer = _point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col, year_col)
+    if layer is None:
+        return None
+    size = len(json.dumps(layer[1], ensure_ascii=False).encode('utf-8'))
+
+    with _map_cache_lock:
+        if key not in _map_cache:
+            _map_cache[key] = (layer, size)
+            _map_cache_state['bytes'] += size
+        # Remove as menos usadas, mantendo sempre a camada recém-montada
+        while len(_map_cache) > 1 and (len(_map_cache) > MAP_CACHE_MAX_ENTRIES or _map_cache_state['bytes'] > MAP_CACHE_MAX_BYTES):
+            _, (_, evicted_size) = _map_cache.popitem(last=False)
+            _map_cache_state['bytes'] -= evicted_size
+    return layer
+
+def cached_plot_map(df, lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc'):
+    """
+    Como plot_map, mas reaproveita o GeoJSON já montado para o mesmo conjunto de pontos
+    e popup (ex.: voltar a um período já visto); só o objeto folium.Map, barato, é
+    recriado a cada execução, já que o st_folium altera o mapa que recebe.
+    As camadas mais antigas saem quando o cache passa de MAP_CACHE_MAX_ENTRIES entradas
+    ou MAP_CACHE_MAX_BYTES bytes.
+    """
+    layer = _cached_point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col)
+    if layer is None:
+        return None
+    m, _ = _map_from_layer(layer)
+    return m
+
+def map_cache_info():
+    """Entradas, bytes estimados e acertos/faltas do cache de camadas dos mapas."""
+    with _map_cache_lock:
+        return {'entries': len(_map_cache), **_map_cache_state}
+
 def plot_heatmap(df, x_col, y_col, title=""):
     """
     Heatmap de contagem.
     """
-    data = df.groupby([x_col, y_col]).size().reset_index(name='Contagem')
+    data = df.groupby([x_col, y_col], observed=True).size().reset_index(name='Contagem')
     fig = px.density_heatmap(data, x=x_col, y=y_col, z='Contagem', title=title, text_auto=True)
     return apply_academic_chart_style(fig)
 
@@ -161,32 +314,105 @@ def plot_metric_card(label, value, prefix="", suffix="", delta=None):
     """
     st.metric(label=label, value=f"{prefix}{value}{suffix}", delta=delta)
 
-def plot_map_evolution(df_history):
+class YearRangeFilter(MacroElement):
     """
-    Animação de evolução temporal no mapa.
+    Controle Leaflet com a faixa de anos (início/fim) e um botão de animação que
+    mostra apenas os pontos de layer cuja propriedade _ano está na faixa.
+    O filtro roda inteiro no navegador, sem reexecutar a página.
     """
-    if df_history.empty:
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var layer = {{ this.layer.get_name() }};
+            var markers = [];
+            layer.eachLayer(function(l) { markers.push(l); });
+
+            var control = L.control({position: 'topright'});
+            control.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.cssText = 'background:white; padding:6px 10px; font-family:Times New Roman; font-size:13px; color:black;';
+                div.innerHTML =
+                    "<b>Período de fundação</b><br>" +
+                    "Início <input type='range' class='ano-ini' min='{{ this.min_year }}' max='{{ this.max_year }}' value='{{ this.min_year }}' step='1' style='width:160px'><br>" +
+                    "Fim&nbsp;&nbsp;&nbsp; <input type='range' class='ano-fim' min='{{ this.min_year }}' max='{{ this.max_year }}' value='{{ this.max_year }}' step='1' style='width:160px'><br>" +
+                    "<button class='ano-play' type='button'>&#9654;</button> <span class='ano-label'></span>";
+                L.DomEvent.disableClickPropagation(div);
+                L.DomEvent.disableScrollPropagation(div);
+                return div;
+            };
+            control.addTo(map);
+
+            var div = control.getContainer();
+            var ini = div.querySelector('.ano-ini');
+            var fim = div.querySelector('.ano-fim');
+            var label = div.querySelector('.ano-label');
+            var play = div.querySelector('.ano-play');
+            var timer = null;
+
+            function update() {
+                var a = +ini.value, b = +fim.value;
+                if (a > b) { if (this === ini) { fim.value = a; b = a; } else { ini.value = b; a = b; } }
+                var n = 0;
+                markers.forEach(function(l) {
+                    var y = l.feature.properties._ano;
+                    if (y >= a && y <= b) {
+                        n++;
+                        if (!layer.hasLayer(l)) { layer.addLayer(l); }
+                    } else if (layer.hasLayer(l)) {
+                        layer.removeLayer(l);
+                    }
+                });
+                label.innerHTML = a + " a " + b + ": <b>" + n + "</b> OSCs";
+            }
+
+            function stop() {
+                clearInterval(timer);
+                timer = null;
+                play.innerHTML = '&#9654;';
+            }
+
+            ini.addEventListener('input', update);
+            fim.addEventListener('input', update);
+            play.addEventListener('click', function() {
+                if (timer) { stop(); return; }
+                fim.value = ini.value;
+                update();
+                play.innerHTML = '&#10073;&#10073;';
+                timer = setInterval(function() {
+                    if (+fim.value >= +fim.max) { stop(); return; }
+                    fim.value = +fim.value + 1;
+                    update();
+                }, {{ this.interval }});
+            });
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer, min_year, max_year, interval=150):
+        super().__init__()
+        self._name = 'YearRangeFilter'
+        self.layer = layer
+        self.min_year = int(min_year)
+        self.max_year = int(max_year)
+        self.interval = int(interval)
+
+def plot_map_evolution(df, year_col='Ano_Fundacao', lat_col='latitude', lon_col='longitude', tooltip_cols=None, hover_name_col='tx_razao_social_osc'):
+    """
+    Mapa da evolução temporal: todos os pontos (com ano em year_col) vão uma única vez
+    para o navegador, e a faixa de anos é filtrada no próprio mapa (YearRangeFilter),
+    sem idas ao servidor a cada movimento da linha do tempo.
+    """
+    df = df.dropna(subset=[year_col])
+    layer = _cached_point_layer(df, lat_col, lon_col, tooltip_cols, hover_name_col, year_col)
+    if layer is None:
         return None
-        
-    df_history = df_history.sort_values('Ano_Fundacao')
-    
-    fig = px.scatter_mapbox(
-        df_history,
-        lat="latitude",
-        lon="longitude",
-        hover_name="tx_razao_social_osc",
-        hover_data=["natureza_juridica_desc", "bairro"],
-        color="cd_natureza_juridica_osc", 
-        animation_frame="Ano_Fundacao",
-        zoom=12,
-        height=600,
-        title="Evolução da Criação de OSCs em Santos"
-    )
-    
-    fig.update_layout(mapbox_style="carto-positron")
-    fig.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
-    
-    return apply_academic_chart_style(fig)
+
+    m, geojson = _map_from_layer(layer)
+    years = df[year_col].astype(int)
+    YearRangeFilter(geojson, years.min(), years.max()).add_to(m)
+    return m
 
 def plot_line_chart(df, x_col, y_col, title=""):
     """
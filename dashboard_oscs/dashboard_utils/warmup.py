@@ -0,0 +1,128 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from dashboard_utils.data_loader import (
+    load_data,
+    load_funding_data,
+    load_funding_summaries,
+    load_match_data,
+    load_matching_data,
+    load_resources_data,
+    load_analysis_data,
+)
+
+# Carregadores aquecidos no boot, na ordem de prioridade (load_data alimenta a maioria das páginas)
+WARMUP_LOADERS = {
+    'oscs': load_data,
+    'repasses_prefeitura': load_funding_data,
+    'repasses_prefeitura_resumos': load_funding_summaries,
+    'repasses_match': load_match_data,
+    'correspondencia': load_matching_data,
+    'repasses_federais': load_resources_data,
+    'vinculos': load_analysis_data,
+}
+
+# Leituras em paralelo (I/O e parsing de CSV liberam o GIL em boa parte do tempo)
+WARMUP_WORKERS = 4
+# Intervalo entre verificações enquanto uma página aguarda seus dados
+WARMUP_POLL_SECONDS = 0.5
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+ERROR = 'error'
+
+# Estado do processo (compartilhado por todas as sessões): o cache do st.cache_data
+# também é do processo, então o aquecimento só precisa rodar uma vez
+_lock = threading.Lock()
+_status = {}
+_thread = None
+
+
+def _set_status(name, status):
+    with _lock:
+        _status[name] = status
+
+
+def _warm(name, loader):
+    _set_status(name, LOADING)
+    try:
+        loader()
+    except Exception:
+        # A página chama o carregador de novo e mostra o erro no seu próprio fluxo
+        _set_status(name, ERROR)
+    else:
+        _set_status(name, READY)
+
+
+def _run_warmup():
+    with ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix='warmup') as pool:
+        for name, loader in WARMUP_LOADERS.items():
+            pool.submit(_warm, name, loader)
+
+
+def start_warmup():
+    """
+    Dispara, uma única vez por processo, uma thread que popula em paralelo os caches
+    dos carregadores de WARMUP_LOADERS. Retorna imediatamente.
+    """
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _status.update({name: PENDING for name in WARMUP_LOADERS})
+        _thread = threading.Thread(target=_run_warmup, name='dashboard-warmup', daemon=True)
+        _thread.start()
+
+
+def warmup_status():
+    """Cópia do estado de cada conjunto de dados ({nome: pending|loading|ready|error})."""
+    with _lock:
+        return dict(_status)
+
+
+def warmup_done():
+    """True quando nenhum conjunto está aguardando (ou o aquecimento não foi iniciado)."""
+    return all(status in (READY, ERROR) for status in warmup_status().values())
+
+
+def await_datasets(*names):
+    """
+    Chamado no topo de uma página antes de ler os dados: se algum dos conjuntos
+    ainda está sendo aquecido, mostra um aviso no lugar do conteúdo e reexecuta a
+    página em seguida, em vez de bloquear a sessão na leitura. Sem aquecimento em
+    curso (ou já concluído para esses conjuntos), não faz nada.
+    """
+    status = warmup_status()
+    waiting = [name for name in names if status.get(name) in (PENDING, LOADING)]
+    if not waiting:
+        return
+    ready = sum(s in (READY, ERROR) for s in status.values())
+    st.info("Preparando os dados desta página...")
+    st.progress(ready / len(status), text=f"{ready} de {len(status)} conjuntos de dados prontos")
+    time.sleep(WARMUP_POLL_SECONDS)
+    st.rerun()
+
+
+def render_warmup_indicator():
+    """
+    Indicador de prontidão na barra lateral, atualizado sozinho enquanto o
+    aquecimento roda; some quando todos os conjuntos estão prontos.
+    """
+    if warmup_done():
+        return
+
+    @st.fragment(run_every=1)
+    def _indicator():
+        status = warmup_status()
+        ready = sum(s in (READY, ERROR) for s in status.values())
+        if ready == len(status):
+            # Reexecuta o app inteiro para remover o fragmento
+            st.rerun()
+        st.progress(ready / len(status), text=f"Carregando dados: {ready} de {len(status)}")
+
+    with st.sidebar:
+        _indicator()
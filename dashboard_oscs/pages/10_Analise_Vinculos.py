@@ -19,32 +19,12 @@ def clean_percentage(x):
         return float(x.replace('%', '').replace(',', '.'))
     return x
 
-import os
-from dashboard_utils.data_loader import load_csv_robust
+from dashboard_utils.data_loader import load_analysis_data
+from dashboard_utils.warmup import await_datasets
 
 # ...
 
-@st.cache_data
-def load_analysis_data():
-    # Resolve path relative to this script:
-    # dashboard_oscs/pages/10... -> up to dashboard_oscs -> up to root -> dados atualizados...
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    base_path = os.path.join(current_dir, '..', '..', 'dados atualizados', 'dados_filtrados')
-    
-    def get_path(filename):
-        return os.path.join(base_path, filename)
-
-    try:
-        # Using load_csv_robust for safer loading (encodings/separators)
-        df_71 = load_csv_robust(get_path("tabela_7_1_pessoal_ocupado.csv"))
-        df_72 = load_csv_robust(get_path("tabela_7_2_pessoal_por_area.csv"))
-        df_73 = load_csv_robust(get_path("tabela_7_3_faixas_vinculos.csv"))
-        df_82 = load_csv_robust(get_path("tabela_8_2_finalidade_x_faixas.csv"))
-        return df_71, df_72, df_73, df_82
-    except Exception as e:
-        st.error(f"Erro ao carregar arquivos: {e}")
-        return None, None, None, None
-
+await_datasets('vinculos')
 df_71, df_72, df_73, df_82 = load_analysis_data()
 
 if df_71 is not None:
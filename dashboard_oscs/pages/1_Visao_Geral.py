@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from dashboard_utils.data_loader import load_data
+from dashboard_utils.data_loader import load_data, load_foundation_data
+from dashboard_utils.warmup import await_datasets
 from dashboard_utils.visualizations import plot_pie_chart, plot_bar_chart
 
 
@@ -10,6 +11,7 @@ apply_academic_style()
 st.title("Visão Geral")
 
 # Load Data
+await_datasets('oscs')
 df = load_data()
 
 if df.empty:
@@ -31,18 +33,7 @@ else:
 
     with c1:
         st.subheader("Natureza Jurídica")
-        if 'cd_natureza_juridica_osc' in df.columns:
-            # Fallback mapping for common CSOs
-            nat_jur_mapping = {
-                3999: "Associação Privada",
-                3069: "Fundação Privada",
-                3220: "Organização Religiosa",
-                3301: "Organização Social (OS)",
-                2062: "Sociedade Empresária Limitada",
-                2143: "Cooperativa",
-                2135: "Empresário Individual",
-            }
-            df['Natureza_Juridica_Desc'] = df['cd_natureza_juridica_osc'].map(nat_jur_mapping).fillna(df['cd_natureza_juridica_osc'])
+        if 'Natureza_Juridica_Desc' in df.columns:
             fig_pie = plot_pie_chart(df, 'Natureza_Juridica_Desc', title="Distribuição por Natureza Jurídica")
             st.plotly_chart(fig_pie, use_container_width=True)
         else:
@@ -51,9 +42,9 @@ else:
     with c2:
         st.subheader("Ano de Fundação")
         if 'Ano_Fundacao' in df.columns:
-            # Filtrar anos válidos
-            df_year = df.dropna(subset=['Ano_Fundacao'])
-            counts = df_year['Ano_Fundacao'].astype(int).value_counts().sort_index()
+            # Anos válidos (view compartilhada, já com o ano inteiro)
+            df_year = load_foundation_data()
+            counts = df_year['Ano_Fundacao'].value_counts().sort_index()
             # Plotar linha ou barra? Barra é melhor para distribuição discreta.
             # Vou plotar os ultimos 50 anos ou tudo?
             fig_bar = plot_bar_chart(df_year, 'Ano_Fundacao', title="Distribuição por Ano de Fundação", orientation='v')
@@ -1,7 +1,8 @@
 import streamlit as st
 from streamlit_folium import st_folium
 from dashboard_utils.data_loader import load_data
-from dashboard_utils.visualizations import plot_map
+from dashboard_utils.warmup import await_datasets
+from dashboard_utils.visualizations import cached_plot_map
 
 
 from dashboard_utils.styles import apply_academic_style
@@ -9,6 +10,7 @@ apply_academic_style()
 
 st.title("Mapa 1 - Distribuição geográfica das OSs e OSCIPs em Santos")
 
+await_datasets('oscs')
 df = load_data()
 
 if not df.empty:
@@ -44,7 +46,7 @@ if not df.empty:
             'cnpj': 'CNPJ' # Se disponível
         }
         
-        m = plot_map(df_filtered, tooltip_cols=cols_to_show)
+        m = cached_plot_map(df_filtered, tooltip_cols=cols_to_show)
         if m:
             st_folium(m, width="100%", height=600)
         else:
@@ -1,5 +1,6 @@
 import streamlit as st
 from dashboard_utils.data_loader import load_data
+from dashboard_utils.warmup import await_datasets
 from dashboard_utils.visualizations import plot_bar_chart, plot_pie_chart
 
 
@@ -8,6 +9,7 @@ apply_academic_style()
 
 st.title("Situação Cadastral")
 
+await_datasets('oscs')
 df = load_data()
 
 if not df.empty and 'situacao_cadastral' in df.columns:
@@ -26,13 +28,12 @@ if not df.empty and 'situacao_cadastral' in df.columns:
     st.divider()
     
     # Cross analysis: Situação x Ano (Década?)
-    if 'Ano_Fundacao' in df.columns:
+    if 'Decada' in df.columns:
         st.subheader("Situação Cadastral por Década de Fundação")
-        df['Decada'] = (df['Ano_Fundacao'] // 10 * 10).astype('Int64').astype(str) + "s"
         
         import plotly.express as px
         # Group
-        data_grouped = df.groupby(['Decada', 'situacao_cadastral']).size().reset_index(name='Quantidade')
+        data_grouped = df.groupby(['Decada', 'situacao_cadastral'], observed=True).size().reset_index(name='Quantidade')
         fig_cross = px.bar(data_grouped, x='Decada', y='Quantidade', color='situacao_cadastral', title="Situação por Década de Fundação", barmode='group')
         st.plotly_chart(fig_cross, use_container_width=True)
 
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from dashboard_utils.data_loader import load_data
+from dashboard_utils.data_loader import load_foundation_data
+from dashboard_utils.warmup import await_datasets
 
 
 from dashboard_utils.styles import apply_academic_style
@@ -19,13 +20,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-df = load_data()
+await_datasets('oscs')
+# Valid years only, Ano_Fundacao already int (shared view, read-only)
+df = load_foundation_data()
 
-if not df.empty and 'Ano_Fundacao' in df.columns:
-    
-    # Filter valid years
-    df = df.dropna(subset=['Ano_Fundacao'])
-    df['Ano_Fundacao'] = df['Ano_Fundacao'].astype(int)
+if not df.empty:
     
     # Range Slider
     min_year = int(df['Ano_Fundacao'].min())
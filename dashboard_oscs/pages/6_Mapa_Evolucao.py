@@ -1,7 +1,8 @@
 import streamlit as st
 from streamlit_folium import st_folium
-from dashboard_utils.data_loader import load_data
-from dashboard_utils.visualizations import plot_map
+from dashboard_utils.data_loader import load_foundation_data
+from dashboard_utils.warmup import await_datasets
+from dashboard_utils.visualizations import plot_map_evolution
 
 
 from dashboard_utils.styles import apply_academic_style
@@ -10,40 +11,24 @@ apply_academic_style()
 st.title("Mapa 2 - Evolução Quantitativa das OSC")
 
 st.markdown("""
-Mova a linha do tempo abaixo para visualizar a evolução quantitativa e o surgimento das OSCs em Santos ao longo dos anos.
+Mova a linha do tempo no canto do mapa (ou use ▶ para animar) para visualizar a evolução quantitativa e o surgimento das OSCs em Santos ao longo dos anos.
 """)
 
-df = load_data()
+await_datasets('oscs')
+df = load_foundation_data()
 
-if not df.empty and 'Ano_Fundacao' in df.columns:
-    # Preparar dados
-    df = df.dropna(subset=['Ano_Fundacao', 'latitude', 'longitude'])
-    df['Ano_Fundacao'] = df['Ano_Fundacao'].astype(int)
+if not df.empty:
+    # Preparar dados (a view já exclui OSCs sem ano de fundação)
+    df = df.dropna(subset=['latitude', 'longitude'])
     
     min_year = int(df['Ano_Fundacao'].min())
     max_year = int(df['Ano_Fundacao'].max())
     
-    # Timeline Slider (Faixa de Tempo)
-    # Permite selecionar (Inicio, Fim)
-    range_anos = st.slider(
-        "Selecione o Período",
-        min_value=min_year,
-        max_value=max_year,
-        value=(min_year, max_year),
-        step=1
-    )
-    
-    start_year, end_year = range_anos
-    
-    # Filtrar dados pelo range selecionado
-    df_filtered = df[(df['Ano_Fundacao'] >= start_year) & (df['Ano_Fundacao'] <= end_year)]
-    
     col1, col2 = st.columns(2)
-    oscs_no_periodo = len(df_filtered)
-    
-    col1.metric(f"OSCs criadas entre {start_year} e {end_year}", oscs_no_periodo)
+    col1.metric("OSCs com ano de fundação e localização", len(df))
+    col2.metric("Período disponível", f"{min_year} - {max_year}")
     
-    if not df_filtered.empty:
+    if not df.empty:
         # Labels amigáveis
         cols_to_show = {
             'tx_razao_social_osc': 'Razão Social',
@@ -53,9 +38,11 @@ if not df.empty and 'Ano_Fundacao' in df.columns:
             'tx_endereco_completo': 'Endereço'
         }
         
-        m = plot_map(df_filtered, tooltip_cols=cols_to_show)
+        # Todos os pontos vão uma vez; a faixa de anos é filtrada no navegador
+        m = plot_map_evolution(df, tooltip_cols=cols_to_show)
         
-        st_folium(m, width="100%", height=600)
+        # Sem objetos de retorno, mover/zoom no mapa não reexecuta a página
+        st_folium(m, width="100%", height=600, returned_objects=[])
     else:
         st.info("Nenhuma OSC encontrada até o ano selecionado.")
 
@@ -1,122 +1,20 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import os
 import matplotlib.pyplot as plt # Just in case, though we prefer Plotly for the dashboard
 
 # Set page config
 
 from dashboard_utils.styles import apply_academic_style
 from dashboard_utils.visualizations import apply_academic_chart_style
+from dashboard_utils.data_loader import load_resources_data
+from dashboard_utils.warmup import await_datasets
+from dashboard_utils.money import sum_by, reais_view, format_reais
 apply_academic_style()
 
 st.title("Transferências de Recursos Públicos Federais")
 
-# --- Helper Functions ---
-@st.cache_data
-def load_resources_data():
-    """Load and merge resources data."""
-    # Base paths
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(current_dir, '..', '..', 'dados atualizados', 'dados_filtrados')
-    main_data_path = os.path.join(current_dir, '..', 'data', 'oscs_santos.csv')
-    
-    # 1. Load Main Data (OSCs Santos) to get names/valid IDs
-    try:
-        try:
-             df_main = pd.read_csv(main_data_path, sep=';', dtype=str, encoding='utf-8')
-        except UnicodeDecodeError:
-             df_main = pd.read_csv(main_data_path, sep=';', dtype=str, encoding='latin1')
-             
-        df_main.columns = df_main.columns.str.strip() # Strip whitespace from headers
-        # Clean CNPJ for joining
-        df_main['cnpj_clean'] = df_main['cnpj'].str.replace(r'\D', '', regex=True)
-    except Exception as e:
-        st.error(f"Erro ao carregar oscs_santos.csv: {e}")
-        return None, None, None
-
-    # 2. Load 4786-recursososc.csv (IPEA Transferências)
-    try:
-        recursos_path = os.path.join(data_dir, '4786-recursososc.csv')
-        df_recursos_ipea = pd.read_csv(recursos_path, sep=';', dtype=str)
-        df_recursos_ipea.columns = df_recursos_ipea.columns.str.strip()
-        
-        # Convert numeric columns
-        df_recursos_ipea['nr_valor_recursos_osc'] = pd.to_numeric(df_recursos_ipea['nr_valor_recursos_osc'], errors='coerce').fillna(0)
-        df_recursos_ipea['dt_ano_recursos_osc'] = pd.to_datetime(df_recursos_ipea['dt_ano_recursos_osc'], errors='coerce').dt.year
-        
-        # Join with Main Data on id_osc (or similar)
-        # The file 4786 has 'id_osc' and 'cd_identificador_osc'. 
-        # Typically 'cd_identificador_osc' is the CNPJ. Let's try joining on CNPJ first.
-        # Clean column
-        df_recursos_ipea['cnpj_join'] = df_recursos_ipea['cd_identificador_osc'].str.replace(r'\D', '', regex=True)
-        
-        # Merge to get Name and other info
-        df_recursos_ipea = df_recursos_ipea.merge(
-            df_main[['cnpj_clean', 'tx_razao_social_osc', 'situacao_cadastral']], 
-            left_on='cnpj_join', 
-            right_on='cnpj_clean', 
-            how='inner', # Only keep matches in our filtered Santos set
-            suffixes=('_old', '') # Keep the name from df_main (clean) as the primary one (no suffix)
-        )
-        # Drop the old name column if it exists
-        if 'tx_razao_social_osc_old' in df_recursos_ipea.columns:
-            df_recursos_ipea.drop(columns=['tx_razao_social_osc_old'], inplace=True)
-    except Exception as e:
-        st.warning(f"Erro ao carregar 4786-recursososc.csv: {e}")
-        df_recursos_ipea = pd.DataFrame()
-
-    # 3. Load tb_recursos.csv (Ministério da Justiça)
-    try:
-        tb_recursos_path = os.path.join(data_dir, 'tb_recursos.csv')
-        df_tb_recursos = pd.read_csv(tb_recursos_path, sep=';', dtype=str)
-        
-        # Clean CNPJ
-        df_tb_recursos['cnpj_clean'] = df_tb_recursos['cnpj'].str.replace(r'\D', '', regex=True)
-        
-        # Clean percentages (replace % and comma)
-        pct_cols = [c for c in df_tb_recursos.columns if '%' in str(df_tb_recursos[c].iloc[0]) or 'propria' in c or 'privada' in c or 'publica' in c]
-        for col in pct_cols:
-             if col in df_tb_recursos.columns:
-                df_tb_recursos[col] = df_tb_recursos[col].str.replace('%', '').str.replace(',', '.').replace('', '0')
-                df_tb_recursos[col] = pd.to_numeric(df_tb_recursos[col], errors='coerce').fillna(0)
-
-        # Merge
-        df_tb_recursos = df_tb_recursos.merge(
-            df_main[['cnpj_clean', 'tx_razao_social_osc']], 
-            on='cnpj_clean', 
-            how='inner'
-        )
-    except Exception as e:
-        st.warning(f"Erro ao carregar tb_recursos.csv: {e}")
-        df_tb_recursos = pd.DataFrame()
-
-    # 4. Load contas.csv (Prefeitura de Santos)
-    try:
-        contas_path = os.path.join(data_dir, 'contas.csv')
-        df_contas = pd.read_csv(contas_path, sep=',', quotechar='"', dtype=str)
-        
-        # Clean numeric values
-        if 'Valor do Repasse' in df_contas.columns:
-            df_contas['Valor_Clean'] = df_contas['Valor do Repasse'].str.replace('R$', '', regex=False).str.replace('.', '', regex=False).str.replace(',', '.', regex=False).str.strip()
-            df_contas['Valor_Clean'] = pd.to_numeric(df_contas['Valor_Clean'], errors='coerce').fillna(0)
-            
-        # Strip strings
-        if 'Entidade' in df_contas.columns:
-            df_contas['Entidade'] = df_contas['Entidade'].str.strip()
-            
-    except Exception as e:
-        # Debug info: list files in the directory
-        try:
-            files_in_dir = os.listdir(data_dir)
-            st.warning(f"Erro ao carregar contas.csv: {e}. Arquivos em {data_dir}: {files_in_dir}")
-        except:
-             st.warning(f"Erro ao carregar contas.csv: {e}")
-        df_contas = pd.DataFrame()
-
-    return df_recursos_ipea, df_tb_recursos, df_contas
-
 # --- Main Logic ---
+await_datasets('repasses_federais')
 df_ipea, df_mj, df_contas = load_resources_data()
 
 tab1, tab2 = st.tabs(["Transferências Federais (IPEA)", "Fontes de Recursos (MJ)"])
@@ -128,14 +26,14 @@ with tab1:
     
     if df_ipea is not None and not df_ipea.empty:
         # Metrics
-        total_recursos = df_ipea['nr_valor_recursos_osc'].sum()
-        st.metric("Total de Recursos Mapeados (R$)", f"{total_recursos:,.2f}")
+        total_recursos = df_ipea['nr_valor_recursos_osc_centavos'].sum()
+        st.metric("Total de Recursos Mapeados (R$)", format_reais(total_recursos, prefix=""))
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Evolução Temporal")
-            df_year = df_ipea.groupby('dt_ano_recursos_osc')['nr_valor_recursos_osc'].sum().reset_index()
+            df_year = sum_by(df_ipea, 'dt_ano_recursos_osc', 'nr_valor_recursos_osc')
             fig_bar = px.bar(df_year, x='dt_ano_recursos_osc', y='nr_valor_recursos_osc', 
                              title="Volume de Recursos por Ano", labels={'dt_ano_recursos_osc':'Ano', 'nr_valor_recursos_osc':'Valor (R$)'})
             fig_bar.update_layout(xaxis_type='category')
@@ -151,10 +49,10 @@ with tab1:
             st.plotly_chart(fig_pie, use_container_width=True)
 
         st.subheader("Detalhamento por OSC")
-        display_cols = ['dt_ano_recursos_osc', 'tx_razao_social_osc', 'nr_valor_recursos_osc', 'tx_nome_fonte_recursos_osc']
+        display_cols = ['dt_ano_recursos_osc', 'tx_razao_social_osc', 'nr_valor_recursos_osc_centavos', 'tx_nome_fonte_recursos_osc']
         # Filter for columns that actually exist to avoid KeyError
         valid_cols = [c for c in display_cols if c in df_ipea.columns]
-        st.dataframe(df_ipea[valid_cols].sort_values(by='dt_ano_recursos_osc', ascending=False) if 'dt_ano_recursos_osc' in valid_cols else df_ipea[valid_cols], use_container_width=True)
+        st.dataframe(reais_view(df_ipea[valid_cols].sort_values(by='dt_ano_recursos_osc', ascending=False) if 'dt_ano_recursos_osc' in valid_cols else df_ipea[valid_cols]), use_container_width=True)
     else:
         st.info("Não foram encontrados dados de transferências federais vinculados às OSCs de Santos nesta base.")
 
@@ -11,9 +11,19 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
-from dashboard_utils.data_loader import load_funding_data
+from dashboard_utils.data_loader import load_funding_data, load_funding_summaries
+from dashboard_utils.warmup import await_datasets
 from dashboard_utils.styles import apply_academic_style
-from dashboard_utils.components import render_transfer_table_11_1
+from dashboard_utils.components import render_transfer_table_11_1, render_paginated_dataframe
+from dashboard_utils.money import sum_by, reais_view, format_reais, cents_to_reais
+
+# Linhas por página na tabela de detalhamento
+DETAIL_PAGE_SIZE = 100
+
+
+def with_reais(summary):
+    """Adds valor_repasse (reais) next to the cents column, for chart axes."""
+    return summary.assign(valor_repasse=cents_to_reais(summary['valor_repasse_centavos']))
 
 
 apply_academic_style()
@@ -28,28 +38,39 @@ com base nos arquivos de prestação de contas disponibilizados.
 # Citação Obrigatória
 st.info("Dados fornecidos pela prefeitura, acessados através [https://egov.santos.sp.gov.br/dadosabertos/prestacao_contas](https://egov.santos.sp.gov.br/dadosabertos/prestacao_contas)")
 
+await_datasets('repasses_prefeitura', 'repasses_prefeitura_resumos')
 df = load_funding_data()
+# Totals by year, year x entity and year x secretaria, aggregated once per data version
+summaries = load_funding_summaries()
 
 if df.empty:
     st.warning("Nenhum dado de transferência encontrado.")
 else:
+    by_year = summaries['ano']
+    by_entity = summaries['ano_entidade']
+    by_secretaria = summaries['ano_secretaria']
+
     # Sidebar filters
     st.sidebar.header("Filtros")
     
-    anos_disponiveis = sorted(df['ano'].unique(), reverse=True)
+    anos_disponiveis = sorted(by_year['ano'].unique(), reverse=True)
     ano_selecionado = st.sidebar.selectbox("Selecione o Ano", ["Todos"] + list(anos_disponiveis))
     
-    df_filtered = df.copy()
-    if ano_selecionado != "Todos":
-        df_filtered = df_filtered[df_filtered['ano'] == ano_selecionado]
+    if ano_selecionado == "Todos":
+        df_filtered = df
+        year_totals = by_year
+        unique_entities = by_entity['beneficiaria_nome'].nunique()
+    else:
+        df_filtered = df[df['ano'] == ano_selecionado]
+        year_totals = by_year[by_year['ano'] == ano_selecionado]
+        unique_entities = year_totals['entidades'].sum()
 
-    # Metrics
-    total_repassed = df_filtered['valor_repasse'].sum()
-    total_records = len(df_filtered)
-    unique_entities = df_filtered['beneficiaria_nome'].nunique()
+    # Metrics (valores em centavos inteiros; reais só na exibição)
+    total_repassed = year_totals['valor_repasse_centavos'].sum()
+    total_records = year_totals['qtd'].sum()
 
     c1, c2, c3 = st.columns(3)
-    c1.metric("Valor Total Transferido", f"R$ {total_repassed:,.2f}")
+    c1.metric("Valor Total Transferido", format_reais(total_repassed))
     c2.metric("Total de Transferências", total_records)
     c3.metric("Entidades Beneficiadas", unique_entities)
 
@@ -57,27 +78,27 @@ else:
 
     render_transfer_table_11_1()
 
-    # Visualizations
     # Visualizations
     if ano_selecionado == "Todos":
         col_chart1, col_chart2 = st.columns(2)
         
         with col_chart1:
             st.subheader("Evolução das Transferências por Ano")
-            daily_trend = df.groupby('ano')['valor_repasse'].sum().reset_index()
+            daily_trend = with_reais(by_year)
             fig_trend = px.bar(daily_trend, x='ano', y='valor_repasse', title="Total Transferido por Ano", labels={'valor_repasse': 'Valor (R$)', 'ano': 'Ano'})
             st.plotly_chart(fig_trend, use_container_width=True)
 
         with col_chart2:
             st.subheader("Top 10 Entidades Beneficiadas (Geral)")
-            top_entities = df_filtered.groupby('beneficiaria_nome')['valor_repasse'].sum().reset_index().sort_values('valor_repasse', ascending=False).head(10)
+            top_entities = sum_by(by_entity, 'beneficiaria_nome', 'valor_repasse').sort_values('valor_repasse_centavos', ascending=False).head(10)
             fig_top = px.bar(top_entities, x='valor_repasse', y='beneficiaria_nome', orientation='h', title="Top 10 Entidades - Todos os Anos", labels={'valor_repasse': 'Valor (R$)', 'beneficiaria_nome': 'Entidade'})
             fig_top.update_layout(yaxis={'categoryorder':'total ascending'})
             st.plotly_chart(fig_top, use_container_width=True)
             
         st.markdown("---")
         st.subheader("Detalhamento dos Dados (Geral)")
-        st.dataframe(df_filtered, use_container_width=True)
+        render_paginated_dataframe(df_filtered, key="detalhe_repasses_todos", page_size=DETAIL_PAGE_SIZE,
+                                   format_page=reais_view, use_container_width=True)
 
     else:
         st.subheader(f"Análise Detalhada de {ano_selecionado}")
@@ -85,15 +106,16 @@ else:
         # --- Data Preparation ---
         
         # User requested to use 'Secretaria' instead of 'Área de Atuação'
-        df_filtered['Secretaria'] = df_filtered['secretaria_sigla']
         target_col = 'Secretaria'
+        year_secretaria = with_reais(by_secretaria[by_secretaria['ano'] == ano_selecionado]).rename(columns={'secretaria_sigla': target_col})
 
         
         # --- Charts ---
 
         # 1. Top 10 Entidades
         st.markdown("### 1. Top 10 Entidades com Maior Volume Transferido")
-        top_10 = df_filtered.groupby('beneficiaria_nome')['valor_repasse'].sum().reset_index().nlargest(10, 'valor_repasse').sort_values('valor_repasse', ascending=True)
+        year_entities = by_entity[by_entity['ano'] == ano_selecionado]
+        top_10 = with_reais(year_entities.nlargest(10, 'valor_repasse_centavos').sort_values('valor_repasse_centavos', ascending=True))
         fig_top10 = px.bar(top_10, x='valor_repasse', y='beneficiaria_nome', orientation='h', title=f"Top 10 Entidades - {ano_selecionado}", labels={'valor_repasse': 'Valor (R$)', 'beneficiaria_nome': 'Entidade'})
         st.plotly_chart(fig_top10, use_container_width=True)
 
@@ -102,11 +124,8 @@ else:
         with col_a:
             # 2. Pie Chart (Distribution by Area/Secretary)
             st.markdown(f"### 2. Distribuição por {target_col}")
-            df_pie = df_filtered.groupby(target_col)['valor_repasse'].sum().reset_index()
-            # Calculate percentages for legend similar to request
-            total_val = df_pie['valor_repasse'].sum()
-            df_pie['Percent'] = (df_pie['valor_repasse'] / total_val) * 100
-            df_pie['Legend_Label'] = df_pie.apply(lambda x: f"{x[target_col]}: R$ {x['valor_repasse']:,.2f} ({x['Percent']:.1f}%)", axis=1)
+            # Legend labels ("SIGLA: R$ valor (x%)") come precomputed with the summary
+            df_pie = year_secretaria.rename(columns={'rotulo': 'Legend_Label'})
             
             fig_pie = px.pie(df_pie, names='Legend_Label', values='valor_repasse', title=f"Distribuição de Verba por {target_col}")
             fig_pie.update_layout(showlegend=True)
@@ -115,10 +134,11 @@ else:
         with col_b:
             # 2.1 Bar Chart by Area
             st.markdown(f"### 3. Total por {target_col} (Barras)")
-            df_bar_area = df_filtered.groupby(target_col)['valor_repasse'].sum().reset_index().sort_values('valor_repasse', ascending=False)
+            df_bar_area = year_secretaria.sort_values('valor_repasse_centavos', ascending=False)
             fig_bar_area = px.bar(df_bar_area, x=target_col, y='valor_repasse', title=f"Total por {target_col}", labels={'valor_repasse': 'Valor (R$)'})
             st.plotly_chart(fig_bar_area, use_container_width=True)
             
         st.markdown("---")
         st.subheader("Tabela de Dados do Ano")
-        st.dataframe(df_filtered, use_container_width=True)
+        render_paginated_dataframe(df_filtered, key=f"detalhe_repasses_{ano_selecionado}", page_size=DETAIL_PAGE_SIZE,
+                                   format_page=reais_view, use_container_width=True)
@@ -10,7 +10,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from dashboard_utils.styles import apply_academic_style
 from dashboard_utils.visualizations import apply_academic_chart_style
-from dashboard_utils.data_loader import load_csv_robust
+from dashboard_utils.data_loader import load_matching_data
+from dashboard_utils.warmup import await_datasets
+from dashboard_utils.money import cents_to_reais, format_reais, reais_view
 
 # Page Configuration
 
@@ -31,32 +33,7 @@ No cruzamento, algumas transferências apareceram para entidades não encontrada
 <hr>
 """, unsafe_allow_html=True)
 
-# Helper: Load Data
-@st.cache_data
-def load_matching_data():
-    base_path = os.path.join(os.path.dirname(__file__), '../data')
-    
-    # Files
-    file_summary = os.path.join(base_path, 'tabela_resumo_recursos_por_osc.csv')
-    file_complete = os.path.join(base_path, 'tabela_recursos_osc_match_completo.csv')
-    file_unmatched = os.path.join(base_path, 'relatorio_nomes_nao_correspondidos.csv')
-    
-    # Load
-    try:
-        df_summary = load_csv_robust(file_summary)
-        df_complete = load_csv_robust(file_complete)
-        df_unmatched = load_csv_robust(file_unmatched)
-        
-        # Ensure match_type is string and fill NaNs
-        if 'match_type' in df_complete.columns:
-            df_complete['match_type'] = df_complete['match_type'].fillna('None').astype(str)
-            
-    except FileNotFoundError:
-        st.error(f"Arquivos de dados não encontrados em {base_path}. Verifique se a etapa de matching foi executada.")
-        return None, None, None
-        
-    return df_summary, df_complete, df_unmatched
-
+await_datasets('correspondencia')
 df_summary, df_complete, df_unmatched = load_matching_data()
 
 if df_complete is not None:
@@ -77,21 +54,22 @@ if df_complete is not None:
     
     # --- KPIs ---
     # Recalculate based on FILTERED data
-    total_repassado_mapeado = df_filtered[df_filtered['match_type'] != 'None']['valor_repasse'].sum()
-    total_repassado_geral = df_filtered['valor_repasse'].sum()
+    # Somas em centavos inteiros (exatas); reais só na exibição
+    total_repassado_mapeado = df_filtered[df_filtered['match_type'] != 'None']['valor_repasse_centavos'].sum()
+    total_repassado_geral = df_filtered['valor_repasse_centavos'].sum()
     
     # Calculate unmatched from filtered data
     df_filtered_unmatched = df_filtered[df_filtered['match_type'] == 'None']
-    total_repassado_nao_mapeado = df_filtered_unmatched['valor_repasse'].sum()
+    total_repassado_nao_mapeado = df_filtered_unmatched['valor_repasse_centavos'].sum()
     
     pct_cobertura = (total_repassado_mapeado / total_repassado_geral) * 100 if total_repassado_geral > 0 else 0
     
     kpi1, kpi2, kpi3 = st.columns(3)
     
     with kpi1:
-        st.metric("Total Mapeado (OSCs Identificadas)", f"R$ {total_repassado_mapeado:,.2f}")
+        st.metric("Total Mapeado (OSCs Identificadas)", format_reais(total_repassado_mapeado))
     with kpi2:
-        st.metric("Total Não Identificado", f"R$ {total_repassado_nao_mapeado:,.2f}")
+        st.metric("Total Não Identificado", format_reais(total_repassado_nao_mapeado))
     with kpi3:
         st.metric("Cobertura do Valor Total", f"{pct_cobertura:.1f}%")
         
@@ -112,7 +90,11 @@ if df_complete is not None:
         if 'natureza_juridica_desc' not in df_matched.columns:
              df_matched['natureza_juridica_desc'] = 'N/A'
         else:
-             df_matched['natureza_juridica_desc'] = df_matched['natureza_juridica_desc'].fillna('N/A')
+             natureza = df_matched['natureza_juridica_desc']
+             # Column is categorical (REPASSE_SCHEMA): register 'N/A' before filling with it
+             if isinstance(natureza.dtype, pd.CategoricalDtype) and 'N/A' not in natureza.cat.categories:
+                 natureza = natureza.cat.add_categories('N/A')
+             df_matched['natureza_juridica_desc'] = natureza.fillna('N/A')
 
         # Nature Filter (Specific to this view)
         all_natures = df_matched['natureza_juridica_desc'].unique()
@@ -126,9 +108,10 @@ if df_complete is not None:
         pivot_df = df_matched.pivot_table(
             index=['match_name', 'match_cnpj', 'natureza_juridica_desc'],
             columns='ano_recurso',
-            values='valor_repasse',
+            values='valor_repasse_centavos',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         ).reset_index()
         
         # Add Total Column
@@ -139,6 +122,9 @@ if df_complete is not None:
         # Sort
         pivot_df = pivot_df.sort_values('Total', ascending=False)
         
+        # Totals were summed in integer cents; convert to reais for display
+        pivot_df[year_cols + ['Total']] = cents_to_reais(pivot_df[year_cols + ['Total']])
+        
         # Formatting for display
         format_dict = {col: 'R$ {:,.2f}' for col in year_cols + ['Total']}
         
@@ -186,7 +172,7 @@ if df_complete is not None:
         audit_df = df_filtered[df_filtered['match_type'].isin(selected_types)]
         
         st.dataframe(
-            audit_df[['beneficiaria_nome', 'match_name', 'match_cnpj', 'match_type', 'score', 'valor_repasse', 'ano_recurso']],
+            reais_view(audit_df[['beneficiaria_nome', 'match_name', 'match_cnpj', 'match_type', 'score', 'valor_repasse_centavos', 'ano_recurso']]),
             use_container_width=True,
             column_config={
                 "beneficiaria_nome": "Beneficiário (Original)",
@@ -207,10 +193,10 @@ if df_complete is not None:
         
         # Use df_filtered_unmatched derived from the global filter
         # Aggregate by name since we might have multiple entries per year or across years
-        unmatched_summary = df_filtered_unmatched.groupby(['beneficiaria_nome', 'beneficiaria_nome_norm'])['valor_repasse'].sum().reset_index()
+        unmatched_summary = df_filtered_unmatched.groupby(['beneficiaria_nome', 'beneficiaria_nome_norm'], observed=True)['valor_repasse_centavos'].sum().reset_index()
         
         st.dataframe(
-            unmatched_summary.sort_values('valor_repasse', ascending=False),
+            reais_view(unmatched_summary.sort_values('valor_repasse_centavos', ascending=False)),
             use_container_width=True,
             column_config={
                 "beneficiaria_nome": "Nome no Recurso",
@@ -1,12 +1,14 @@
 import streamlit as st
-import pandas as pd
 from streamlit_folium import st_folium
 import plotly.express as px
-from dashboard_utils.data_loader import load_data, load_csv_robust
-from dashboard_utils.visualizations import plot_map, apply_academic_chart_style
+from dashboard_utils.data_loader import REPASSE_CUBE, load_data, load_match_data, load_repasse_cube
+from dashboard_utils.warmup import await_datasets
+from dashboard_utils.visualizations import cached_plot_map, apply_academic_chart_style
 from dashboard_utils.styles import apply_academic_style
 from dashboard_utils.components import render_transfer_table_11_1
-import os
+from dashboard_utils.area_catalog import AREA_COL_LABELS, area_mask, codes_for_labels
+from dashboard_utils.repasse_cube import cube_years, query_repasse_cube
+from dashboard_utils.money import cents_to_reais, format_reais
 
 
 apply_academic_style()
@@ -21,16 +23,7 @@ Esta página apresenta a evolução quantitativa das transferências e represent
 
 # --- Carregar Dados ---
 # 1. Carregar dados financeiros (Matches)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-match_file_path = os.path.join(current_dir, '..', 'data', 'tabela_recursos_osc_match_completo.csv')
-
-@st.cache_data
-def load_match_data():
-    if not os.path.exists(match_file_path):
-        return pd.DataFrame()
-    
-    return load_csv_robust(match_file_path)
-
+await_datasets('repasses_match', 'oscs', *REPASSE_CUBE.values())
 df_matches = load_match_data()
 
 # 2. Carregar dados de OSCs (Coordenadas)
@@ -41,91 +34,10 @@ if df_matches.empty or df_oscs.empty:
     st.stop()
 
 # --- Preparação dos Dados ---
-
-# Filtrar apenas matches válidos (não None)
-df_valid_matches = df_matches[df_matches['match_type'].notna() & (df_matches['match_type'] != 'None')].copy()
-
-# Converter colunas de repasse para float (se necessário)
-def parse_currency(x):
-    if isinstance(x, str):
-        return float(x.replace('.', '').replace(',', '.'))
-    return float(x) if x else 0.0
-
-df_valid_matches['valor_repasse_float'] = df_valid_matches['valor_repasse'].apply(parse_currency)
-
-# Garantir CNPJ limpo para merge
-# df_oscs já deve ter 'cnpj' limpo pelo clean_data
-# df_valid_matches 'match_cnpj' deve ser limpo
-def clean_cnpj(x):
-    if pd.isna(x): return ''
-    s = str(x)
-    # Remove decimal part if exists (e.g. 1234,0 -> 1234)
-    if ',' in s:
-        s = s.split(',')[0]
-    elif '.' in s:
-        s = s.split('.')[0]
-    return ''.join(filter(str.isdigit, s))
-
-df_valid_matches['match_cnpj_clean'] = df_valid_matches['match_cnpj'].apply(clean_cnpj)
-df_oscs['cnpj_clean'] = df_oscs['cnpj'].apply(clean_cnpj)
-
-# Merge para pegar coordenadas e detalhes
-# Left merge no match para manter os repasses, trazendo coords do df_oscs
-# Mapa de colunas Area_ para nomes legíveis
-area_col_map = {
-    'Area_Assistencia_social': 'Assistência Social',
-    'Area_Cultura_e_recreacao': 'Cultura e Recreação',
-    'Area_Desenvolvimento_e_defesa_de_direitos_e_interesses': 'Desenvolvimento e Defesa de Direitos',
-    'Area_Educacao_e_pesquisa': 'Educação e Pesquisa',
-    'Area_Saude': 'Saúde',
-    'Area_Religiao': 'Religião',
-    'Area_Associacoes_patronais_e_profissionais': 'Associações Patronais e Profissionais',
-    'Area_Outras_atividades_associativas': 'Outras Atividades Associativas'
-}
-
-# Merge para pegar coordenadas e detalhes
-# Left merge no match para manter os repasses, trazendo coords do df_oscs
-# Incluir todas as colunas de área no merge
-cols_to_merge = ['cnpj_clean', 'latitude', 'longitude', 'tx_endereco_completo', 'situacao_cadastral', 'dt_fundacao_osc', 'Area_Atuacao'] + list(area_col_map.keys())
-
-df_merged = df_valid_matches.merge(
-    df_oscs[cols_to_merge],
-    left_on='match_cnpj_clean',
-    right_on='cnpj_clean',
-    how='inner' # Inner para garantir que só mostramos quem tem coordenada
-)
-
-# Se latitude/longitude forem vazias, remover
-df_merged = df_merged.dropna(subset=['latitude', 'longitude'])
-
-# Extrair Bairro (Heurística simples: assumindo formato "Logradouro, Numero, Compl, Bairro, Cidade, UF")
-def extract_bairro(addr):
-    if not isinstance(addr, str): return "N/A"
-    parts = addr.split(',')
-    # Geralmente o bairro é o antepenúltimo ou antes de "Santos"
-    # Ex: RUA X, 123, BAIRRO Y, SANTOS, SP
-    try:
-        # Procurar 'Santos'
-        sanitized_parts = [p.strip().upper() for p in parts]
-        if 'SANTOS' in sanitized_parts:
-            idx = sanitized_parts.index('SANTOS')
-            if idx > 0:
-                possible_bairro = parts[idx-1].strip()
-                # Se for número ou complemento curto, tenta voltar mais um
-                if len(possible_bairro) < 3 and idx > 1:
-                     return parts[idx-2].strip()
-                return possible_bairro
-        # Fallback: pegar o item do meio se tiver tamanho suficiente
-        if len(parts) >= 4:
-            return parts[-3].strip()
-    except:
-        pass
-    return "N/A"
-
-df_merged['Bairro'] = df_merged['tx_endereco_completo'].apply(extract_bairro)
-
-# Garantir Ano como Inteiro
-df_merged['ano_recurso'] = df_merged['ano_recurso'].fillna(0).astype(int)
+# Cubo pré-agregado por (OSC, áreas, ano, secretaria), compartilhado pelo registro de
+# conjuntos e refeito quando os repasses, o cadastro ou os bairros mudam; os filtros
+# da página apenas somam fatias do cubo
+cube = load_repasse_cube()
 
 # --- Layout Principal ---
 # Mudança para layout de largura total com filtros na sidebar (Padrão Mapa 1)
@@ -134,104 +46,29 @@ df_merged['ano_recurso'] = df_merged['ano_recurso'].fillna(0).astype(int)
 st.sidebar.header("Filtros")
 
 # 1. Filtro Temporal (Slider)
-min_year = int(df_merged['ano_recurso'].min()) if not df_merged.empty else 2016
-max_year = int(df_merged['ano_recurso'].max()) if not df_merged.empty else 2025
+min_year, max_year = cube_years(cube) or (2016, 2025)
 year_range = st.sidebar.slider("Selecione o Período", min_value=min_year, max_value=max_year, value=(min_year, max_year), step=1)
 start_year, end_year = year_range
 
 # 2. Filtro de Área de Atuação
-# Restaurando mapeamento oficial IPEA para garantir consistência com a Página de Áreas (Página 2/3)
-area_col_map = {
-    'Area_Assistencia_social': 'Assistência Social',
-    'Area_Cultura_e_recreacao': 'Cultura e Recreação',
-    'Area_Desenvolvimento_e_defesa_de_direitos_e_interesses': 'Desenvolvimento e Defesa de Direitos',
-    'Area_Educacao_e_pesquisa': 'Educação e Pesquisa',
-    'Area_Saude': 'Saúde',
-    'Area_Religiao': 'Religião',
-    'Area_Associacoes_patronais_e_profissionais': 'Associações Patronais e Profissionais',
-    'Area_Outras_atividades_associativas': 'Outras Atividades Associativas'
-}
-
-avail_areas = sorted(list(area_col_map.values()))
+# Mapeamento oficial IPEA (area_catalog), o mesmo da Página de Áreas (Página 2/3)
+avail_areas = sorted(list(AREA_COL_LABELS.values()))
 selected_areas_labels = st.sidebar.multiselect("Filtrar por Área de Atuação", options=avail_areas, default=avail_areas)
 
 # --- Lógica de Filtragem (Processamento) ---
-df_year = df_merged[(df_merged['ano_recurso'] >= start_year) & (df_merged['ano_recurso'] <= end_year)]
-
-if selected_areas_labels:
-    # Lógica baseada nas colunas binárias oficiais
-    # 1. Identificar quais colunas binárias correspondem aos rótulos selecionados
-    selected_cols = [k for k, v in area_col_map.items() if v in selected_areas_labels]
-    
-    # 2. Garantir que existem no DF
-    valid_cols = [c for c in selected_cols if c in df_year.columns]
-    
-    if valid_cols:
-        # Garantir numérico
-        for col in valid_cols:
-            df_year[col] = pd.to_numeric(df_year[col], errors='coerce').fillna(0)
-            
-        # 3. Manter linhas que tenham pelo menos 1 nas colunas selecionadas
-        mask = df_year[valid_cols].sum(axis=1) > 0
-        df_year = df_year[mask]
-    else:
-        df_year = df_year[0:0]
-else:
-    # Se nada selecionado, mostrar nada
-    df_year = df_year[0:0]
+# Lógica baseada nas colunas binárias oficiais, codificadas no bitmask de áreas
+# 1. Códigos do catálogo dos rótulos selecionados
+# 2. Máscara de bits com esses códigos
+# (nenhuma área selecionada -> máscara 0 -> nada é mostrado)
+selected_mask = area_mask(codes_for_labels(selected_areas_labels))
 
 # --- Agregação por OSC para o Mapa ---
-# Recalcular Área de Atuação para o Display para garantir que usamos os nomes bonitos (com acento) do map
-# Baseado nas colunas binárias oficiais
-
-def get_area_display(row):
-    active = []
-    for col, label in area_col_map.items():
-        if col in row.index and row[col] == 1:
-            active.append(label)
-    
-    if not active:
-        return "Não Informado"
-    elif len(active) == 1:
-        return active[0]
-    else:
-        # Se múltiplas, retorna "Múltiplas Áreas" ou lista?
-        # Para o popup, "Múltiplas Áreas" é mais limpo, ou podemos retornar a lista se forem poucas.
-        # Vamos manter "Múltiplas Áreas" para consistência, ou "Múltiplas: ..."
-        return "Múltiplas Áreas"
-
-# Garantir que as colunas de area estejam no DF para a função rodar
-for c in area_col_map.keys():
-    if c not in df_year.columns:
-        df_year[c] = 0 # Fallback
-
-df_year['Area_Display'] = df_year.apply(get_area_display, axis=1)
-
-group_cols = ['match_cnpj_clean', 'match_name', 'latitude', 'longitude', 'cd_natureza_juridica', 'natureza_juridica_desc', 
-              'situacao_cadastral', 'Bairro', 'dt_fundacao_osc', 'tx_endereco_completo', 'Area_Display']
-
-# Função de agregação personalizada para pegar o nome da beneficiária mais comum
-def get_most_common(x):
-    try:
-        return x.mode().iloc[0]
-    except:
-        return x.iloc[0] if not x.empty else "N/A"
-
-# Função para agrupar secretarias únicas
-def get_unique_secretarias(x):
-    return ", ".join(sorted(x.astype(str).unique()))
-
-df_map_data = df_year.groupby(group_cols).agg({
-    'valor_repasse_float': 'sum',
-    'id': 'count', # Contagem de repasses
-    'beneficiaria_nome': get_most_common, # Trazer o nome usado no repasse
-    'secretaria_sigla': get_unique_secretarias # Lista de secretarias
-}).reset_index()
+# 3. Somar as fatias do cubo no período para as OSCs com pelo menos 1 das áreas selecionadas
+df_map_data = query_repasse_cube(cube, start_year, end_year, selected_mask)
 
 # Renomear para compatibilidade com plot_map OU criar dados de tooltip manuais
 df_map_data.rename(columns={
     'match_name': 'tx_nome_fantasia_osc', # Para plot_map usar como titulo do popup
-    'valor_repasse_float': 'Valor Total Recebido',
     'id': 'Qtd. Transferências',
     'cd_natureza_juridica': 'cd_natureza_juridica_osc', # Para cor (3301 = OS)
     'natureza_juridica_desc': 'Tipo Jurídico',
@@ -240,8 +77,9 @@ df_map_data.rename(columns={
     'Area_Display': 'Area_Atuacao_Display' # Nome final
 }, inplace=True)
 
-# Formatar valor para tooltip
-df_map_data['Valor Formatado'] = df_map_data['Valor Total Recebido'].apply(lambda x: f"R$ {x:,.2f}")
+# Somas do cubo em centavos; reais só para o gráfico e o texto do tooltip
+df_map_data['Valor Total Recebido'] = cents_to_reais(df_map_data['valor_repasse_centavos'])
+df_map_data['Valor Formatado'] = df_map_data['valor_repasse_centavos'].map(format_reais)
 
 # Filtro de Pesquisa (Destaque no Mapa)
 if not df_map_data.empty:
@@ -269,7 +107,7 @@ if not df_map_data.empty:
     }
     
     # Hover mostra o nome da beneficiária (como solicitado)
-    m = plot_map(df_map_data, tooltip_cols=tooltip, hover_name_col='Beneficiária')
+    m = cached_plot_map(df_map_data, tooltip_cols=tooltip, hover_name_col='Beneficiária')
     st_folium(m, width="100%", height=600)
 else:
     st.info(f"Nenhuma transferência mapeada com coordenadas para os filtros selecionados.")
@@ -282,11 +120,11 @@ st.subheader("Resumo do Período")
 met_col1, met_col2 = st.columns(2)
 
 # Métricas Simples
-total_val = df_map_data['Valor Total Recebido'].sum()
+total_val = df_map_data['valor_repasse_centavos'].sum()
 qtd_oscs = df_map_data['match_cnpj_clean'].nunique()
 
 with met_col1:
-    st.metric("Total Transferido", f"R$ {total_val:,.2f}")
+    st.metric("Total Transferido", format_reais(total_val))
 with met_col2:
     st.metric("OSCs Beneficiadas", f"{qtd_oscs}")
 
@@ -306,7 +144,7 @@ with st.expander("Ver Tabela Detalhada", expanded=False):
 
 with st.expander("Análise Gráfica (Top 10 Beneficiárias)", expanded=True):
     if not df_map_data.empty:
-        top_10 = df_map_data.nlargest(10, 'Valor Total Recebido')
+        top_10 = df_map_data.nlargest(10, 'valor_repasse_centavos')
         fig = px.bar(
             top_10,
             x='Valor Total Recebido',
@@ -0,0 +1,79 @@
+import io
+import struct
+import zipfile
+
+from dashboard_utils.bairros import build_bairro_index, load_bairro_polygons, locate_points
+from dashboard_utils.bairros_ingest import ingest_bairros
+
+FIELDS = [('CD_BAIRRO', 12), ('NM_BAIRRO', 40), ('CD_MUN', 7)]
+
+# Anel externo em sentido horário e buraco em anti-horário, como no shapefile
+OUTER = [(-46.34, -23.96), (-46.30, -23.96), (-46.30, -24.00), (-46.34, -24.00), (-46.34, -23.96)]
+HOLE = [(-46.33, -23.97), (-46.33, -23.99), (-46.31, -23.99), (-46.31, -23.97), (-46.33, -23.97)]
+
+
+def polygon_record(rings):
+    points = [p for ring in rings for p in ring]
+    parts, start = [], 0
+    for ring in rings:
+        parts.append(start)
+        start += len(ring)
+    content = struct.pack('<i4d2i', 5, 0, 0, 0, 0, len(rings), len(points))
+    content += struct.pack(f'<{len(parts)}i', *parts)
+    content += struct.pack(f'<{2 * len(points)}d', *(c for p in points for c in p))
+    return content
+
+
+def shapefile_zip(records, encoding='utf-8', cpg='UTF-8'):
+    """Shapefile mínimo (.shp, .shx, .dbf e .cpg) no formato da malha de bairros do IBGE."""
+    shp, shx = b'', b''
+    for number, (_, rings) in enumerate(records, 1):
+        content = polygon_record(rings)
+        shx += struct.pack('>2i', (100 + len(shp)) // 2, len(content) // 2)
+        shp += struct.pack('>2i', number, len(content) // 2) + content
+    bbox = struct.pack('<2i8d', 1000, 5, *[0] * 8)
+    shp = struct.pack('>7i', 9994, 0, 0, 0, 0, 0, (100 + len(shp)) // 2) + bbox + shp
+    shx = struct.pack('>7i', 9994, 0, 0, 0, 0, 0, (100 + len(shx)) // 2) + bbox + shx
+
+    record_len = 1 + sum(length for _, length in FIELDS)
+    header_len = 32 + 32 * len(FIELDS) + 1
+    dbf = struct.pack('<B3BIHH20x', 3, 124, 1, 1, len(records), header_len, record_len)
+    for name, length in FIELDS:
+        dbf += struct.pack('<11sc4xB15x', name.encode('ascii'), b'C', length)
+    dbf += b'\r'
+    for values, _ in records:
+        dbf += b' ' + b''.join(v.encode(encoding).ljust(length) for v, (_, length) in zip(values, FIELDS))
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('BR_bairros_CD2022.shp', shp)
+        archive.writestr('BR_bairros_CD2022.shx', shx)
+        archive.writestr('BR_bairros_CD2022.dbf', dbf)
+        archive.writestr('BR_bairros_CD2022.cpg', cpg)
+    return buffer.getvalue()
+
+
+def test_ingest_keeps_santos_bairros_with_holes(tmp_path):
+    source = tmp_path / 'BR_bairros_CD2022.zip'
+    source.write_bytes(shapefile_zip([
+        (('354100005001', 'Centro', '3541000'), [OUTER]),
+        (('354850005001', 'Gonzaga', '3548500'), [OUTER, HOLE]),
+        (('354100005002', 'Vila Nova', '3541000'), [OUTER]),
+    ]))
+    target = tmp_path / 'bairros_santos.geojson'
+
+    assert ingest_bairros(str(source), str(target)) == 1
+    index = build_bairro_index(load_bairro_polygons(str(target)))
+    located = locate_points([-23.965, -23.98, -23.95], [-46.335, -46.32, -46.32], index)
+    assert list(located) == ['Gonzaga', None, None]
+
+
+def test_ingest_reads_esri_codepages(tmp_path):
+    # O ESRI grava a página de código como número ('1252'), não como nome de codec
+    source = tmp_path / 'BR_bairros_CD2022.zip'
+    source.write_bytes(shapefile_zip([(('354850005002', 'Caruara Área Continental', '3548500'), [OUTER])],
+                                     encoding='cp1252', cpg='1252'))
+    target = tmp_path / 'bairros_santos.geojson'
+
+    ingest_bairros(str(source), str(target))
+    assert [name for name, _ in load_bairro_polygons(str(target))] == ['Caruara Área Continental']
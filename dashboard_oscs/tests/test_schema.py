@@ -0,0 +1,15 @@
+import pandas as pd
+
+from dashboard_utils.data_cleaning import clean_data, enrich_osc_data
+from dashboard_utils.data_loader import OSC_DATA_PATH, load_csv_robust
+from dashboard_utils.schema import OSC_SCHEMA, TEXT, apply_schema
+
+
+def test_osc_schema_keeps_missing_values():
+    """Os tipos compactos não podem trocar ausentes por texto ('nan', 'None')."""
+    df = enrich_osc_data(clean_data(load_csv_robust(OSC_DATA_PATH)))
+    compact = apply_schema(df, OSC_SCHEMA)
+
+    pd.testing.assert_series_equal(compact.isna().sum(), df.isna().sum())
+    for col in OSC_SCHEMA[TEXT]:
+        assert not compact[col].isin(['nan', 'None']).any(), col
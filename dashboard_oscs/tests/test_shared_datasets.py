@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from dashboard_utils.data_loader import get_dataset, registered_datasets
+
+DASHBOARD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PAGES_DIR = os.path.join(DASHBOARD_DIR, 'pages')
+PAGES = sorted(f for f in os.listdir(PAGES_DIR) if f.endswith('.py'))
+
+
+def content_hash(df):
+    return int(pd.util.hash_pandas_object(df, index=True).sum()), tuple(df.columns), tuple(map(str, df.dtypes))
+
+
+def dataset_hashes():
+    # get_dataset também levanta RuntimeError se o objeto compartilhado foi alterado
+    return {name: content_hash(get_dataset(name)) for name in registered_datasets()}
+
+
+@pytest.fixture(scope='module')
+def original_hashes():
+    return dataset_hashes()
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_page_runs_without_mutating_shared_datasets(page, original_hashes):
+    """
+    Contrato dos conjuntos do registro: a página roda até o fim (sem exceção) e
+    não altera nenhum dos DataFrames compartilhados.
+    """
+    at = AppTest.from_file(os.path.join(PAGES_DIR, page), default_timeout=120)
+    at.run()
+
+    assert not at.exception, f"{page}: {at.exception[0].message}"
+    changed = [name for name, expected in dataset_hashes().items() if original_hashes[name] != expected]
+    assert not changed, f"{page} alterou no lugar: {changed}"
+
+
+def test_writing_to_shared_dataset_fails():
+    """
+    Escrever valores falha no array somente leitura ou, se houver views vivas
+    (Copy-on-Write copia o array), no próximo get_dataset.
+    """
+    oscs = get_dataset('oscs')
+    numeric_col = oscs.select_dtypes('number').columns[0]
+    with pytest.raises((ValueError, RuntimeError)):
+        oscs.loc[oscs.index[0], numeric_col] = -1
+        get_dataset('oscs')
+    # O conjunto descartado é refeito no acesso seguinte
+    assert content_hash(get_dataset('oscs'))
@@ -6,32 +6,18 @@ import pandas as pd
 sys.path.append('/home/hericmr/Documentos/Mapeamento cŕitico das organizações da sociedade civil em Santos/dashboard_oscs')
 
 from dashboard_utils.data_loader import load_data
+from dashboard_utils.area_catalog import AREAS, AREA_COL_LABELS
 
 def debug():
     print("Loading data...")
     df = load_data()
     print(f"Data loaded: {len(df)} rows")
     
+    # Áreas e subáreas (colunas Area_* / SubArea_*) do catálogo compartilhado com o dashboard
+    area_col_map = AREA_COL_LABELS
     hierarchy = {
-        'Assistência Social': ['SubArea_Assistencia_social'],
-        'Cultura e Recreação': ['SubArea_Cultura_e_arte', 'SubArea_Esportes_e_recreacao'],
-        'Desenvolvimento e Defesa de Direitos': ['SubArea_Desenvolvimento_e_defesa_de_direitos'],
-        'Educação e Pesquisa': ['SubArea_Educacao_infantil', 'SubArea_Ensino_fundamental', 'SubArea_Ensino_superior', 'SubArea_Educacao_profissional', 'SubArea_Atividades_de_apoio_a_educacao', 'SubArea_Outras_formas_de_educacao_ensino', 'SubArea_Estudos_e_pesquisas'],
-        'Saúde': ['SubArea_Hospitais', 'SubArea_Outros_servicos_de_saude'],
-        'Religião': ['SubArea_Religiao'],
-        'Associações Patronais e Profissionais': ['SubArea_Associacoes_empresariais_e_patronais', 'SubArea_Associacoes_profissionais', 'SubArea_Associacoes_de_produtores_rurais_pescadores_e_similares'],
-        'Outras Atividades Associativas': ['SubArea_Associacoes_de_atividades_nao_especificadas_anteriormente']
-    }
-    
-    area_col_map = {
-        'Area_Assistencia_social': 'Assistência Social',
-        'Area_Cultura_e_recreacao': 'Cultura e Recreação',
-        'Area_Desenvolvimento_e_defesa_de_direitos_e_interesses': 'Desenvolvimento e Defesa de Direitos',
-        'Area_Educacao_e_pesquisa': 'Educação e Pesquisa',
-        'Area_Saude': 'Saúde',
-        'Area_Religiao': 'Religião',
-        'Area_Associacoes_patronais_e_profissionais': 'Associações Patronais e Profissionais',
-        'Area_Outras_atividades_associativas': 'Outras Atividades Associativas'
+        area['short_label']: [sub['col'] for sub in area['subareas'] if sub['col']]
+        for area in AREAS if area['col']
     }
 
     for area_col, area_name in area_col_map.items():
@@ -1,183 +1,433 @@
 import pandas as pd
+import numpy as np
 import os
 
+import io
+import re
+import glob
+import argparse
 import zipfile
-import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+except ImportError:  # opcional: sem pyarrow, a 1ª passada usa o leitor do pandas
+    pa = None
 
 # Configuration
 SANTOS_OSCS_PATH = 'dashboard_oscs/data/oscs_santos.csv'
 DATA_DIR = 'dados atualizados'
 OUTPUT_DIR = os.path.join(DATA_DIR, 'dados_filtrados')
-TEMP_DIR = os.path.join(DATA_DIR, 'temp_zip_extract')
+# Partições geradas por scripts/filter_santos_oscs.py --particionar
+PARTITIONS_DIR = os.path.join(DATA_DIR, 'oscs_por_municipio')
+
+# Linhas por bloco na leitura dos CSVs (memória limitada ao tamanho do bloco)
+CHUNK_SIZE = 200_000
+# Bytes do início do arquivo usados para descobrir encoding/separador
+SNIFF_BYTES = 64 * 1024
+CSV_ENCODINGS = ['utf-8', 'latin1', 'cp1252']
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# Registro das fontes nacionais: como ler cada arquivo e onde está o CNPJ/ID da OSC.
+# pattern: trecho do nome do arquivo; header: linha do cabeçalho (0 = primeira);
+# encoding/sep: formato do CSV, ou None para descobrir pela amostra inicial.
+# Based on previous analysis (headers.txt & re-inspection)
+SOURCE_SCHEMAS = [
+    {'pattern': 'area_subarea', 'key_col': 'cd_identificador_osc', 'header': 0, 'encoding': None, 'sep': None},
+    {'pattern': 'baseprojetososcantiga', 'key_col': 'cd_identificador_osc', 'header': 0, 'encoding': None, 'sep': None},
+    {'pattern': 'recursososc', 'key_col': 'cd_identificador_osc', 'header': 0, 'encoding': None, 'sep': None},
+    {'pattern': '1434-cebassaude', 'key_col': 'NU_CNPJ', 'header': 0, 'encoding': None, 'sep': None},
+    {'pattern': '8420-cebaseducacao', 'key_col': 'CNPJ', 'header': 0, 'encoding': None, 'sep': None},
+    # 4 linhas de título antes do cabeçalho
+    {'pattern': '7684-cebassuas', 'key_col': 'CNPJ', 'header': 4, 'encoding': None, 'sep': None},
+]
+# Arquivos sem entrada no registro: coluna-chave procurada pelo nome (resolve_key_col)
+DEFAULT_SCHEMA = {'pattern': None, 'key_col': None, 'header': 0, 'encoding': None, 'sep': None}
+# Extrações das próprias OSCs (oscs_santos.csv, oscs_<municipio>.csv) não são filtradas
+SKIPPED_SOURCES = re.compile(r'^oscs_.*\.csv$')
 
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def load_santos_cnpjs():
-    """Loads the list of CNPJs from the Santos OSCs file."""
-    print(f"Loading Santos OSCs from {SANTOS_OSCS_PATH}...")
+def clean_cd_municipio(values):
+    """Código IBGE como texto de dígitos ('3548500.0' -> '3548500')."""
+    return values.astype(str).str.strip().str.replace(r'\.0+$', '', regex=True)
+
+def read_cnpj_municipios(path, cd_municipio=None):
+    """CNPJ limpo -> código do município para um arquivo de OSCs (sep=';')."""
+    df = pd.read_csv(path, sep=';', dtype=str, usecols=lambda c: c in ('cnpj', 'cd_municipio'))
+    # Clean CNPJ: remove non-numeric characters if any (though likely clean)
+    cnpjs = df['cnpj'].str.replace(r'\D', '', regex=True)
+    if cd_municipio is None:
+        codes = clean_cd_municipio(df['cd_municipio'])
+    else:
+        codes = pd.Series(cd_municipio, index=df.index)
+    return dict(zip(cnpjs, codes))
+
+def load_cnpj_municipios(partitioned=False):
+    """
+    Lookup CNPJ -> código do município das OSCs de interesse.
+    Sem partitioned, usa apenas as OSCs de Santos; com partitioned, junta todas as
+    partições oscs_por_municipio/municipio=<cd_municipio>/oscs.csv.
+    """
     try:
-        df = pd.read_csv(SANTOS_OSCS_PATH, sep=';', dtype={'cnpj': str})
-        # Clean CNPJ: remove non-numeric characters if any (though likely clean)
-        df['cnpj_clean'] = df['cnpj'].str.replace(r'\D', '', regex=True)
-        cnpjs = set(df['cnpj_clean'].unique())
-        print(f"Loaded {len(cnpjs)} unique CNPJs.")
-        return cnpjs
+        if not partitioned:
+            print(f"Loading Santos OSCs from {SANTOS_OSCS_PATH}...")
+            lookup = read_cnpj_municipios(SANTOS_OSCS_PATH)
+        else:
+            paths = sorted(glob.glob(os.path.join(PARTITIONS_DIR, 'municipio=*', 'oscs.csv')))
+            print(f"Loading {len(paths)} municipality partitions from {PARTITIONS_DIR}...")
+            lookup = {}
+            for path in paths:
+                cd_municipio = os.path.basename(os.path.dirname(path)).split('=', 1)[1]
+                lookup.update(read_cnpj_municipios(path, cd_municipio))
+        print(f"Loaded {len(lookup)} unique CNPJs in {len(set(lookup.values()))} municipalities.")
+        return lookup
     except Exception as e:
-        print(f"Error loading Santos OSCs: {e}")
-        return set()
+        print(f"Error loading OSCs: {e}")
+        return {}
+
+def save_filtered(filtered_df, filename, partitioned=False):
+    """
+    Grava o resultado como CSV em OUTPUT_DIR ou, com partitioned, em
+    OUTPUT_DIR/municipio=<cd_municipio>/ (coluna auxiliar '_municipio').
+    """
+    # Save as CSV for consistency and speed, or keep original format?
+    # CSV is safer for data portability.
+    output_name = os.path.splitext(filename)[0] + '.csv'
+    if not partitioned:
+        output_csv_path = os.path.join(OUTPUT_DIR, output_name)
+        filtered_df.drop(columns=['_municipio']).to_csv(output_csv_path, index=False, sep=';')
+        print(f"Saved filtered data to {output_csv_path}")
+        return
+
+    for cd_municipio, part in filtered_df.groupby('_municipio', sort=True):
+        part_dir = os.path.join(OUTPUT_DIR, f"municipio={cd_municipio}")
+        os.makedirs(part_dir, exist_ok=True)
+        part.drop(columns=['_municipio']).to_csv(os.path.join(part_dir, output_name), index=False, sep=';')
+    print(f"Saved filtered data to {filtered_df['_municipio'].nunique()} partitions in {OUTPUT_DIR}/municipio=*/{output_name}")
+
+def source_schema(filename):
+    """Entrada do registro para o arquivo, ou None se ele não deve ser filtrado."""
+    if SKIPPED_SOURCES.match(filename):
+        return None
+    for schema in SOURCE_SCHEMAS:
+        if schema['pattern'] in filename:
+            return schema
+    return DEFAULT_SCHEMA
+
+def resolve_key_col(key_col, columns):
+    """Coluna-chave mapeada ou, na falta dela, a primeira coluna com nome de CNPJ/ID."""
+    if key_col is None:
+        possible_keys = ['cnpj', 'nu_cnpj', 'cd_identificador_osc', 'id_osc']
+        for col in columns:
+            if col.lower() in possible_keys:
+                return col
+    return key_col if key_col in columns else None
+
+def detect_csv_format(open_source, header_row, encoding=None, sep=None):
+    """
+    Encoding e separador do CSV. Valores declarados no registro são usados como estão;
+    os que faltam são descobertos nos primeiros SNIFF_BYTES do arquivo: vale a primeira
+    combinação que produz mais de uma coluna.
+    """
+    if encoding is not None and sep is not None:
+        return encoding, sep
+
+    with open_source() as f:
+        sample = f.read(SNIFF_BYTES)
+    if len(sample) == SNIFF_BYTES and b'\n' in sample:
+        # Descarta a última linha, possivelmente cortada no meio
+        sample = sample[:sample.rindex(b'\n') + 1]
+
+    last_error = None
+    for candidate in ([encoding] if encoding else CSV_ENCODINGS):
+        try:
+            text = sample.decode(candidate)
+        except UnicodeDecodeError as e:
+            last_error = e
+            continue
+        for separator in ([sep] if sep else [';', '\t', ',']):
+            try:
+                df = pd.read_csv(io.StringIO(text), sep=separator, dtype=str, header=header_row, on_bad_lines='skip')
+            except Exception as e:
+                last_error = e
+                continue
+            if len(df.columns) > 1:
+                return candidate, separator
+    raise ValueError(f"Failed to read CSV with tried encodings/separators. Last error: {last_error}")
+
+def lookup_keys(keys, cnpj_municipios):
+    """
+    Município de cada chave (NaN se a chave, só com dígitos, não estiver no lookup).
+    O dicionário só é consultado para as linhas que casam.
+    """
+    key_clean = keys.astype(str).str.replace(r'\D', '', regex=True)
+    matched = key_clean.isin(cnpj_municipios.keys())
+    return key_clean[matched].map(cnpj_municipios).reindex(keys.index)
+
+def filter_frame(df, key_col, cnpj_municipios):
+    """Linhas cuja chave (só dígitos) está no lookup, com o município em '_municipio'."""
+    municipios = lookup_keys(df[key_col], cnpj_municipios)
+    matched = municipios.notna()
+    filtered_df = df[matched].copy()
+    filtered_df['_municipio'] = municipios[matched]
+    return filtered_df
+
+def filter_csv_chunks(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize):
+    """
+    Lê o CSV em blocos direto do stream e mantém só as linhas do lookup.
+    Retorna (linhas lidas, linhas filtradas, coluna-chave).
+    """
+    parts = []
+    total = 0
+    with open_source() as f:
+        reader = pd.read_csv(f, sep=sep, dtype=str, header=header_row, encoding=encoding,
+                             on_bad_lines='warn', chunksize=chunksize)
+        for chunk in reader:
+            if total == 0:
+                key_col = resolve_key_col(key_col, chunk.columns)
+                if key_col is None:
+                    print(f"Could not identify key column. Columns: {chunk.columns.tolist()}")
+                    return 0, None, None
+            total += len(chunk)
+            parts.append(filter_frame(chunk, key_col, cnpj_municipios))
+    if not parts:
+        return 0, None, key_col
+    return total, pd.concat(parts, ignore_index=True), key_col
+
+def read_csv_columns(open_source, encoding, sep, header_row):
+    with open_source() as f:
+        return pd.read_csv(f, sep=sep, dtype=str, header=header_row, encoding=encoding, nrows=0).columns
+
+def _find_matching_rows_arrow(open_source, encoding, sep, header_row, key_col, cnpj_municipios):
+    """1ª passada com o leitor de CSV do pyarrow (em blocos, multithread, só a coluna-chave)."""
+    value_set = pa.array(list(cnpj_municipios), type=pa.string())
+    positions, keys, municipios = [], [], []
+    total = 0
+    with open_source() as f:
+        reader = pa_csv.open_csv(
+            f,
+            read_options=pa_csv.ReadOptions(encoding=encoding, skip_rows=header_row),
+            parse_options=pa_csv.ParseOptions(delimiter=sep, newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(include_columns=[key_col], column_types={key_col: pa.string()}),
+        )
+        for batch in reader:
+            column = batch.column(0)
+            key_clean = pc.replace_substring_regex(column, r'\D', '')
+            hit = pc.fill_null(pc.is_in(key_clean, value_set=value_set), False).to_numpy(zero_copy_only=False)
+            idx = np.flatnonzero(hit)
+            positions.append(idx + total)
+            keys.append(column.take(idx).to_numpy(zero_copy_only=False))
+            municipios.append(np.array([cnpj_municipios[k] for k in key_clean.take(idx).to_pylist()], dtype=object))
+            total += batch.num_rows
+    return total, positions, keys, municipios
+
+def _find_matching_rows_pandas(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize):
+    positions, keys, municipios = [], [], []
+    total = 0
+    with open_source() as f:
+        reader = pd.read_csv(f, sep=sep, dtype=str, header=header_row, encoding=encoding,
+                             usecols=[key_col], on_bad_lines='warn', chunksize=chunksize)
+        for chunk in reader:
+            found = lookup_keys(chunk[key_col], cnpj_municipios)
+            hit = found.notna().to_numpy()
+            positions.append(np.flatnonzero(hit) + total)
+            keys.append(chunk[key_col].to_numpy()[hit])
+            municipios.append(found.to_numpy()[hit])
+            total += len(chunk)
+    return total, positions, keys, municipios
+
+def find_matching_rows(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize):
+    """
+    1ª passada: lê só a coluna-chave. Retorna (linhas lidas, posições das linhas que
+    casam, chave e município de cada uma).
+    """
+    result = None
+    if pa is not None:
+        try:
+            result = _find_matching_rows_arrow(open_source, encoding, sep, header_row, key_col, cnpj_municipios)
+        except (pa.ArrowException, KeyError) as e:
+            # Linhas malformadas, UTF-8 inválido etc.: o leitor do pandas decide
+            print(f"pyarrow could not read the key column ({e}); using the pandas reader.")
+    if result is None:
+        result = _find_matching_rows_pandas(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize)
 
-def filter_file(file_path, santos_cnpjs):
-    """Filters a single file based on CNPJ/ID match."""
-    filename = os.path.basename(file_path)
+    total, positions, keys, municipios = result
+    if not positions:
+        return 0, np.array([], dtype=int), np.array([], dtype=object), np.array([], dtype=object)
+    return total, np.concatenate(positions), np.concatenate(keys), np.concatenate(municipios)
+
+def read_rows(open_source, encoding, sep, header_row, positions):
+    """2ª passada: lê completas apenas as linhas de dados nas posições dadas."""
+    first_data_line = header_row + 1
+    keep = set((positions + first_data_line).tolist())
+    with open_source() as f:
+        return pd.read_csv(f, sep=sep, dtype=str, header=header_row, encoding=encoding,
+                           skiprows=lambda i: i >= first_data_line and i not in keep)
+
+def filter_csv(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize):
+    """
+    Filtra o CSV em duas passadas: a coluna-chave inteira e depois só as linhas que
+    casam. As posições da 1ª passada valem como números de linha do arquivo; se o CSV
+    tiver registros em várias linhas, linhas em branco ou malformadas, a conferência
+    das chaves falha e o filtro volta a ler tudo em blocos (filter_csv_chunks).
+    Retorna (linhas lidas, linhas filtradas, coluna-chave).
+    """
+    columns = read_csv_columns(open_source, encoding, sep, header_row)
+    key_col = resolve_key_col(key_col, columns)
+    if key_col is None:
+        print(f"Could not identify key column. Columns: {columns.tolist()}")
+        return 0, None, None
+
+    total, positions, keys, municipios = find_matching_rows(
+        open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize)
+    if len(positions) == 0:
+        return total, None, key_col
+
+    filtered_df = read_rows(open_source, encoding, sep, header_row, positions)
+    if len(filtered_df) != len(positions) or not (filtered_df[key_col].to_numpy() == keys).all():
+        print("Row positions do not match the key column pass; filtering the whole file in chunks.")
+        return filter_csv_chunks(open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize)
+
+    filtered_df['_municipio'] = municipios
+    return total, filtered_df, key_col
+
+def filter_source(filename, open_source, cnpj_municipios, partitioned=False, chunksize=CHUNK_SIZE):
+    """
+    Filters a single file based on CNPJ/ID match.
+    open_source: função sem argumentos que abre o arquivo em modo binário (arquivo em
+    disco ou membro de um zip), para que nada precise ser extraído para o disco.
+    cnpj_municipios: lookup CNPJ -> código do município (load_cnpj_municipios); com
+    partitioned, cada linha vai para a partição do município do seu CNPJ.
+    """
     print(f"\nProcessing {filename}...")
-    
-    # Determine the key column and separator based on filename or inspection
-    # Based on previous analysis:
-    key_col = None
-    sep = ',' # Default for CSV, but many here are ;
-    
-    if filename.endswith('.csv'):
-        # Just a guess, might need refinement if more CSVs appear
-        sep = ';' 
-    
-    # Mapping based on headers.txt analysis & re-inspection
-    header_row = 0
-    if 'area_subarea' in filename or 'baseprojetososcantiga' in filename:
-        key_col = 'cd_identificador_osc'
-    elif 'recursososc' in filename:
-        key_col = 'cd_identificador_osc' # Verifying this assumptions
-    elif '1434-cebassaude' in filename:
-        key_col = 'NU_CNPJ'
-    elif '8420-cebaseducacao' in filename:
-        key_col = 'CNPJ'
-    elif '7684-cebassuas' in filename:
-        header_row = 4 # Skip first 4 rows
-        key_col = 'CNPJ' # Likely CNPJ column exists
-    elif 'oscs_santos' in filename:
+
+    schema = source_schema(filename)
+    if schema is None:
         print("Skipping source file.")
-        return 
-    
-    # Attempt to read
+        return
+    key_col, header_row = schema['key_col'], schema['header']
+
     try:
         if filename.endswith('.csv'):
-            # Try efficient reading with common params first, then fallback
-            encodings = ['utf-8', 'latin1', 'cp1252']
-            separators = [sep, '\t', ',', ';'] # separators to try if default fails or if specialized logic needed
-            
-            df = None
-            last_error = None
-            
-            for encoding in encodings:
-                for separator in separators:
-                    try:
-                        # Skip bad lines to avoid crash, but maybe wanr?
-                        # on_bad_lines='skip' might hide issues, but for bulk processing typical in gov data...
-                        df = pd.read_csv(file_path, sep=separator, dtype=str, header=header_row, encoding=encoding, on_bad_lines='warn')
-                        
-                        # Validate columns - check if we have > 1 column or if the key is present
-                        # If we read 1 column but expected more, maybe wrong separator
-                        if len(df.columns) > 1:
-                            # Also check if we found a potential key?
-                            # Let's assume valid if > 1 col for now, or check key later
-                            break 
-                        else:
-                            df = None # Reset if 1 column (suspicious for these files)
-                    except Exception as e:
-                        last_error = e
-                        continue
-                if df is not None:
-                    print(f"Read {filename} with encoding={encoding}, sep={repr(separator)}")
-                    break
-            
-            if df is None:
-                raise Exception(f"Failed to read CSV with tried encodings/separators. Last error: {last_error}")
-
-        elif filename.endswith('.xlsx'):
-            df = pd.read_excel(file_path, dtype=str, header=header_row)
-        elif filename.endswith('.xls'):
-             df = pd.read_excel(file_path, dtype=str, engine='xlrd', header=header_row)
+            encoding, sep = detect_csv_format(open_source, header_row, schema['encoding'], schema['sep'])
+            print(f"Read {filename} with encoding={encoding}, sep={repr(sep)}")
+            try:
+                initial_count, filtered_df, key_col = filter_csv(
+                    open_source, encoding, sep, header_row, key_col, cnpj_municipios, chunksize)
+            except UnicodeDecodeError:
+                # Caractere inválido depois da amostra: latin1 decodifica qualquer byte
+                print(f"Encoding {encoding} failed after the sample, retrying {filename} with latin1")
+                initial_count, filtered_df, key_col = filter_csv(
+                    open_source, 'latin1', sep, header_row, key_col, cnpj_municipios, chunksize)
+            if key_col is None:
+                return
+
+        elif filename.endswith(('.xlsx', '.xls')):
+            # O leitor de Excel precisa de um arquivo com seek; membros de zip não têm
+            with open_source() as f:
+                buffer = io.BytesIO(f.read())
+            engine = 'xlrd' if filename.endswith('.xls') else None
+            df = pd.read_excel(buffer, dtype=str, engine=engine, header=header_row)
+            key_col = resolve_key_col(key_col, df.columns)
+            if key_col is None:
+                print(f"Could not identify key column in {filename}. Columns: {df.columns.tolist()}")
+                return
+            initial_count = len(df)
+            filtered_df = filter_frame(df, key_col, cnpj_municipios)
         else:
             print(f"Skipping unsupported file type: {filename}")
             return
 
-        # Normalize columns to find key if not explicitly mapped
-        if key_col is None:
-            # excessive search
-            possible_keys = ['cnpj', 'nu_cnpj', 'cd_identificador_osc', 'id_osc']
-            for col in df.columns:
-                if col.lower() in possible_keys:
-                    key_col = col
-                    break
-        
-        if key_col and key_col in df.columns:
-            print(f"Found key column: {key_col}")
-            # Normalize key column
-            df['key_clean'] = df[key_col].astype(str).str.replace(r'\D', '', regex=True)
-            
-            # Filter
-            initial_count = len(df)
-            filtered_df = df[df['key_clean'].isin(santos_cnpjs)].copy()
-            final_count = len(filtered_df)
-            
-            print(f"Rows: {initial_count} -> {final_count}")
-            
-            if final_count > 0:
-                # Drop helper column
-                filtered_df.drop(columns=['key_clean'], inplace=True)
-                
-                # Save
-                output_path = os.path.join(OUTPUT_DIR, filename)
-                # Save as CSV for consistency and speed, or keep original format?
-                # Let's save as CSV to avoid excel writer issues and for easier usage later, 
-                # unless it was an excel file, then maybe keep it?
-                # Actually, CSV is safer for data portability.
-                output_csv_path = os.path.splitext(output_path)[0] + '.csv'
-                filtered_df.to_csv(output_csv_path, index=False, sep=';')
-                print(f"Saved filtered data to {output_csv_path}")
-            else:
-                print("No matching records found.")
+        print(f"Found key column: {key_col}")
+        final_count = 0 if filtered_df is None else len(filtered_df)
+        print(f"Rows: {initial_count} -> {final_count}")
+
+        if final_count > 0:
+            save_filtered(filtered_df, filename, partitioned)
         else:
-            print(f"Could not identify key column in {filename}. Columns: {df.columns.tolist()}")
+            print("No matching records found.")
 
     except Exception as e:
         print(f"Error processing {filename}: {e}")
 
-def process_zip(zip_path, santos_cnpjs):
-    """Extracts zip and processes contained CSVs."""
+def filter_file(file_path, cnpj_municipios, partitioned=False, chunksize=CHUNK_SIZE):
+    """Filtra um arquivo em disco."""
+    filter_source(os.path.basename(file_path), lambda: open(file_path, 'rb'),
+                  cnpj_municipios, partitioned, chunksize)
+
+def filter_zip_member(zip_path, member, cnpj_municipios, partitioned=False, chunksize=CHUNK_SIZE):
+    """Filtra um membro do zip lendo-o direto do arquivo compactado, sem extração."""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        filter_source(os.path.basename(member), lambda: zip_ref.open(member),
+                      cnpj_municipios, partitioned, chunksize)
+
+# Estado de cada processo do pool: o lookup é enviado uma vez por processo, não por membro
+_worker_state = {}
+
+def _init_filter_worker(cnpj_municipios, partitioned, chunksize):
+    _worker_state['cnpj_municipios'] = cnpj_municipios
+    _worker_state['partitioned'] = partitioned
+    _worker_state['chunksize'] = chunksize
+
+def _filter_member_worker(zip_path, member):
+    filter_zip_member(zip_path, member, _worker_state['cnpj_municipios'],
+                      _worker_state['partitioned'], _worker_state['chunksize'])
+    return member
+
+def process_zip(zip_path, cnpj_municipios, partitioned=False, workers=1, chunksize=CHUNK_SIZE):
+    """
+    Processa os CSV/Excel contidos no zip, lendo cada membro direto do arquivo compactado.
+    Com workers > 1, membros diferentes são filtrados em paralelo (um processo por membro).
+    """
     print(f"\nProcessing zip archive: {zip_path}")
     try:
-        if os.path.exists(TEMP_DIR):
-            shutil.rmtree(TEMP_DIR)
-        os.makedirs(TEMP_DIR)
-        
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(TEMP_DIR)
-            
-        # Walk through extracted files
-        for root, dirs, files in os.walk(TEMP_DIR):
-            for file in files:
-                if file.endswith('.csv') or file.endswith('.xlsx') or file.endswith('.xls'):
-                    full_path = os.path.join(root, file)
-                    filter_file(full_path, santos_cnpjs)
-                    
-        # Cleanup
-        shutil.rmtree(TEMP_DIR)
+            members = [info.filename for info in zip_ref.infolist()
+                       if not info.is_dir() and info.filename.endswith(SUPPORTED_EXTENSIONS)]
+
+        workers = min(workers, len(members))
+        if workers <= 1:
+            for member in members:
+                filter_zip_member(zip_path, member, cnpj_municipios, partitioned, chunksize)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_filter_worker,
+                                 initargs=(cnpj_municipios, partitioned, chunksize)) as executor:
+            futures = [executor.submit(_filter_member_worker, zip_path, member) for member in members]
+            for future in as_completed(futures):
+                future.result()
     except Exception as e:
         print(f"Error processing zip {zip_path}: {e}")
 
-def main():
-    santos_cnpjs = load_santos_cnpjs()
-    if not santos_cnpjs:
-        print("No Santos CNPJs found. Aborting.")
+def main(partitioned=False, workers=1, chunksize=CHUNK_SIZE):
+    """
+    Cada arquivo nacional é lido uma única vez; com partitioned, as linhas de todos os
+    municípios particionados saem da mesma leitura.
+    """
+    cnpj_municipios = load_cnpj_municipios(partitioned)
+    if not cnpj_municipios:
+        print("No OSC CNPJs found. Aborting.")
         return
 
     for filename in os.listdir(DATA_DIR):
         file_path = os.path.join(DATA_DIR, filename)
         if filename.endswith('.zip'):
-             process_zip(file_path, santos_cnpjs)
+             process_zip(file_path, cnpj_municipios, partitioned, workers, chunksize)
         elif os.path.isfile(file_path):
-            filter_file(file_path, santos_cnpjs)
+            filter_file(file_path, cnpj_municipios, partitioned, chunksize)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Filtra as bases nacionais pelos CNPJs das OSCs extraídas.")
+    parser.add_argument('--particionado', action='store_true',
+                        help="Usa todas as partições de oscs_por_municipio/ e grava a saída em "
+                             "dados_filtrados/municipio=<cd_municipio>/ (padrão: apenas Santos, saída plana).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos para filtrar membros de um mesmo zip em paralelo (0 = todos os núcleos). Padrão: 1 (serial).")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help=f"Linhas por bloco de leitura dos CSVs (padrão: {CHUNK_SIZE}).")
+    args = parser.parse_args()
+    main(partitioned=args.particionado, workers=args.workers or os.cpu_count() or 1, chunksize=args.chunksize)
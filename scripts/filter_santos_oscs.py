@@ -1,41 +1,176 @@
 import pandas as pd
 import os
+import re
+import argparse
+import unicodedata
 
 # Define file paths
 input_file = '../dados atualizados/mapaoosc_base_dados_2025_12_11.csv'
-output_file = '../dados atualizados/oscs_santos.csv'
+output_dir = '../dados atualizados'
+
+# Linhas lidas por vez do arquivo nacional (memória limitada ao tamanho do bloco)
+CHUNK_SIZE = 100_000
+
+# Saída particionada: um diretório municipio=<cd_municipio> por município
+PARTITIONS_DIR = os.path.join(output_dir, 'oscs_por_municipio')
+
+def municipio_slug(nome):
+    """Nome de arquivo para o município: 'São Vicente' -> 'sao_vicente'."""
+    nome = unicodedata.normalize('NFKD', nome).encode('ASCII', 'ignore').decode('ASCII')
+    return re.sub(r'[^a-z0-9]+', '_', nome.lower()).strip('_')
+
+def output_paths(municipios):
+    """
+    Caminho de saída de cada (MUNICIPIO, UF): oscs_<municipio>.csv, com o UF no nome
+    apenas se o mesmo município aparecer em mais de um estado na lista.
+    """
+    nomes = [m for m, _ in municipios]
+    paths = {}
+    for municipio, uf in municipios:
+        slug = municipio_slug(municipio)
+        if nomes.count(municipio) > 1:
+            slug = f"{slug}_{uf.lower()}"
+        paths[(municipio, uf)] = os.path.join(output_dir, f"oscs_{slug}.csv")
+    return paths
+
+def partition_path(cd_municipio):
+    return os.path.join(PARTITIONS_DIR, f"municipio={cd_municipio}", 'oscs.csv')
+
+def clean_cd_municipio(values):
+    """Código IBGE como texto de dígitos ('3548500.0' -> '3548500'); vazio vira 'desconhecido'."""
+    codes = values.str.strip().str.replace(r'\.0+$', '', regex=True)
+    return codes.where(codes != '', 'desconhecido')
+
+def read_national_chunks(usecols=None, chunksize=CHUNK_SIZE):
+    """
+    Blocos do arquivo nacional como texto, sem inferência de tipos, para que a saída
+    não dependa de como o arquivo foi dividido em blocos.
+    """
+    # Using latin1 encoding as detected, and ';' as delimiter
+    return pd.read_csv(
+        input_file, sep=';', encoding='latin1', dtype=str,
+        keep_default_na=False, usecols=usecols, chunksize=chunksize
+    )
+
+def append_rows(path, df, started):
+    """Acrescenta df ao CSV em path; o cabeçalho só é escrito na primeira vez (started)."""
+    first = path not in started
+    if first:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        started.add(path)
+    df.to_csv(path, index=False, encoding='utf-8', sep=';', mode='w' if first else 'a', header=first)
+
+def filter_municipios(municipios, usecols=None, chunksize=CHUNK_SIZE):
+    """
+    Lê o arquivo nacional em blocos e grava um CSV por município, acrescentando
+    as linhas de cada bloco ao arquivo correspondente.
+    municipios: lista de (MUNICIPIO, UF). usecols: colunas a manter (padrão: todas).
+    """
+    municipios = [(m.strip().upper(), uf.strip().upper()) for m, uf in municipios]
+    paths = output_paths(municipios)
+    wanted = {f"{m}|{uf}" for m, uf in municipios}
+    counts = dict.fromkeys(municipios, 0)
+
+    if usecols is not None:
+        usecols = list(dict.fromkeys(list(usecols) + ['municipio_nome', 'UF_Sigla']))
 
-def filter_santos_oscs():
     print(f"Reading file: {input_file}")
-    
+    print(f"Municipalities: {', '.join(f'{m}/{uf}' for m, uf in municipios)}")
+
     try:
-        # Read the CSV file
-        # Using latin1 encoding as detected, and ';' as delimiter
-        df = pd.read_csv(input_file, sep=';', encoding='latin1', low_memory=False)
-        
+        started = set()
+        total_rows = 0
+        for chunk in read_national_chunks(usecols, chunksize):
+            total_rows += len(chunk)
+
+            # Normalizing to upper case for comparison just in case
+            key = chunk['municipio_nome'].str.strip().str.upper() + '|' + chunk['UF_Sigla'].str.strip().str.upper()
+            mask = key.isin(wanted)
+            if not mask.any():
+                continue
+
+            for key_value, city_df in chunk[mask].groupby(key[mask], sort=False):
+                municipio, uf = key_value.split('|')
+                append_rows(paths[(municipio, uf)], city_df, started)
+                counts[(municipio, uf)] += len(city_df)
+
         print("File read successfully.")
-        print(f"Total rows: {len(df)}")
-        
-        # Filter for Santos
-        # Normalizing to upper case for comparison just in case
-        santos_df = df[
-            (df['municipio_nome'].str.upper() == 'SANTOS') & 
-            (df['UF_Sigla'].str.upper() == 'SP')
-        ]
-        
-        print(f"Rows found for Santos: {len(santos_df)}")
-        
-        if len(santos_df) > 0:
-            # Save to new CSV
-            santos_df.to_csv(output_file, index=False, encoding='utf-8', sep=';')
-            print(f"Saved filtered data to: {output_file}")
-        else:
-            print("No data found for Santos. Please check the city name and state.")
-            
+        print(f"Total rows: {total_rows}")
+
+        for (municipio, uf), n in counts.items():
+            if n > 0:
+                print(f"Rows found for {municipio}/{uf}: {n} -> {paths[(municipio, uf)]}")
+            else:
+                print(f"No data found for {municipio}/{uf}. Please check the city name and state.")
+
     except Exception as e:
         print(f"An error occurred: {e}")
 
+def extract_partitions(municipios=None, usecols=None, chunksize=CHUNK_SIZE):
+    """
+    Uma única leitura do arquivo nacional gera uma partição por município em
+    oscs_por_municipio/municipio=<cd_municipio>/oscs.csv.
+    municipios: lista opcional de (MUNICIPIO, UF) para restringir a extração; sem ela,
+    todos os municípios do arquivo são particionados.
+    """
+    wanted = None
+    if municipios:
+        wanted = {f"{m.strip().upper()}|{uf.strip().upper()}" for m, uf in municipios}
+    if usecols is not None:
+        usecols = list(dict.fromkeys(list(usecols) + ['cd_municipio', 'municipio_nome', 'UF_Sigla']))
+
+    print(f"Reading file: {input_file}")
+    print(f"Writing partitions to: {PARTITIONS_DIR}")
+
+    try:
+        started = set()
+        counts = {}
+        total_rows = 0
+        for chunk in read_national_chunks(usecols, chunksize):
+            total_rows += len(chunk)
+
+            if wanted is not None:
+                key = chunk['municipio_nome'].str.strip().str.upper() + '|' + chunk['UF_Sigla'].str.strip().str.upper()
+                chunk = chunk[key.isin(wanted)]
+                if chunk.empty:
+                    continue
+
+            for cd_municipio, city_df in chunk.groupby(clean_cd_municipio(chunk['cd_municipio']), sort=False):
+                append_rows(partition_path(cd_municipio), city_df, started)
+                counts[cd_municipio] = counts.get(cd_municipio, 0) + len(city_df)
+
+        print("File read successfully.")
+        print(f"Total rows: {total_rows}")
+        print(f"Partitions written: {len(counts)} municipalities, {sum(counts.values())} rows")
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def filter_santos_oscs():
+    filter_municipios([('SANTOS', 'SP')])
+
+def parse_municipio(value):
+    if '/' not in value:
+        raise argparse.ArgumentTypeError(f"Use MUNICIPIO/UF, ex.: 'SANTOS/SP' (recebido: {value!r})")
+    municipio, uf = value.rsplit('/', 1)
+    return municipio, uf
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai as OSCs de um ou mais municípios da base nacional do Mapa das OSCs.")
+    parser.add_argument('--municipio', action='append', type=parse_municipio, metavar='MUNICIPIO/UF',
+                        help="Município a extrair (pode repetir). Padrão: SANTOS/SP.")
+    parser.add_argument('--colunas', nargs='+', default=None,
+                        help="Colunas a manter na saída (padrão: todas).")
+    parser.add_argument('--particionar', action='store_true',
+                        help="Grava uma partição municipio=<cd_municipio> por município em oscs_por_municipio/ "
+                             "(todos os municípios, ou apenas os de --municipio).")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help=f"Linhas por bloco de leitura (padrão: {CHUNK_SIZE}).")
+    args = parser.parse_args()
+
     # Change working directory to the script's location to ensure relative paths work
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    filter_santos_oscs()
+    if args.particionar:
+        extract_partitions(args.municipio, usecols=args.colunas, chunksize=args.chunksize)
+    else:
+        filter_municipios(args.municipio or [('SANTOS', 'SP')], usecols=args.colunas, chunksize=args.chunksize)
@@ -1,8 +1,30 @@
 import pandas as pd
+import numpy as np
 import glob
 import os
-from difflib import get_close_matches
+import time
+import argparse
+import hashlib
+import json
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
 import unicodedata
+import sys
+
+# Parser monetário compartilhado com o dashboard (dashboard_utils/money.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard_oscs'))
+from dashboard_utils.money import to_cents, cents_to_reais
+
+# Tamanho dos n-gramas de caracteres do índice de nomes
+NGRAM_SIZE = 4
+# Mesmo limiar usado antes com difflib.get_close_matches
+FUZZY_CUTOFF = 0.7
+# Colunas produzidas pela correspondência para cada beneficiária
+MATCH_COLUMNS = ['match_name', 'match_cnpj', 'match_type', 'score']
+# Incrementar quando as regras de match_resource_name mudarem, para invalidar o cache
+MATCHER_VERSION = 1
 
 def normalize_text(text):
     if not isinstance(text, str):
@@ -11,7 +33,333 @@ def normalize_text(text):
     text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
     return text.upper().strip()
 
-def main():
+def build_name_index(names):
+    """
+    Índice dos nomes normalizados do cadastro, construído uma vez por execução.
+    - prefix: n-grama inicial -> nomes (candidatos a "nome do cadastro contido no recurso")
+    - grams: todo n-grama -> nomes (candidatos a "recurso contido no nome do cadastro")
+    - hist/lengths/by_length: histograma de caracteres e tamanho de cada nome, ordenados
+      por tamanho, usados como limite superior vetorizado do SequenceMatcher.ratio()
+    As posições seguem a ordem de `names`, preservando o desempate original.
+    """
+    prefix = defaultdict(list)
+    grams = defaultdict(list)
+    for pos, name in enumerate(names):
+        if len(name) < NGRAM_SIZE:
+            continue
+        prefix[name[:NGRAM_SIZE]].append(pos)
+        for g in {name[i:i + NGRAM_SIZE] for i in range(len(name) - NGRAM_SIZE + 1)}:
+            grams[g].append(pos)
+
+    alphabet = sorted({ch for name in names for ch in name})
+    char_pos = {ch: i for i, ch in enumerate(alphabet)}
+    lengths = np.array([len(n) for n in names], dtype=np.int64)
+    max_count = max((max((n.count(ch) for ch in set(n)), default=0) for n in names), default=0)
+    hist = np.zeros((len(names), len(alphabet)), dtype=np.uint8 if max_count < 256 else np.uint16)
+    for pos, name in enumerate(names):
+        for ch in name:
+            hist[pos, char_pos[ch]] += 1
+
+    by_length = np.argsort(lengths, kind='stable')
+    return {
+        'names': names,
+        'prefix': prefix,
+        'grams': grams,
+        'char_pos': char_pos,
+        'hist': hist[by_length],
+        'lengths': lengths[by_length],
+        'by_length': by_length,
+    }
+
+def find_substring_match(res_name, name_index):
+    """
+    Melhor nome do cadastro contido em res_name (ou que contém res_name).
+    Mesma pontuação e desempate (primeiro nome na ordem do cadastro) da busca
+    linear, mas avaliando só os candidatos que compartilham n-gramas.
+    Retorna (nome, score) ou (None, 0).
+    """
+    names = name_index['names']
+    candidates = set()
+
+    # Nome do cadastro contido no recurso: começa em alguma posição de res_name
+    for i in range(len(res_name) - NGRAM_SIZE + 1):
+        candidates.update(name_index['prefix'].get(res_name[i:i + NGRAM_SIZE], ()))
+
+    # Recurso contido no nome do cadastro: todos os n-gramas de res_name aparecem nele
+    if len(res_name) >= NGRAM_SIZE:
+        postings = [name_index['grams'].get(res_name[i:i + NGRAM_SIZE], ()) for i in range(len(res_name) - NGRAM_SIZE + 1)]
+        candidates.update(min(postings, key=len))
+    else:
+        candidates.update(pos for pos, name in enumerate(names) if res_name in name)
+
+    found_substring = None
+    best_sub_score = 0
+    for pos in sorted(candidates):
+        name_key = names[pos]
+        # Avoid short matches like "A" or "OS"
+        if len(name_key) < 4:
+            continue
+
+        if name_key in res_name:
+            # Calculate simple score based on length ratio
+            score = len(name_key) / len(res_name)
+            
+            # Bonus for starting with the name
+            if res_name.startswith(name_key):
+                score += 0.1
+            
+            if score > best_sub_score:
+                best_sub_score = score
+                found_substring = name_key
+        
+        # Check if res_name is in name_key
+        elif res_name in name_key:
+            score = len(res_name) / len(name_key)
+            if name_key.startswith(res_name): # Bonus
+                score += 0.1
+                
+            if score > best_sub_score:
+                best_sub_score = score
+                found_substring = name_key
+
+    return found_substring, best_sub_score
+
+def _lcs_length(peq, m, b):
+    """
+    Tamanho da maior subsequência comum entre a (representado por peq/m) e b,
+    pelo algoritmo bit-paralelo de Hyyrö. peq mapeia cada caractere de a para o
+    bitmask das posições em que ele ocorre.
+    """
+    full = (1 << m) - 1
+    v = full
+    for ch in b:
+        u = v & peq.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return m - bin(v).count('1')
+
+def find_fuzzy_match(res_name, name_index, cutoff=FUZZY_CUTOFF):
+    """
+    Equivalente a difflib.get_close_matches(res_name, names, n=1, cutoff=cutoff)[0].
+    real_quick_ratio e quick_ratio são calculados de forma vetorizada sobre os nomes
+    de tamanho compatível; o ratio() exato só é calculado em ordem decrescente de
+    quick_ratio até que esse limite superior fique abaixo do melhor score encontrado.
+    Retorna o nome ou None.
+    """
+    la = len(res_name)
+    lengths = name_index['lengths']
+    if la == 0 or len(lengths) == 0:
+        return None
+
+    # real_quick_ratio >= cutoff  <=>  2*min(la, lb) / (la + lb) >= cutoff
+    lo = np.searchsorted(lengths, int(np.floor(la * cutoff / (2 - cutoff))), side='left')
+    hi = np.searchsorted(lengths, int(np.ceil(la * (2 - cutoff) / cutoff)), side='right')
+    if lo >= hi:
+        return None
+    lb = lengths[lo:hi]
+    real_quick = 2.0 * np.minimum(la, lb) / (la + lb)
+
+    query = np.zeros(name_index['hist'].shape[1], dtype=np.int64)
+    for ch in res_name:
+        pos = name_index['char_pos'].get(ch)
+        if pos is not None:
+            query[pos] += 1
+    matches = np.minimum(name_index['hist'][lo:hi], query).sum(axis=1)
+    quick = 2.0 * matches / (la + lb)
+
+    keep = np.flatnonzero((real_quick >= cutoff) & (quick >= cutoff))
+    if len(keep) == 0:
+        return None
+
+    names = name_index['names']
+    order = keep[np.argsort(-quick[keep], kind='stable')]
+    peq = {}
+    for i, ch in enumerate(res_name):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    s = SequenceMatcher()
+    s.set_seq2(res_name)
+    best = None
+    for k in order:
+        if best is not None and quick[k] < best[0]:
+            break
+        x = names[name_index['by_length'][lo + k]]
+        bound = 2.0 * _lcs_length(peq, la, x) / (la + len(x))
+        if bound < cutoff or (best is not None and bound < best[0]):
+            continue
+        s.set_seq1(x)
+        score = s.ratio()
+        # Mesmo critério de heapq.nlargest em get_close_matches: (score, nome)
+        if score >= cutoff and (best is None or (score, x) > best):
+            best = (score, x)
+
+    return best[1] if best else None
+
+def match_resource_name(res_name, osc_lookup, name_index):
+    """
+    Aplica as etapas de correspondência (Manual, Exact, Substring, Fuzzy) a um nome
+    normalizado de beneficiária e retorna o registro para name_map.
+    """
+    # 0. Manual Overrides (Specific User Requests)
+    if "GALP" in res_name and "LAR POBRE" in res_name:
+         # GALP - GRUPO AMIGO DO LAR POBRE -> GRUPO DE APOIO A INCLUSAO SOCIAL E PROFISSIONAL (CNPJ 58.258.633/0001-84)
+         # We need to find this specific OSC in our lookup
+         target_cnpj_root = "58258633" # First 8 digits usually enough to identify or find in lookup
+         
+         found_manual = None
+         for name, info in osc_lookup.items():
+             if str(info['cnpj']).startswith(target_cnpj_root):
+                 found_manual = info
+                 break
+         
+         if found_manual:
+            return {
+                'match_name': found_manual['name'],
+                'match_cnpj': found_manual['cnpj'],
+                'match_type': 'Manual (GALP)',
+                'score': 1.0
+            }
+
+    # 1. Exact Match
+    if res_name in osc_lookup:
+        match_info = osc_lookup[res_name]
+        return {
+            'match_name': match_info['name'],
+            'match_cnpj': match_info['cnpj'],
+            'match_type': 'Exact',
+            'score': 1.0
+        }
+
+    # 3. Substring / Startswith Match
+    # Check if any known name is a substring of resource name or vice versa
+    found_substring, best_sub_score = find_substring_match(res_name, name_index)
+
+    # Dynamic threshold based on length
+    # exact substring of > 15 chars is very likely a match even if ratio is low (e.g. 50%)
+    threshold = 0.6
+    if found_substring and len(found_substring) > 15:
+        threshold = 0.4
+        
+    if found_substring and best_sub_score > threshold:
+         match_info = osc_lookup[found_substring]
+         return {
+            'match_name': match_info['name'],
+            'match_cnpj': match_info['cnpj'],
+            'match_type': 'Substring',
+            'score': best_sub_score
+        }
+        
+    # 4. Fuzzy Match
+    # Same result as difflib.get_close_matches(res_name, valid_osc_names, n=1, cutoff=0.7)
+    best_match = find_fuzzy_match(res_name, name_index)
+    
+    if best_match:
+        # Calculate a similarity score (ratio) just for reporting
+        score = SequenceMatcher(None, res_name, best_match).ratio()
+        
+        match_info = osc_lookup[best_match]
+        return {
+            'match_name': match_info['name'],
+            'match_cnpj': match_info['cnpj'],
+            'match_type': 'Fuzzy',
+            'score': score
+        }
+
+    return {
+        'match_name': None,
+        'match_cnpj': None,
+        'match_type': 'None',
+        'score': 0.0
+    }
+
+# Estado somente-leitura de cada processo do pool (ver match_names)
+_worker_registry = {}
+
+def _init_match_worker(osc_lookup, name_index):
+    _worker_registry['osc_lookup'] = osc_lookup
+    _worker_registry['name_index'] = name_index
+
+def _match_chunk(names):
+    return [match_resource_name(n, _worker_registry['osc_lookup'], _worker_registry['name_index']) for n in names]
+
+def match_names(names, osc_lookup, name_index, workers=1):
+    """
+    Aplica match_resource_name a cada nome e devolve o name_map.
+    Com workers > 1, os nomes são divididos em blocos contíguos entre processos que
+    recebem o cadastro e o índice uma única vez (no initializer); os resultados são
+    juntados na ordem original dos nomes, então a saída é a mesma da execução serial.
+    """
+    names = [n for n in names if n]
+    if workers <= 1 or len(names) < 2:
+        return {n: match_resource_name(n, osc_lookup, name_index) for n in names}
+
+    # Blocos menores que len/workers equilibram nomes que caem no fuzzy (mais caros)
+    chunk_size = max(1, -(-len(names) // (workers * 4)))
+    chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+
+    name_map = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker, initargs=(osc_lookup, name_index)) as executor:
+        for chunk, results in zip(chunks, executor.map(_match_chunk, chunks)):
+            name_map.update(zip(chunk, results))
+    return name_map
+
+def registry_version(osc_lookup):
+    """
+    Hash do cadastro usado na correspondência (nomes normalizados, na ordem do
+    lookup, com nome oficial e CNPJ) e da versão das regras.
+    Qualquer mudança no cadastro pode alterar o melhor match de qualquer nome,
+    então o cache inteiro é invalidado quando este hash muda.
+    """
+    h = hashlib.sha256(f"matcher={MATCHER_VERSION}".encode('utf-8'))
+    for key, info in osc_lookup.items():
+        h.update(json.dumps([key, str(info['name']), str(info['cnpj'])]).encode('utf-8'))
+    return h.hexdigest()
+
+def _open_match_cache(cache_path):
+    conn = sqlite3.connect(cache_path)
+    # Colunas sem tipo declarado guardam o valor como veio (int, str, None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS matches (
+            name_norm TEXT NOT NULL,
+            registry_hash TEXT NOT NULL,
+            match_name,
+            match_cnpj,
+            match_type TEXT NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (name_norm, registry_hash)
+        )
+    """)
+    return conn
+
+def load_cached_matches(cache_path, registry_hash):
+    """
+    Matches já calculados para esta versão do cadastro: {nome_normalizado: registro}.
+    Entradas de versões antigas do cadastro são descartadas.
+    """
+    with _open_match_cache(cache_path) as conn:
+        conn.execute("DELETE FROM matches WHERE registry_hash != ?", (registry_hash,))
+        rows = conn.execute(
+            "SELECT name_norm, match_name, match_cnpj, match_type, score FROM matches WHERE registry_hash = ?",
+            (registry_hash,)
+        ).fetchall()
+    return {
+        name: {'match_name': match_name, 'match_cnpj': match_cnpj, 'match_type': match_type, 'score': score}
+        for name, match_name, match_cnpj, match_type, score in rows
+    }
+
+def store_matches(cache_path, registry_hash, name_map):
+    def plain(value):
+        # sqlite3 não aceita escalares numpy
+        return value.item() if isinstance(value, np.generic) else value
+
+    with _open_match_cache(cache_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (name, registry_hash, plain(m['match_name']), plain(m['match_cnpj']), m['match_type'], float(m['score']))
+                for name, m in name_map.items()
+            ]
+        )
+
+def main(workers=1, use_cache=True):
     # Paths
     oscs_path = "/home/hericmr/Documentos/Mapeamento cŕitico das organizações da sociedade civil em Santos/dados atualizados/oscs_santos.csv"
     resources_pattern = "/home/hericmr/Documentos/Mapeamento cŕitico das organizações da sociedade civil em Santos/dados_fornecidos_pela_prefeitura/dados_completos/prestacao-contas_prestacao_valor-ano_ano_*.csv"
@@ -42,6 +390,7 @@ def main():
              osc_lookup[n_fantasy] = {'name': row['tx_razao_social_osc'], 'cnpj': row['cnpj'], 'normalized_match': n_name} # Map fantasy to main name
 
     valid_osc_names = list(osc_lookup.keys())
+    name_index = build_name_index(valid_osc_names)
 
     # Load Resources
     print(f"Loading Resources files...")
@@ -77,152 +426,49 @@ def main():
     
     print("Starting matching process...")
     unique_resource_names = df_resources['beneficiaria_nome_norm'].unique()
-    name_map = {} # resource_name_norm -> {matched_name, match_type, score, cnpj, natureza}
-
-    for res_name in unique_resource_names:
-        if not res_name:
-            continue
-            
-        # 0. Manual Overrides (Specific User Requests)
-        if "GALP" in res_name and "LAR POBRE" in res_name:
-             # GALP - GRUPO AMIGO DO LAR POBRE -> GRUPO DE APOIO A INCLUSAO SOCIAL E PROFISSIONAL (CNPJ 58.258.633/0001-84)
-             # We need to find this specific OSC in our lookup
-             target_cnpj_root = "58258633" # First 8 digits usually enough to identify or find in lookup
-             
-             found_manual = None
-             for name, info in osc_lookup.items():
-                 if str(info['cnpj']).startswith(target_cnpj_root):
-                     found_manual = info
-                     break
-             
-             if found_manual:
-                name_map[res_name] = {
-                    'match_name': found_manual['name'],
-                    'match_cnpj': found_manual['cnpj'],
-                    'match_type': 'Manual (GALP)',
-                    'score': 1.0
-                }
-                continue
-
-        # 1. Exact Match
-        if res_name in osc_lookup:
-            match_info = osc_lookup[res_name]
-            name_map[res_name] = {
-                'match_name': match_info['name'],
-                'match_cnpj': match_info['cnpj'],
-                'match_type': 'Exact',
-                'score': 1.0
-            }
-            continue
+    # resource_name_norm -> {matched_name, match_type, score, cnpj, natureza}
+    # Nomes já vistos com esta versão do cadastro vêm do cache; só os novos são comparados
+    cache_path = os.path.join(output_dir, "cache_correspondencia_nomes.sqlite")
+    registry_hash = registry_version(osc_lookup)
+    cached_map = load_cached_matches(cache_path, registry_hash) if use_cache else {}
 
-        # 3. Substring / Startswith Match
-        # Check if any known name is a substring of resource name or vice versa
-        found_substring = None
-        best_sub_score = 0
-        
-        for name_key in valid_osc_names:
-            # Check if name_key is in res_name
-            # Avoid short matches like "A" or "OS" unless they are fantasy names verified
-            if len(name_key) < 4:
-                # Only if exact word match
-                if f" {name_key} " in f" {res_name} ":
-                     pass
-                continue
-
-            if name_key in res_name:
-                # Calculate simple score based on length ratio
-                score = len(name_key) / len(res_name)
-                
-                # Bonus for starting with the name
-                if res_name.startswith(name_key):
-                    score += 0.1
-                
-                if score > best_sub_score:
-                    best_sub_score = score
-                    found_substring = name_key
-            
-            # Check if res_name is in name_key
-            elif res_name in name_key:
-                score = len(res_name) / len(name_key)
-                if name_key.startswith(res_name): # Bonus
-                    score += 0.1
-                    
-                if score > best_sub_score:
-                    best_sub_score = score
-                    found_substring = name_key
-
-        # Dynamic threshold based on length
-        # exact substring of > 15 chars is very likely a match even if ratio is low (e.g. 50%)
-        threshold = 0.6
-        if found_substring and len(found_substring) > 15:
-            threshold = 0.4
-            
-        if found_substring and best_sub_score > threshold:
-             match_info = osc_lookup[found_substring]
-             name_map[res_name] = {
-                'match_name': match_info['name'],
-                'match_cnpj': match_info['cnpj'],
-                'match_type': 'Substring',
-                'score': best_sub_score
-            }
-             continue
-            
-        # 4. Fuzzy Match
-        # using difflib.get_close_matches to find potentially close matches
-        matches = get_close_matches(res_name, valid_osc_names, n=1, cutoff=0.7) # Lowered to 0.7
-        
-        if matches:
-            best_match = matches[0]
-            # Calculate a similarity score (ratio) just for reporting
-            from difflib import SequenceMatcher
-            score = SequenceMatcher(None, res_name, best_match).ratio()
-            
-            match_info = osc_lookup[best_match]
-            name_map[res_name] = {
-                'match_name': match_info['name'],
-                'match_cnpj': match_info['cnpj'],
-                'match_type': 'Fuzzy',
-                'score': score
-            }
-        else:
-            name_map[res_name] = {
-                'match_name': None,
-                'match_cnpj': None,
-                'match_type': 'None',
-                'score': 0.0
-            }
+    names = [n for n in unique_resource_names if n]
+    pending = [n for n in names if n not in cached_map]
+    print(f"{len(names) - len(pending)} names from cache, matching {len(pending)} new names...")
+    new_map = match_names(pending, osc_lookup, name_index, workers=workers)
+    if use_cache and new_map:
+        store_matches(cache_path, registry_hash, new_map)
 
-    # Apply comparisons back to dataframe
-    def get_match_info(row):
-        res_name = row['beneficiaria_nome_norm']
-        if res_name in name_map:
-            return pd.Series(name_map[res_name])
-        return pd.Series({'match_name': None, 'match_cnpj': None, 'match_type': 'None', 'score': 0.0})
+    name_map = {n: new_map[n] if n in new_map else cached_map[n] for n in names}
 
-    match_columns = df_resources.apply(get_match_info, axis=1)
+    # Apply comparisons back to dataframe (one merge instead of a per-row apply)
+    join_start = time.perf_counter()
+    df_name_map = pd.DataFrame.from_dict(name_map, orient='index', columns=MATCH_COLUMNS)
+    match_columns = df_resources[['beneficiaria_nome_norm']].merge(
+        df_name_map, left_on='beneficiaria_nome_norm', right_index=True, how='left'
+    ).drop(columns='beneficiaria_nome_norm')
+    match_columns.index = df_resources.index
+    # Names without a match record (e.g. empty) get the same defaults as unmatched ones
+    match_columns['match_type'] = match_columns['match_type'].fillna('None')
+    match_columns['score'] = match_columns['score'].fillna(0.0)
     df_final = pd.concat([df_resources, match_columns], axis=1)
     
     # Enrich with Natureza Juridica
-    # create a dict cnpj -> natureza_cod
+    # create a dict cnpj -> natureza_cod, and cnpj -> description, then map the column once
     cnpj_natureza = dict(zip(df_oscs['cnpj'], df_oscs['cd_natureza_juridica_osc']))
-    
-    def get_natureza(row):
-        cnpj = row['match_cnpj']
-        if pd.isna(cnpj):
-            return None, None
-        
-        # handle float/str mismatch if necessary, assume cnpj is cleaner in df_oscs
-        # df_oscs cnpj format: 11061656000211 (int or str)
-        # match_cnpj might be float from the script earlier if not careful, but osc_lookup stores it from df_oscs row.
-        
-        nat_code = cnpj_natureza.get(cnpj)
-        # Convert to string for safe lookup
-        nat_desc = natureza_map.get(str(nat_code).replace('.0', ''), str(nat_code))
-        return nat_code, nat_desc
+    natureza_desc = {
+        code: natureza_map.get(str(code).replace('.0', ''), str(code))
+        for code in set(cnpj_natureza.values())
+    }
+    cnpj_desc = {cnpj: natureza_desc[code] for cnpj, code in cnpj_natureza.items()}
+
+    df_final['cd_natureza_juridica'] = df_final['match_cnpj'].map(cnpj_natureza)
+    nat_desc = df_final['match_cnpj'].map(cnpj_desc)
+    # Matched CNPJ missing from the registry keeps the old str(None) description
+    df_final['natureza_juridica_desc'] = nat_desc.mask(df_final['match_cnpj'].notna() & nat_desc.isna(), 'None')
 
-    df_final[['cd_natureza_juridica', 'natureza_juridica_desc']] = df_final.apply(
-        lambda row: pd.Series(get_natureza(row)), axis=1
-    )
+    join_elapsed = time.perf_counter() - join_start
+    print(f"Joined {len(df_final)} rows in {join_elapsed:.3f}s ({len(df_final) / max(join_elapsed, 1e-9):,.0f} rows/s)")
 
     # 3. Generate requested tables
     
@@ -241,8 +487,11 @@ def main():
     # Group by the MATCHED name (or original if not matched, but let's focus on matched for the user request)
     # We will exclude unmatched for this specific summary to be clean
     # Include natureza_juridica_desc in the grouping or aggregation
-    summary_osc = df_matched_only.groupby(['match_name', 'match_cnpj', 'natureza_juridica_desc'])['valor_repasse'].sum().reset_index()
+    # Sum in integer cents (exact totals); the CSV keeps valor_repasse in reais
+    summary_osc = df_matched_only.assign(valor_repasse=to_cents(df_matched_only['valor_repasse']))
+    summary_osc = summary_osc.groupby(['match_name', 'match_cnpj', 'natureza_juridica_desc'])['valor_repasse'].sum().reset_index()
     summary_osc = summary_osc.sort_values('valor_repasse', ascending=False)
+    summary_osc['valor_repasse'] = cents_to_reais(summary_osc['valor_repasse'])
     output_summary_osc = os.path.join(output_dir, "tabela_resumo_recursos_por_osc.csv")
     summary_osc.to_csv(output_summary_osc, index=False, sep=';', decimal=',')
     print(f"Saved summary by OSC to {output_summary_osc}")
@@ -254,4 +503,10 @@ def main():
     print(f"Saved unmatched report to {output_unmatched}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Cruza os beneficiários da prestação de contas com o cadastro de OSCs.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos para a etapa de correspondência (0 = todos os núcleos). Padrão: 1 (serial).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora o cache de correspondências e recalcula todos os nomes.")
+    args = parser.parse_args()
+    main(workers=args.workers or os.cpu_count() or 1, use_cache=not args.no_cache)